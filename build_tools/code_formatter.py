@@ -54,6 +54,9 @@ class lookup:
         self.args = args
         self.kwargs = kwargs
         self.locals = {}
+        # Reading f_locals copies all the locals of the frame, so it is
+        # only done once, when the first identifier is looked up
+        self.frame_locals = None
 
     def __setitem__(self, item, val):
         self.locals[item] = val
@@ -71,8 +74,11 @@ class lookup:
         if item == "__line__":
             return self.frame.f_lineno
 
-        if self.formatter.locals and item in self.frame.f_locals:
-            return self.frame.f_locals[item]
+        if self.formatter.locals:
+            if self.frame_locals is None:
+                self.frame_locals = self.frame.f_locals
+            if item in self.frame_locals:
+                return self.frame_locals[item]
 
         if item in self.dict:
             return self.dict[item]
@@ -91,6 +97,13 @@ class lookup:
         raise IndexError("Could not find '%s'" % item)
 
 
+# The kinds of substitution in a compiled format string
+_IDENT = "ident"
+_LONE = "lone"
+_POS = "pos"
+_EVAL = "eval"
+
+
 class code_formatter_meta(type):
     pattern = r"""
     (?:
@@ -123,6 +136,7 @@ class code_formatter_meta(type):
                 "rdb": re.escape(rb2 + rb1),
             }
         cls.pattern = re.compile(pat, re.VERBOSE | re.DOTALL | re.MULTILINE)
+        cls._templates = {}
 
 
 class code_formatter(metaclass=code_formatter_meta):
@@ -137,7 +151,12 @@ class code_formatter(metaclass=code_formatter_meta):
     fix_newlines = True
 
     def __init__(self, *args, **kwargs):
+        # The generated code, as a list of chunks which are only joined
+        # when the code is written out
         self._data = []
+        # Whether the code is empty or the last chunk is a lone newline,
+        # in which case a blank first line of appended code is dropped
+        self._line_start = True
         self._dict = {}
         self._indent_level = 0
         self._indent_spaces = 4
@@ -171,50 +190,59 @@ class code_formatter(metaclass=code_formatter_meta):
         self._data = []
 
     def write(self, *args):
-        f = open(os.path.join(*args), "w")
-        name, extension = os.path.splitext(f.name)
+        """Write the generated code to the file at os.path.join(*args).
+
+        The file is left untouched if it already holds the same code, so
+        its timestamp only changes (and dependent objects only rebuild)
+        when the generated code does.
+        """
+        path = os.path.join(*args)
+        name, extension = os.path.splitext(path)
+        header = ""
 
         # Add a comment to inform which file generated the generated file
         # to make it easier to backtrack and modify generated code
         frame = inspect.currentframe().f_back
         if re.match(r"^\.(cc|hh|c|h)$", extension) is not None:
-            f.write(
-                f"""/**
+            header = f"""/**
  * DO NOT EDIT THIS FILE!
  * File automatically generated by
  *   {frame.f_code.co_filename}:{frame.f_lineno}
  */
 
 """
-            )
         elif re.match(r"^\.py$", extension) is not None:
-            f.write(
-                f"""#
+            header = f"""#
 # DO NOT EDIT THIS FILE!
 # File automatically generated by
 #   {frame.f_code.co_filename}:{frame.f_lineno}
 #
 
 """
-            )
         elif re.match(r"^\.html$", extension) is not None:
-            f.write(
-                f"""<!--
+            header = f"""<!--
  DO NOT EDIT THIS FILE!
  File automatically generated by
    {frame.f_code.co_filename}:{frame.f_lineno}
 -->
 
 """
-            )
 
-        for data in self._data:
-            f.write(data)
-        f.close()
+        contents = header + "".join(self._data)
+        try:
+            with open(path) as f:
+                if f.read() == contents:
+                    return
+        except (OSError, UnicodeDecodeError):
+            pass
+
+        with open(path, "w") as f:
+            f.write(contents)
 
     def __str__(self):
         data = "".join(self._data)
         self._data = [data]
+        self._line_start = data == "\n"
         return data
 
     def __getitem__(self, item):
@@ -234,78 +262,89 @@ class code_formatter(metaclass=code_formatter_meta):
 
     def append(self, data):
         if isinstance(data, code_formatter):
-            self._data.extend(data._data)
+            if data._data:
+                self._data.extend(data._data)
+                self._line_start = data._line_start
         else:
             self._append(str(data))
 
     def _append(self, data):
         if not self._fix_newlines:
             self._data.append(data)
+            self._line_start = data == "\n"
             return
 
-        initial_newline = not self._data or self._data[-1] == "\n"
-        for line in data.splitlines():
-            if line:
-                if self._indent_level:
-                    self._data.append(" " * self._indent_level)
-                self._data.append(line)
-
-            if line or not initial_newline:
-                self._data.append("\n")
-
-            initial_newline = False
-
-    def __call__(self, *args, **kwargs):
-        if not args:
-            self._data.append("\n")
+        lines = data.splitlines()
+        if lines and not lines[0] and self._line_start:
+            del lines[0]
+        if not lines:
             return
 
-        format = args[0]
-        args = args[1:]
+        if self._indent_level:
+            indent = " " * self._indent_level
+            lines = [indent + line if line else line for line in lines]
+        lines.append("")
+        self._data.append("\n".join(lines))
+        self._line_start = True
+
+    @staticmethod
+    def _compile(format):
+        """Split a format string into a list of literal strings and the
+        substitutions to make between them. The result only depends on the
+        format string, so it is cached and reused by every call with the
+        same format, whichever code_formatter or call site it comes from.
+        """
+        if code_formatter.delim not in format:
+            return [format]
 
-        frame = inspect.currentframe().f_back
+        template = code_formatter._templates.get(format)
+        if template is not None:
+            return template
 
-        l = lookup(self, frame, *args, **kwargs)
+        template = []
+        literal = []
+        end = 0
+        for match in code_formatter.pattern.finditer(format):
+            literal.append(format[end : match.start()])
+            end = match.end()
 
-        def convert(match):
-            ident = match.group("lone")
             # check for a lone identifier
+            ident = match.group("lone")
             if ident:
-                indent = match.group("indent")  # must be spaces
-                lone = f"{l[ident]}"
-
-                def indent_lines(gen):
-                    for line in gen:
-                        yield indent
-                        yield line
-
-                return "".join(indent_lines(lone.splitlines(True)))
+                template.append("".join(literal))
+                template.append((_LONE, ident, match.group("indent")))
+                literal = []
+                continue
 
             # check for an identifier, braced or not
             ident = match.group("ident") or match.group("b_ident")
             if ident is not None:
-                return f"{l[ident]}"
+                template.append("".join(literal))
+                template.append((_IDENT, ident, None))
+                literal = []
+                continue
 
             # check for a positional parameter, braced or not
             pos = match.group("pos") or match.group("b_pos")
             if pos is not None:
-                pos = int(pos)
-                if pos > len(args):
-                    raise ValueError(
-                        "Positional parameter #%d not found in pattern" % pos,
-                        code_formatter.pattern,
-                    )
-                return f"{args[int(pos)]}"
+                template.append("".join(literal))
+                template.append((_POS, int(pos), None))
+                literal = []
+                continue
 
             # check for a double braced expression
             eval_expr = match.group("eval")
             if eval_expr is not None:
-                result = eval(eval_expr, {}, l)
-                return f"{result}"
+                template.append("".join(literal))
+                code = compile(eval_expr, "<string>", "eval")
+                template.append((_EVAL, code, None))
+                literal = []
+                continue
 
             # check for an escaped delimiter
             if match.group("escaped") is not None:
-                return "$"
+                literal.append("$")
+                continue
 
             # At this point, we have to match invalid
             if match.group("invalid") is None:
@@ -316,10 +355,7 @@ class code_formatter(metaclass=code_formatter_meta):
                 )
 
             i = match.start("invalid")
-            if i == 0:
-                colno = 1
-                lineno = 1
-            else:
+            if i != 0:
                 lines = format[:i].splitlines(True)
                 colno = i - sum(len(z) for z in lines)
                 lineno = len(lines)
@@ -328,8 +364,54 @@ class code_formatter(metaclass=code_formatter_meta):
                     "Invalid format string: line %d, col %d" % (lineno, colno)
                 )
 
-        d = code_formatter.pattern.sub(convert, format)
-        self._append(d)
+        literal.append(format[end:])
+        template.append("".join(literal))
+
+        code_formatter._templates[format] = template
+        return template
+
+    def __call__(self, *args, **kwargs):
+        if not args:
+            self._data.append("\n")
+            self._line_start = True
+            return
+
+        format = args[0]
+        args = args[1:]
+
+        template = self._compile(format)
+        if len(template) == 1:
+            # Nothing to substitute
+            self._append(template[0])
+            return
+
+        frame = inspect.currentframe().f_back
+
+        l = lookup(self, frame, *args, **kwargs)
+
+        data = [template[0]]
+        for index in range(1, len(template), 2):
+            kind, value, indent = template[index]
+            if kind is _IDENT:
+                data.append(f"{l[value]}")
+            elif kind is _EVAL:
+                data.append(f"{eval(value, {}, l)}")
+            elif kind is _LONE:
+                lone = f"{l[value]}"
+                for line in lone.splitlines(True):
+                    data.append(indent)
+                    data.append(line)
+            else:
+                if value > len(args):
+                    raise ValueError(
+                        "Positional parameter #%d not found in pattern"
+                        % value,
+                        code_formatter.pattern,
+                    )
+                data.append(f"{args[value]}")
+            data.append(template[index + 1])
+
+        self._append("".join(data))
 
 
 __all__ = ["code_formatter"]
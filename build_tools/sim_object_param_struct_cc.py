@@ -116,7 +116,9 @@ else:
     )
 # only include the python params code if python is enabled.
 if use_python:
-    for param in params:
+    # The predecls of inherited params are needed as well, as the _set_params
+    # binding below converts every param of the struct.
+    for param in map(lambda k_v: k_v[1], sorted(sim_object._params.items())):
         param.pybind_predecls(code)
 
     code(
@@ -151,6 +153,34 @@ py::module_ m = m_internal.def_submodule("param_${sim_object}");
         code(".def(py::init<>())")
         code('.def("create", &${sim_object}Params::create)')
 
+        # Sets the name, every param (including inherited ones) and every
+        # port connection count in a single call, rather than crossing the
+        # Python/C++ boundary once per param. The values are passed in the
+        # order of SimObject._cc_param_layout: the name, the params sorted
+        # by name, then the port counts sorted by port name.
+        members = (
+            ["name"]
+            + sorted(sim_object._params.keys())
+            + [
+                f"port_{name}_connection_count"
+                for name in sorted(sim_object._ports.keys())
+            ]
+        )
+        code(
+            '.def("_set_params", [](${sim_object}Params &params, '
+            "const py::tuple &values) {"
+        )
+        code.indent()
+        code(f"if (values.size() != {len(members)})")
+        code(f'    throw py::value_error("Expected {len(members)} values");')
+        for index, member in enumerate(members):
+            code(
+                f"params.{member} = values[{index}].cast<"
+                f"std::decay_t<decltype(params.{member})>>();"
+            )
+        code.dedent()
+        code("})")
+
     param_exports = (
         sim_object.cxx_param_exports
         + [
@@ -99,6 +99,9 @@ class ObjectList:
 
     def _add_objects(self):
         """Add all sub-classes of the base class in the object hierarchy."""
+        # dir(m5.objects) only lists the names of the SimObject index, so
+        # import every module to find all of the sub-classes.
+        m5.objects._load_all()
         for name, cls in inspect.getmembers(m5.objects, self._is_obj_class):
             self._sub_classes[name] = cls
 
@@ -0,0 +1,105 @@
+# Copyright (c) 2024 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A benchmark of the time taken to instantiate a large SimObject tree.
+
+The configuration contains ``--num-domains`` clock domains, each with its own
+voltage domain, so each domain creates two SimObjects with both scalar and
+vector params. The total time taken by ``m5.instantiate()`` is reported, as
+is the part of that time spent creating the C++ params structs
+(``SimObject.getCCParams()``). No simulation is run.
+
+Usage
+-----
+
+```
+scons build/ALL/gem5.opt
+./build/ALL/gem5.opt configs/example/instantiate_benchmark.py \
+    --num-domains 20000
+```
+"""
+
+import argparse
+import time
+
+import m5
+from m5.objects import (
+    Root,
+    SimObject,
+    SrcClockDomain,
+    VoltageDomain,
+)
+
+parser = argparse.ArgumentParser(
+    description="Measures the time taken to instantiate a SimObject tree."
+)
+parser.add_argument(
+    "--num-domains",
+    type=int,
+    default=10000,
+    help="The number of clock domains (each with a voltage domain) to "
+    "instantiate.",
+)
+args = parser.parse_args()
+
+root = Root(full_system=False)
+root.domains = [
+    SrcClockDomain(
+        clock=["2GHz", "1GHz"],
+        voltage_domain=VoltageDomain(voltage=["1.1V", "1V"]),
+    )
+    for _ in range(args.num_domains)
+]
+
+# Accumulate the time spent creating params structs. Each SimObject's params
+# are only created once; later calls return the cached struct.
+params_time = 0.0
+get_cc_params = SimObject.getCCParams
+
+
+def timed_get_cc_params(self):
+    global params_time
+    start = time.perf_counter()
+    try:
+        return get_cc_params(self)
+    finally:
+        params_time += time.perf_counter() - start
+
+
+SimObject.getCCParams = timed_get_cc_params
+
+start = time.perf_counter()
+m5.instantiate()
+total_time = time.perf_counter() - start
+
+num_objects = sum(1 for _ in root.descendants())
+print(f"SimObjects instantiated: {num_objects}")
+print(f"m5.instantiate(): {total_time:.3f} s")
+print(
+    f"SimObject.getCCParams(): {params_time:.3f} s "
+    f"({params_time / num_objects * 1e6:.1f} us per SimObject)"
+)
@@ -55,6 +55,9 @@ import sys
 import m5
 import m5.ticks as ticks
 
+# The SimObject modules are imported on first use, so import all of them
+# to find every class a config.ini can name.
+m5.objects._load_all()
 sim_object_classes_by_name = {
     cls.__name__: cls
     for cls in list(m5.objects.__dict__.values())
@@ -327,6 +327,7 @@ def define_constants(constants):
     constants.gem5_binary_fixture_name = "gem5"
     constants.xml_filename = "results.xml"
     constants.pickle_filename = "results.pickle"
+    constants.timing_filename = "timings.json"
     constants.pickle_protocol = highest_pickle_protocol
 
     # The root directory which all test names will be based off of.
@@ -358,6 +359,22 @@ def define_post_processors(config):
             build_dir = (os.path.join(base_dir, "build"),)
         return build_dir
 
+    def set_default_timing_db(timing_db):
+        """
+        Post-processor to keep the timing database with the results by
+        default.
+        """
+        if not timing_db or timing_db[0] is None:
+            # The shards are balanced on the recorded durations, so the
+            # machines running them must share a timing database rather
+            # than each use the one in its own result path.
+            shard = config._lookup_val("shard")
+            if shard and shard[0]:
+                raise ValueError("--shard requires --timing-db.")
+            result_path = config._lookup_val("result_path")[0]
+            timing_db = (os.path.join(result_path, constants.timing_filename),)
+        return timing_db
+
     def fix_verbosity_hack(verbose):
         return (verbose[0].val,)
 
@@ -422,6 +439,7 @@ def define_post_processors(config):
             return (new_positional_tags_list,)
 
     config._add_post_processor("build_dir", set_default_build_dir)
+    config._add_post_processor("timing_db", set_default_timing_db)
     config._add_post_processor("verbose", fix_verbosity_hack)
     config._add_post_processor("isa", default_isa)
     config._add_post_processor("variant", default_variant)
@@ -526,6 +544,19 @@ def define_common_args(config):
 
     parse_comma_separated_string = lambda st: st.split(",")
 
+    def parse_shard(st):
+        try:
+            index, count = (int(part) for part in st.split("/"))
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"'{st}' is not of the form INDEX/COUNT"
+            )
+        if not 1 <= index <= count:
+            raise argparse.ArgumentTypeError(
+                f"The shard index must be between 1 and {count}"
+            )
+        return (index, count)
+
     # A list of common arguments/flags used across cli parsers.
     common_args = [
         Argument(
@@ -603,6 +634,33 @@ def define_common_args(config):
             default=1,
             help="Number of threads to spawn to run concurrent tests with.",
         ),
+        Argument(
+            "--timing-db",
+            action="store",
+            help="File the durations of the suites and tests are recorded "
+            "to, and read from to start the longest suites first. Defaults "
+            "to %s in the result path." % constants.timing_filename,
+        ),
+        Argument(
+            "--shard",
+            action="store",
+            default=None,
+            type=parse_shard,
+            metavar="INDEX/COUNT",
+            help="Split the selected suites into COUNT shards of about the "
+            "same duration and only run shard INDEX (from 1 to COUNT). "
+            "Requires --timing-db: the shards are only disjoint when every "
+            "machine uses a copy of the same timing database.",
+        ),
+        Argument(
+            "--result-cache",
+            action="store",
+            default=None,
+            help="Directory to cache the output of passing gem5 runs in. A "
+            "run whose gem5 binary, config script, arguments and resources "
+            "are unchanged reuses the cached output instead of running "
+            "gem5 again.",
+        ),
         Argument(
             "-v",
             action="count",
@@ -701,6 +759,9 @@ class RunParser(ArgParser):
         common_args.bin_path.add_to(parser)
         common_args.threads.add_to(parser)
         common_args.test_threads.add_to(parser)
+        common_args.timing_db.add_to(parser)
+        common_args.shard.add_to(parser)
+        common_args.result_cache.add_to(parser)
         common_args.isa.add_to(parser)
         common_args.variant.add_to(parser)
         common_args.length.add_to(parser)
@@ -786,6 +847,8 @@ class RerunParser(ArgParser):
         common_args.bin_path.add_to(parser)
         common_args.threads.add_to(parser)
         common_args.test_threads.add_to(parser)
+        common_args.timing_db.add_to(parser)
+        common_args.result_cache.add_to(parser)
         common_args.isa.add_to(parser)
         common_args.variant.add_to(parser)
         common_args.length.add_to(parser)
@@ -98,23 +98,31 @@ class ResultHandler:
     format.
     """
 
-    def __init__(self, schedule, directory):
+    def __init__(self, schedule, directory, timings=None):
         """
         :param schedule: The entire schedule as a :class:`LoadedLibrary`
             object.
 
         :param directory: Directory to save test stdout/stderr and aggregate
             results to.
+
+        :param timings: A :class:`~testlib.timing.TimingDatabase` the
+            durations of the suites and tests which complete are recorded to.
+            It is saved when the handler is closed.
         """
         self.directory = directory
         self.internal_results = result.InternalLibraryResults(
             schedule, directory
         )
         self.test_stream_manager = _TestStreamManager()
+        self.timings = timings
+        self._start_times = {}
         self._closed = False
 
         self.mapping = {
             log.LibraryStatus.type_id: self.handle_library_status,
+            log.SuiteStatus.type_id: self.handle_status,
+            log.TestStatus.type_id: self.handle_status,
             log.SuiteResult.type_id: self.handle_suite_result,
             log.TestResult.type_id: self.handle_test_result,
             log.TestStderr.type_id: self.handle_stderr,
@@ -129,6 +137,17 @@ class ResultHandler:
         if record["status"] in (state.Status.Complete, state.Status.Avoided):
             self.test_stream_manager.close()
 
+    def handle_status(self, record):
+        if self.timings is None:
+            return
+        uid = record["metadata"].uid
+        if record["status"] == state.Status.Building:
+            self._start_times[uid] = record["timestamp"]
+        elif record["status"] == state.Status.Complete:
+            start_time = self._start_times.pop(uid, None)
+            if start_time is not None:
+                self.timings.record(uid, record["timestamp"] - start_time)
+
     def handle_suite_result(self, record):
         suite_result = self.internal_results.get_suite_result(
             record["metadata"].uid
@@ -170,6 +189,8 @@ class ResultHandler:
             return
         self._closed = True
         self._save()
+        if self.timings is not None:
+            self.timings.save()
 
     def unsuccessful(self):
         """
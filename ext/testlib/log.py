@@ -30,6 +30,8 @@
 This module supplies the global `test_log` object which all testing
 results and messages are reported through.
 """
+import time
+
 import testlib.wrappers as wrappers
 
 
@@ -79,7 +81,9 @@ class Record(metaclass=RecordTypeCounterMetaclass):
 
 class StatusRecord(Record):
     def __init__(self, obj, status):
-        Record.__init__(self, metadata=obj.metadata, status=status)
+        Record.__init__(
+            self, metadata=obj.metadata, status=status, timestamp=time.time()
+        )
 
 
 class ResultRecord(Record):
@@ -37,6 +37,7 @@ import testlib.query as query
 import testlib.result as result
 import testlib.runner as runner
 import testlib.terminal as terminal
+import testlib.timing as timing
 import testlib.uid as uid
 
 
@@ -52,6 +53,7 @@ def entry_message():
 
 class RunLogHandler:
     def __init__(self):
+        self.timings = timing.TimingDatabase(configuration.config.timing_db)
         term_handler = handlers.TerminalHandler(
             verbosity=configuration.config.verbose + log.LogLevel.Info
         )
@@ -66,12 +68,14 @@ class RunLogHandler:
     def schedule_finalized(self, test_schedule):
         # Create the result handler object.
         self.result_handler = handlers.ResultHandler(
-            test_schedule, configuration.config.result_path
+            test_schedule, configuration.config.result_path, self.timings
         )
         self.mp_handler.add_handler(self.result_handler)
 
     def finish_testing(self):
-        self.result_handler.close()
+        # Closing the wrapper handles the records still queued before the
+        # result handler is closed and saves the results.
+        self.mp_handler.close()
 
     def __enter__(self):
         return self
@@ -319,15 +323,14 @@ def run_schedule(test_schedule, log_handler):
     if configuration.config.test_threads > 1:
         library_runner = runner.LibraryParallelRunner(test_schedule)
         library_runner.set_threads(configuration.config.test_threads)
+        library_runner.set_timings(log_handler.timings)
     else:
         library_runner = runner.LibraryRunner(test_schedule)
     library_runner.run()
 
-    failed = log_handler.unsuccessful()
-
     log_handler.finish_testing()
 
-    return 1 if failed else 0
+    return 1 if log_handler.unsuccessful() else 0
 
 
 def do_run():
@@ -353,6 +356,12 @@ def do_run():
             test_schedule = load_tests().schedule
             # Filter tests based on tags
             filter_with_config_tags(test_schedule)
+        if configuration.config.shard:
+            index, count = configuration.config.shard
+            test_schedule.suites = timing.shard(
+                test_schedule.suites, log_handler.timings, index, count
+            )
+            log.test_log.message(f"Selected shard {index} of {count}")
         # Execute the tests
         return run_schedule(test_schedule, log_handler)
 
@@ -43,6 +43,7 @@ import traceback
 
 import testlib.helper as helper
 import testlib.log as log
+import testlib.timing as timing
 from testlib.fixture import SkipException
 from testlib.state import (
     Result,
@@ -172,12 +173,25 @@ class LibraryRunner(SuiteRunner):
 
 
 class LibraryParallelRunner(RunnerPattern):
+    timings = None
+
     def set_threads(self, threads):
         self.threads = threads
 
+    def set_timings(self, timings):
+        """
+        Start the suites longest first, using the durations in the
+        :class:`~testlib.timing.TimingDatabase` ``timings``.
+        """
+        self.timings = timings
+
     def test(self):
+        suites = list(self.testable)
+        if self.timings is not None:
+            suites = timing.longest_first(suites, self.timings)
         pool = multiprocessing.dummy.Pool(self.threads)
-        pool.map(lambda suite: suite.runner(suite).run(), self.testable)
+        # Hand out a single suite at a time so they start in order.
+        pool.map(lambda suite: suite.runner(suite).run(), suites, chunksize=1)
         self.testable.result = compute_aggregate_result(iter(self.testable))
 
 
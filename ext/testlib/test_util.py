@@ -71,3 +71,17 @@ class TestFunction(TestCase):
 
     def test(self, *args, **kwargs):
         self.test_function(*args, **kwargs)
+
+
+class TestFailException(Exception):
+    """Raised by :func:`fail` to fail the running test with a message."""
+
+
+def fail(message, *args):
+    """
+    Fails the running test. The message is formatted with ``args`` if any
+    are given, as in ``message % args``.
+    """
+    if args:
+        message = message % args
+    raise TestFailException(message)
@@ -0,0 +1,126 @@
+# Copyright (c) 2026 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Durations of previous test runs, used to schedule the suites of a run.
+
+Suites are started longest first so that a long suite is not left to run
+alone at the end of a parallel run, and they can be split between several
+machines so that each runs for about the same time.
+"""
+import heapq
+import json
+import os
+
+import testlib.helper as helper
+
+
+class TimingDatabase:
+    """
+    The durations, in seconds, of the suites and tests of previous runs keyed
+    by their uid. Only the duration of the latest run of each is kept.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: The JSON file the durations are loaded from and saved
+            to. It does not need to exist.
+        """
+        self.path = path
+        self._durations = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                self._durations = json.load(f)
+        except (OSError, ValueError):
+            self._durations = {}
+
+    def save(self):
+        # Written to a temporary file first so that a run which is killed
+        # while saving does not lose the durations of the previous runs.
+        helper.mkdir_p(os.path.dirname(os.path.abspath(self.path)))
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._durations, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def record(self, uid, duration):
+        self._durations[str(uid)] = duration
+
+    def duration(self, uid, default=None):
+        return self._durations.get(str(uid), default)
+
+    def estimate(self, uid):
+        """
+        :returns: The duration of the last run of ``uid``. An item which has
+            never run is assumed to be as long as the longest known one, so
+            that new suites are started early rather than left until last.
+        """
+        duration = self.duration(uid)
+        if duration is None:
+            duration = max(self._durations.values(), default=1.0)
+        return duration
+
+
+def longest_first(suites, timings):
+    """
+    Orders ``suites`` by decreasing estimated duration. Suites with the same
+    estimate keep their relative order.
+    """
+    return sorted(suites, key=lambda suite: -timings.estimate(suite.uid))
+
+
+def shard(suites, timings, index, count):
+    """
+    Splits ``suites`` into ``count`` shards of about the same total duration
+    and returns shard number ``index`` (counting from 1), in the order the
+    suites appear in ``suites``.
+
+    Each suite, longest first, is given to the shard with the least work so
+    far. The split only depends on the suite uids and their durations, so
+    every machine selects disjoint shards covering all of the suites as long
+    as they share the same timing database.
+    """
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard {index} is not in the range 1 to {count}")
+
+    ordered = sorted(
+        suites,
+        key=lambda suite: (-timings.estimate(suite.uid), str(suite.uid)),
+    )
+    loads = [(0.0, shard_index) for shard_index in range(1, count + 1)]
+    selected = set()
+    for suite in ordered:
+        load, shard_index = heapq.heappop(loads)
+        if shard_index == index:
+            selected.add(suite.uid)
+        heapq.heappush(
+            loads, (load + timings.estimate(suite.uid), shard_index)
+        )
+
+    return [suite for suite in suites if suite.uid in selected]
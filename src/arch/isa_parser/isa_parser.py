@@ -37,9 +37,14 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import collections
+import hashlib
+import json
 import os
 import re
+import shutil
 import sys
+import tempfile
 import traceback
 
 # get type names
@@ -67,17 +72,22 @@ class Template:
         self.parser = parser
         self.template = t
 
-    def subst(self, d):
-        myDict = None
-
         # Protect non-Python-dict substitutions (e.g. if there's a printf
-        # in the templated C++ code)
-        template = protectNonSubstPercents(self.template)
+        # in the templated C++ code). This and the labels the template
+        # refers to only depend on the template, so are found once rather
+        # than on every substitution.
+        self.protected = protectNonSubstPercents(t)
+        self.labels = labelRE.findall(self.protected)
+
+    def subst(self, d):
+        template = self.protected
 
         # Build a dict ('myDict') to use for the template substitution.
-        # Start with the template namespace.  Make a copy since we're
-        # going to modify it.
-        myDict = self.parser.templateMap.copy()
+        # Its first layer holds the substitutions specific to this call
+        # and the template namespace is layered below it, rather than
+        # copying the whole namespace for every substitution.
+        layer = {}
+        myDict = collections.ChainMap(layer, self.parser.templateMap)
 
         if isinstance(d, InstObjParams):
             # If we're dealing with an InstObjParams object, we need
@@ -86,15 +96,15 @@ class Template:
             # are only function wide still need to be generated.
             compositeCode = ""
 
-            myDict.update(d.__dict__)
             # The "operands" and "snippets" attributes of the InstObjParams
             # objects are for internal use and not substitution.
-            del myDict["operands"]
-            del myDict["snippets"]
+            layer.update(
+                (k, v)
+                for k, v in d.__dict__.items()
+                if k not in ("operands", "snippets")
+            )
 
-            snippetLabels = [
-                l for l in labelRE.findall(template) if l in d.snippets
-            ]
+            snippetLabels = [l for l in self.labels if l in d.snippets]
 
             snippets = {
                 s: self.parser.mungeSnippet(d.snippets[s])
@@ -177,10 +187,10 @@ class Template:
 
         elif isinstance(d, dict):
             # if the argument is a dictionary, we just use it.
-            myDict.update(d)
+            layer.update(d)
         elif hasattr(d, "__dict__"):
             # if the argument is an object, we use its attribute map.
-            myDict.update(d.__dict__)
+            layer.update(d.__dict__)
         else:
             raise TypeError("Template.subst() arg must be or have dictionary")
         return template % myDict
@@ -512,11 +522,23 @@ class InstObjParams:
 
 
 class ISAParser(Grammar):
-    def __init__(self, output_dir, decoder_name="Decoder"):
+    def __init__(
+        self, output_dir, decoder_name="Decoder", cache_dir=None, cache_deps=()
+    ):
         super().__init__()
         self.lex_kwargs["reflags"] = int(re.MULTILINE)
         self.output_dir = output_dir
 
+        # If a cache directory is given, the generated files are stored
+        # there keyed by a hash of the flattened ISA description and of the
+        # files in cache_deps (e.g. the parser itself), so an unchanged ISA
+        # description is not parsed again.
+        self.cache_dir = cache_dir
+        self.cache_deps = cache_deps
+
+        # The names of the files written to output_dir.
+        self.outputs = []
+
         self.filename = None  # for output file watermarking/scaremongering
 
         # variable to hold templates
@@ -529,6 +551,14 @@ class ISAParser(Grammar):
         self._operandsRE = None
         self._operandsWithExtRE = None
 
+        # Memoized results of matching identifiers against operandsRE and
+        # of munging code snippets, which both depend on the operands.
+        self._operandMatches = {}
+        self._mungedSnippets = {}
+
+        # Memoized code blocks with their strings and comments removed.
+        self._strippedCode = {}
+
         # This dictionary maps format name strings to Format objects.
         self.formatMap = {}
 
@@ -1586,6 +1616,43 @@ StaticInstPtr
             operandsWithExtREString, re.MULTILINE
         )
 
+        self._operandMatches = {}
+        self._mungedSnippets = {}
+
+    def stripCode(self, code):
+        """Delete strings and comments from a code block so operands are
+        not matched inside them. Instructions often share code blocks, so
+        the results are memoized."""
+        try:
+            return self._strippedCode[code]
+        except KeyError:
+            stripped = commentRE.sub("", stringRE.sub("", code))
+            self._strippedCode[code] = stripped
+            return stripped
+
+    # Matches the identifiers operandsRE could match: whole words which
+    # are not preceded by a ':'.
+    operandCandidateRE = re.compile(r"(?<![\w:])\w+")
+
+    def findOperands(self, code):
+        """Find the operands in a code block, as matching operandsRE over
+        it would. Returns a list of (full name, base name, extension, end
+        offset) tuples. Each distinct identifier is only matched against
+        operandsRE once."""
+        operandsRE = self.operandsRE()
+        matches = self._operandMatches
+        operands = []
+        for candidate in self.operandCandidateRE.finditer(code):
+            word = candidate.group()
+            try:
+                groups = matches[word]
+            except KeyError:
+                match = operandsRE.fullmatch(word)
+                groups = matches[word] = match.groups() if match else None
+            if groups:
+                operands.append(groups + (candidate.end(),))
+        return operands
+
     def substMungedOpNames(self, code):
         """Munge operand names in code string to make legal C++
         variable names.  This means getting rid of the type extension
@@ -1595,7 +1662,14 @@ StaticInstPtr
     def mungeSnippet(self, s):
         """Fix up code snippets for final substitution in templates."""
         if isinstance(s, str):
-            return self.substMungedOpNames(substBitOps(s))
+            # The same snippets are substituted into several templates
+            # per instruction, and are often shared between instructions.
+            try:
+                return self._mungedSnippets[s]
+            except KeyError:
+                munged = self.substMungedOpNames(substBitOps(s))
+                self._mungedSnippets[s] = munged
+                return munged
         else:
             return s
 
@@ -1603,6 +1677,7 @@ StaticInstPtr
         """Open the output file for writing and include scary warning."""
         filename = os.path.join(self.output_dir, name)
         f = open(filename, "w")
+        self.outputs.append(name)
         if f:
             if not bare:
                 f.write(ISAParser.scaremonger_template % self)
@@ -1679,14 +1754,68 @@ StaticInstPtr
         # do this up front.
         isa_desc = self.read_and_flatten(isa_desc_file)
 
+        if self.cache_dir:
+            cache_entry = os.path.join(self.cache_dir, self.cacheKey(isa_desc))
+            if self.restoreCached(cache_entry):
+                ISAParser.AlreadyGenerated[isa_desc_file] = None
+                return
+
         # Initialize lineno tracker
         self.lex.lineno = LineTracker(isa_desc_file)
 
         # Parse.
         self.parse_string(isa_desc)
 
+        if self.cache_dir:
+            self.storeCached(cache_entry)
+
         ISAParser.AlreadyGenerated[isa_desc_file] = None
 
+    def cacheKey(self, isa_desc):
+        """Hash everything the generated files depend on."""
+        key = hashlib.sha256()
+        key.update(self.decoder_name.encode())
+        for dep in sorted(self.cache_deps):
+            with open(dep, "rb") as f:
+                key.update(hashlib.sha256(f.read()).digest())
+        key.update(isa_desc.encode())
+        return key.hexdigest()
+
+    def restoreCached(self, cache_entry):
+        """Copy the files generated by an earlier parse of the same ISA
+        description to the output directory, if there are any."""
+        try:
+            with open(os.path.join(cache_entry, "outputs.json")) as f:
+                outputs = json.load(f)
+        except (OSError, ValueError):
+            return False
+        for name in outputs:
+            shutil.copyfile(
+                os.path.join(cache_entry, name),
+                os.path.join(self.output_dir, name),
+            )
+        self.outputs = outputs
+        return True
+
+    def storeCached(self, cache_entry):
+        """Store the generated files in the cache. The entry is written
+        under a temporary name and renamed into place, so concurrent builds
+        never see a partial entry."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.cache_dir)
+        for name in self.outputs:
+            shutil.copyfile(
+                os.path.join(self.output_dir, name),
+                os.path.join(staging, name),
+            )
+        with open(os.path.join(staging, "outputs.json"), "w") as f:
+            json.dump(self.outputs, f)
+        try:
+            os.rename(staging, cache_entry)
+        except OSError:
+            # Another build stored the same entry first.
+            shutil.rmtree(staging)
+
     def parse_isa_desc(self, *args, **kwargs):
         try:
             self._parse_isa_desc(*args, **kwargs)
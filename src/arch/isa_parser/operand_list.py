@@ -39,9 +39,7 @@
 
 from .util import (
     assignRE,
-    commentRE,
     error,
-    stringRE,
 )
 
 
@@ -53,14 +51,11 @@ class OperandList:
         self.items = []
         self.bases = {}
         # delete strings and comments so we don't match on operands inside
-        for regEx in (stringRE, commentRE):
-            code = regEx.sub("", code)
+        code = parser.stripCode(code)
 
         # search for operands
-        for match in parser.operandsRE().finditer(code):
-            op = match.groups()
+        for op_full, op_base, op_ext, end in parser.findOperands(code):
             # regexp groups are operand full name, base, and extension
-            (op_full, op_base, op_ext) = op
             # If is a elem operand, define or update the corresponding
             # vector operand
             isElem = False
@@ -71,7 +66,7 @@ class OperandList:
                 op_ext = ""  # use the default one
             # if the token following the operand is an assignment, this is
             # a destination (LHS), else it's a source (RHS)
-            is_dest = assignRE.match(code, match.end()) != None
+            is_dest = assignRE.match(code, end) != None
             is_src = not is_dest
 
             # see if we've already seen this one
@@ -192,14 +187,11 @@ class SubOperandList(OperandList):
         self.items = []
         self.bases = {}
         # delete strings and comments so we don't match on operands inside
-        for regEx in (stringRE, commentRE):
-            code = regEx.sub("", code)
+        code = parser.stripCode(code)
 
         # search for operands
-        for match in parser.operandsRE().finditer(code):
-            op = match.groups()
+        for op_full, op_base, op_ext, _ in parser.findOperands(code):
             # regexp groups are operand full name, base, and extension
-            (op_full, op_base, op_ext) = op
             # If is a elem operand, define or update the corresponding
             # vector operand
             if op_base in parser.elemToVector:
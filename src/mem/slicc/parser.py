@@ -37,6 +37,7 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import hashlib
 import os.path
 import re
 import sys
@@ -49,7 +50,43 @@ from grammar import (
 
 import slicc.ast as ast
 import slicc.util as util
-from slicc.symbols import SymbolTable
+from slicc.symbols import (
+    StateMachine,
+    SymbolTable,
+)
+
+
+def _update(digest, *parts):
+    # Length-prefix every part so that different splits of the same text
+    # never hash the same
+    for part in parts:
+        data = part.encode()
+        digest.update(b"%d:" % len(data))
+        digest.update(data)
+
+
+_generator_digest = None
+
+
+def generatorDigest():
+    """Hash the sources of SLICC and code_formatter, as the generated code
+    also depends on the generator itself"""
+    global _generator_digest
+    if _generator_digest is None:
+        digest = hashlib.sha256()
+        paths = [sys.modules[code_formatter.__module__].__file__]
+        for root, dirs, files in os.walk(os.path.dirname(__file__)):
+            dirs.sort()
+            paths += [
+                os.path.join(root, f)
+                for f in sorted(files)
+                if f.endswith(".py") and f != "parsetab.py"
+            ]
+        for path in paths:
+            with open(path) as f:
+                _update(digest, f.read())
+        _generator_digest = digest.hexdigest()
+    return _generator_digest
 
 
 class SLICC(Grammar):
@@ -62,6 +99,14 @@ class SLICC(Grammar):
         self.symtab = SymbolTable(self)
         self.base_dir = base_dir
 
+        # The text of every parsed file, the include statements and the
+        # lines each machine spans, which are used to hash the inputs of
+        # the generated symbols
+        self.sources = {}
+        self.included = []
+        self.machine_spans = {}
+        self._digests = None
+
         try:
             self.decl_list = self.parse_file(filename, **kwargs)
         except ParseError as e:
@@ -79,11 +124,91 @@ class SLICC(Grammar):
         code["protocol"] = self.protocol
         return code
 
+    def parse_file(self, filename, **kwargs):
+        with open(filename) as f:
+            data = f.read()
+        self.sources.setdefault(filename, data)
+        return self.parse_string(data, filename, **kwargs)
+
     def process(self):
         self.decl_list.generate()
 
-    def writeCodeFiles(self, code_path, includes):
-        self.symtab.writeCodeFiles(code_path, includes)
+    def inputDigests(self):
+        """Hash the sources each generated symbol can depend on.
+
+        The protocol digest covers the generator and every declaration
+        outside of a machine. The lines of each machine, and the files
+        included from within it, are blanked out of it and hashed into the
+        digest of that machine instead, which also covers the protocol
+        digest. Editing a machine therefore only changes its own digest.
+        """
+        if self._digests is not None:
+            return self._digests
+
+        spans = {}
+        for ident, (source, first, last) in self.machine_spans.items():
+            spans.setdefault(source, []).append((first, last, ident))
+
+        # Includes are recorded before the included file is parsed, so the
+        # owners of a file are always known before the files it includes.
+        # A file may be included from within more than one machine.
+        owned = {}
+        for parent, lineno, source in self.included:
+            owners = self._owners(owned, spans, parent, lineno)
+            if owners:
+                owned.setdefault(source, set()).update(owners)
+
+        protocol = hashlib.sha256()
+        machines = {ident: hashlib.sha256() for ident in self.machine_spans}
+        _update(protocol, generatorDigest(), *self.machine_spans)
+        for source, data in self.sources.items():
+            if source in owned:
+                for ident in owned[source]:
+                    _update(machines[ident], source, data)
+                continue
+            lines = data.splitlines(keepends=True)
+            for first, last, ident in spans.get(source, []):
+                _update(machines[ident], source, *lines[first - 1 : last])
+                lines[first - 1 : last] = ["\n"] * (last - first + 1)
+            _update(protocol, source, "".join(lines))
+
+        protocol = protocol.hexdigest()
+        for ident, digest in machines.items():
+            _update(digest, protocol)
+            machines[ident] = digest.hexdigest()
+
+        self._digests = (protocol, machines, spans, owned)
+        return self._digests
+
+    def symbolDigest(self, symbol):
+        """Return the digest of the inputs of a symbol, which is the digest
+        of the machine it is declared in, if any, or the protocol digest"""
+        protocol, machines, spans, owned = self.inputDigests()
+        if isinstance(symbol, StateMachine):
+            return machines[symbol.ident]
+
+        location = symbol.location
+        owners = self._owners(owned, spans, location.filename, location.lineno)
+        if not owners:
+            return protocol
+        if len(owners) == 1:
+            return machines[owners.pop()]
+
+        # The symbol is in a file shared by several machines, so it depends
+        # on all of them
+        digest = hashlib.sha256()
+        _update(digest, *(machines[ident] for ident in sorted(owners)))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _owners(owned, spans, filename, lineno):
+        for first, last, ident in spans.get(filename, []):
+            if first <= lineno <= last:
+                return {ident}
+        return set(owned.get(filename, ()))
+
+    def writeCodeFiles(self, code_path, includes, jobs=None):
+        self.symtab.writeCodeFiles(code_path, includes, jobs)
 
     def writeHTMLFiles(self, html_path):
         self.symtab.writeHTMLFiles(html_path)
@@ -302,15 +427,26 @@ class SLICC(Grammar):
             filename = os.path.join(dirname, p[2])
         else:
             filename = os.path.join(self.base_dir, p[2])
+        self.included.append((self.current_source, p.lineno(1), filename))
         p[0] = self.parse_file(filename)
 
     def p_decl__machine0(self, p):
         "decl : MACHINE '(' enumeration ')' ':' obj_decls '{' decls '}'"
         p[0] = ast.MachineAST(self, p[3], [], p[7], p[9])
+        self.machine_spans[p[0].ident] = (
+            self.current_source,
+            p.lineno(1),
+            p.lineno(9),
+        )
 
     def p_decl__machine1(self, p):
         "decl : MACHINE '(' enumeration pairs ')' ':' obj_decls '{' decls '}'"
         p[0] = ast.MachineAST(self, p[3], p[4], p[7], p[9])
+        self.machine_spans[p[0].ident] = (
+            self.current_source,
+            p.lineno(1),
+            p.lineno(10),
+        )
 
     def p_decl__action(self, p):
         "decl : ACTION '(' ident pairs ')' statements"
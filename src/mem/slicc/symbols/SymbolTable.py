@@ -25,7 +25,11 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import hashlib
+import json
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 from slicc.generate import html
 from slicc.symbols.StateMachine import StateMachine
@@ -43,6 +47,15 @@ def makeDir(path):
         os.makedirs(path, exist_ok=True)
 
 
+# The machines generated by the worker processes, which inherit them when
+# they are forked rather than having them pickled
+_worker_machines = None
+
+
+def _writeMachine(index, path, includes):
+    _worker_machines[index].writeCodeFiles(path, includes)
+
+
 class SymbolTable:
     def __init__(self, slicc):
         self.slicc = slicc
@@ -133,7 +146,13 @@ class SymbolTable:
             if isinstance(symbol, type):
                 yield symbol
 
-    def writeCodeFiles(self, path, includes):
+    def writeCodeFiles(self, path, includes, jobs=None):
+        """Write the code of every symbol to path.
+
+        The digest of the inputs of each type and machine is recorded next
+        to the generated code, and the symbols whose inputs did not change
+        since the last run are not generated again.
+        """
         makeDir(path)
 
         code = self.codeFormatter()
@@ -147,8 +166,80 @@ class SymbolTable:
 
         code.write(path, "Types.hh")
 
+        # The digests of the inputs of the types and machines generated by
+        # the last run. Everything is generated again if any of the files
+        # it wrote is missing.
+        manifest = os.path.join(path, "slicc_digests.json")
+        try:
+            with open(manifest) as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+        for name in self.slicc.files():
+            if not os.path.exists(os.path.join(path, name)):
+                previous = {}
+                break
+
+        digests = {}
+        stale = []
         for symbol in self.sym_vec:
-            symbol.writeCodeFiles(path, includes)
+            if isinstance(symbol, Type) and not symbol.isExternal:
+                name = f"Type:{symbol.c_ident}"
+            elif isinstance(symbol, StateMachine):
+                name = f"StateMachine:{symbol.ident}"
+            else:
+                # The other symbols, such as external types, do not have
+                # any code of their own
+                symbol.writeCodeFiles(path, includes)
+                continue
+
+            digest = hashlib.sha256(self.slicc.symbolDigest(symbol).encode())
+            digest.update(repr(includes).encode())
+            digests[name] = digest.hexdigest()
+            if previous.get(name) != digests[name]:
+                stale.append(symbol)
+
+        # Drop the manifest before changing any output, so that it never
+        # describes outputs left half written by an interrupted run
+        if stale and os.path.exists(manifest):
+            os.remove(manifest)
+
+        machines = []
+        for symbol in stale:
+            if isinstance(symbol, StateMachine):
+                machines.append(symbol)
+            else:
+                symbol.writeCodeFiles(path, includes)
+        self.writeMachines(machines, path, includes, jobs)
+
+        if stale or digests != previous:
+            with open(f"{manifest}.tmp", "w") as f:
+                json.dump(digests, f, indent=2, sort_keys=True)
+            os.replace(f"{manifest}.tmp", manifest)
+
+    def writeMachines(self, machines, path, includes, jobs=None):
+        """Generate the code of the machines, which are independent of each
+        other, with up to jobs forked worker processes"""
+        jobs = min(jobs or 1, len(machines))
+        if jobs <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+            for machine in machines:
+                machine.writeCodeFiles(path, includes)
+            return
+
+        global _worker_machines
+        _worker_machines = machines
+        try:
+            with ProcessPoolExecutor(
+                jobs, mp_context=multiprocessing.get_context("fork")
+            ) as pool:
+                futures = [
+                    pool.submit(_writeMachine, index, path, includes)
+                    for index in range(len(machines))
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            _worker_machines = None
 
     def writeHTMLFiles(self, path):
         makeDir(path)
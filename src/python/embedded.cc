@@ -48,6 +48,7 @@
 #include <cstdlib>
 #include <iostream>
 #include <list>
+#include <vector>
 
 namespace py = pybind11;
 
@@ -75,9 +76,10 @@ EmbeddedPython::getList()
 py::object
 EmbeddedPython::getCode() const
 {
-    Bytef marshalled[len];
+    std::vector<Bytef> marshalled(len);
     uLongf unzlen = len;
-    int ret = uncompress(marshalled, &unzlen, (const Bytef *)code, zlen);
+    int ret = uncompress(marshalled.data(), &unzlen, (const Bytef *)code,
+            zlen);
     if (ret != Z_OK) {
         std::cerr << "Could not uncompress code: " << zError(ret) << std::endl;
         std::abort();
@@ -85,14 +87,21 @@ EmbeddedPython::getCode() const
     assert(unzlen == (uLongf)len);
 
     auto marshal = py::module_::import("marshal");
-    return marshal.attr("loads")(py::bytes((char *)marshalled, len));
+    return marshal.attr("loads")(
+            py::bytes((const char *)marshalled.data(), len));
 }
 
+/*
+ * Register the module with the importer. Only a function returning its
+ * code object is handed over, so the module is not uncompressed and
+ * unmarshalled unless it is actually imported.
+ */
 bool
 EmbeddedPython::addModule() const
 {
     auto importer = py::module_::import("importer");
-    importer.attr("add_module")(abspath, modpath, getCode());
+    py::cpp_function get_code([this]() { return getCode(); });
+    importer.attr("add_module")(abspath, modpath, get_code);
     return true;
 }
 
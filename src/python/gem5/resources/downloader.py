@@ -24,14 +24,10 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import gzip
 import os
 import random
 import shutil
-import tarfile
 import time
-import urllib.parse
-import urllib.request
 from pathlib import Path
 from typing import (
     Dict,
@@ -48,13 +44,18 @@ from ..utils.progress_bar import (
     progress_hook,
     tqdm,
 )
-from ..utils.socks_ssl_context import get_proxy_context
 from .client import get_resource_json_obj
 from .client import list_resources as client_list_resources
 from .md5_utils import (
-    md5_dir,
-    md5_file,
+    invalidate_md5_cache,
+    md5_cached,
+    update_md5_cache,
 )
+from .range_downloader import (
+    download_file,
+    open_url,
+)
+from .stream_extract import extract_stream
 
 """
 This Python module contains functions used to download, list, and obtain
@@ -62,12 +63,24 @@ information about resources from resources.gem5.org.
 """
 
 
-def _download(url: str, download_to: str, max_attempts: int = 6) -> None:
+def _download(
+    url: str,
+    download_to: str,
+    max_attempts: int = 6,
+    gunzip: bool = False,
+    untar: bool = False,
+) -> Optional[str]:
     """
     Downloads a file.
 
+    Where the server supports it, the file is downloaded as concurrent range
+    requests (see ``range_downloader.download_file``). If ``gunzip`` or
+    ``untar`` is set the file is instead decompressed and/or unpacked while it
+    is downloaded (see ``stream_extract.extract_stream``).
+
     The function will run a Truncated Exponential Backoff algorithm to retry
-    the download if the HTTP Status Code returned is deemed retryable.
+    the download if the HTTP Status Code returned is deemed retryable. A
+    retried download resumes from the data already downloaded.
 
     :param url: The URL of the file to download.
 
@@ -76,6 +89,16 @@ def _download(url: str, download_to: str, max_attempts: int = 6) -> None:
     :param max_attempts: The max number of download attempts before stopping.
                          The default is 6. This translates to roughly 1 minute
                          of retrying before stopping.
+
+    :param gunzip: If ``True``, the file is decompressed with gzip as it is
+                   downloaded. ``False`` by default.
+
+    :param untar: If ``True``, the file is unpacked as a tar archive into the
+                  directory ``download_to`` as it is downloaded. ``False`` by
+                  default.
+
+    :returns: The md5 of the downloaded file, or ``None`` if the file was
+              unpacked as a tar archive.
     """
 
     # TODO: This whole setup will only work for single files we can get via
@@ -88,34 +111,26 @@ def _download(url: str, download_to: str, max_attempts: int = 6) -> None:
         # number of download attempts has been reached or if a HTTP status code
         # other than 408, 429, or 5xx is received.
         try:
-            proxy_context = get_proxy_context()
-            if proxy_context:
-                # get the file as a bytes blob
-                request = urllib.request.Request(url)
-                with urllib.request.urlopen(
-                    request, context=proxy_context
-                ) as fr:
-                    with tqdm.wrapattr(
-                        open(download_to, "wb"),
-                        "write",
-                        miniters=1,
-                        desc="Downloading {download_to}",
-                        total=getattr(fr, "length", None),
-                    ) as fw:
-                        for chunk in fr:
-                            fw.write(chunk)
-            else:
-                with tqdm(
-                    unit="B",
-                    unit_scale=True,
-                    unit_divisor=1024,
-                    miniters=1,
-                    desc=f"Downloading {download_to}",
-                ) as t:
-                    urllib.request.urlretrieve(
+            with tqdm(
+                unit="B",
+                unit_scale=True,
+                unit_divisor=1024,
+                miniters=1,
+                desc=f"Downloading {download_to}",
+            ) as t:
+                if not (gunzip or untar):
+                    return download_file(
                         url, download_to, reporthook=progress_hook(t)
                     )
-            return
+                with open_url(url) as response:
+                    return extract_stream(
+                        response,
+                        download_to,
+                        gunzip=gunzip,
+                        untar=untar,
+                        reporthook=progress_hook(t),
+                        total=getattr(response, "length", None) or -1,
+                    )
         except HTTPError as e:
             # If the error code retrieved is retryable, we retry using a
             # Truncated Exponential backoff algorithm, truncating after
@@ -199,6 +214,7 @@ def get_resource(
     clients: Optional[List] = None,
     gem5_version: Optional[str] = core.gem5Version,
     quiet: bool = False,
+    strict_md5: bool = False,
 ) -> None:
     """
     Obtains a gem5 resource and stored it to a specified location. If the
@@ -236,6 +252,12 @@ def get_resource(
     :param quiet: If ``True``, no output will be printed to the console (baring
                   exceptions). ``False`` by default.
 
+    :param strict_md5: If ``True``, the md5 of a resource already present at
+                       ``to_path`` is always recomputed rather than read from
+                       its sidecar md5 cache. Strict verification can also be
+                       enabled by setting the ``GEM5_RESOURCES_STRICT_MD5``
+                       environment variable. ``False`` by default.
+
     :raises Exception: An exception is thrown if a file is already present at
                        ``to_path`` but it does not have the correct md5 sum. An
                        exception will also be thrown is a directory is present
@@ -256,16 +278,17 @@ def get_resource(
         )
 
         if os.path.exists(to_path):
-            if os.path.isfile(to_path):
-                md5 = md5_file(Path(to_path))
-            else:
-                md5 = md5_dir(Path(to_path))
+            md5 = md5_cached(
+                Path(to_path),
+                strict=strict_md5 or "GEM5_RESOURCES_STRICT_MD5" in os.environ,
+            )
 
             if md5 == resource_json["md5sum"]:
                 # In this case, the file has already been download, no need to
                 # do so again.
                 return
             elif download_md5_mismatch:
+                invalidate_md5_cache(Path(to_path))
                 if os.path.isfile(to_path):
                     os.remove(to_path)
                 else:
@@ -276,8 +299,6 @@ def get_resource(
                     "its md5 value is invalid.".format(to_path)
                 )
 
-        download_dest = to_path
-
         # This if-statement is remain backwards compatable with the older,
         # string-based way of doing things. It can be refactored away over
         # time:
@@ -304,14 +325,8 @@ def get_resource(
             and resource_json["is_tar_archive"]
         )
 
-        tar_extension = ".tar"
-        if run_tar_extract:
-            download_dest += tar_extension
-
-        zip_extension = ".gz"
-        if run_unzip:
-            download_dest += zip_extension
-
+        # Compressed and archived resources are decompressed and unpacked as
+        # they are read, so only the final resource is ever written to disk.
         file_uri_path = _file_uri_to_path(resource_json["url"])
         if file_uri_path:
             if not file_uri_path.exists():
@@ -322,71 +337,44 @@ def get_resource(
                 "Resource '{}' is being copied from '{}' to '{}'...".format(
                     resource_name,
                     urlparse(resource_json["url"]).path,
-                    download_dest,
+                    to_path,
                 )
             )
-            shutil.copy(file_uri_path, download_dest)
+            if run_unzip or run_tar_extract:
+                with open(file_uri_path, "rb") as f:
+                    md5 = extract_stream(
+                        f,
+                        to_path,
+                        gunzip=run_unzip,
+                        untar=run_tar_extract,
+                    )
+            else:
+                shutil.copy(file_uri_path, to_path)
+                md5 = None
         else:
             # TODO: Might be nice to have some kind of download status bar here..
             if not quiet:
                 print(
                     f"Resource '{resource_name}' was not found locally. "
-                    f"Downloading to '{download_dest}'..."
+                    f"Downloading to '{to_path}'..."
                 )
 
             # Get the URL.
             url = resource_json["url"]
 
-            _download(url=url, download_to=download_dest)
+            md5 = _download(
+                url=url,
+                download_to=to_path,
+                gunzip=run_unzip,
+                untar=run_tar_extract,
+            )
             if not quiet:
                 print(f"Finished downloading resource '{resource_name}'.")
 
-        if run_unzip:
-            if not quiet:
-                print(
-                    f"Decompressing resource '{resource_name}' "
-                    f"('{download_dest}')..."
-                )
-            unzip_to = download_dest[: -len(zip_extension)]
-            with gzip.open(download_dest, "rb") as f:
-                with open(unzip_to, "wb") as o:
-                    shutil.copyfileobj(f, o)
-            os.remove(download_dest)
-            download_dest = unzip_to
-            if not quiet:
-                print(f"Finished decompressing resource '{resource_name}'.")
-
-        if run_tar_extract:
-            if not quiet:
-                print(
-                    f"Unpacking the the resource '{resource_name}' "
-                    f"('{download_dest}')"
-                )
-            unpack_to = download_dest[: -len(tar_extension)]
-            with tarfile.open(download_dest) as f:
-
-                def is_within_directory(directory, target):
-                    abs_directory = os.path.abspath(directory)
-                    abs_target = os.path.abspath(target)
-
-                    prefix = os.path.commonprefix([abs_directory, abs_target])
-
-                    return prefix == abs_directory
-
-                def safe_extract(
-                    tar, path=".", members=None, *, numeric_owner=False
-                ):
-                    for member in tar.getmembers():
-                        member_path = os.path.join(path, member.name)
-                        if not is_within_directory(path, member_path):
-                            raise Exception(
-                                "Attempted Path Traversal in Tar File"
-                            )
-
-                    tar.extractall(path, members, numeric_owner=numeric_owner)
-
-                safe_extract(f, unpack_to)
-            os.remove(download_dest)
+        if md5:
+            # The md5 was computed while the resource was written so it is
+            # cached to avoid hashing the resource again on the next run.
+            update_md5_cache(Path(to_path), md5)
 
 
 def _file_uri_to_path(uri: str) -> Optional[Path]:
@@ -26,8 +26,23 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import hashlib
+import json
+import os
 from pathlib import Path
-from typing import Type
+from typing import (
+    Any,
+    Dict,
+    Optional,
+    Type,
+)
+
+# The size of the reads used when hashing a file. Resources such as disk
+# images can be tens of gigabytes so large reads are used to keep the number
+# of Python-level calls (and the progress bar updates) low.
+_CHUNK_SIZE = 8 * 1024 * 1024
+
+# The suffix of the sidecar file used to cache the md5 of a resource.
+_CACHE_SUFFIX = ".md5cache"
 
 
 def _md5_update_from_file(
@@ -50,7 +65,7 @@ def _md5_update_from_file(
         desc=f"Computing md5sum on {filename}",
         total=filename.stat().st_size,
     ) as f:
-        for chunk in iter(lambda: f.read(4096), b""):
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
             hash.update(chunk)
     return hash
 
@@ -105,3 +120,128 @@ def md5_dir(directory: Path) -> str:
         if empty files are included or filenames are changed.
     """
     return str(_md5_update_from_dir(directory, hashlib.md5()).hexdigest())
+
+
+def md5_cache_path(path: Path) -> Path:
+    """
+    Returns the path of the sidecar file used to cache the md5 of ``path``.
+
+    The sidecar is stored alongside the resource (not inside it) so that it
+    does not alter the md5 of directory resources.
+
+    :param path: The path of the file or directory being cached.
+    """
+    path = Path(path)
+    return path.with_name(path.name + _CACHE_SUFFIX)
+
+
+def _stat_key(path: Path) -> Dict[str, Any]:
+    """
+    Returns the key used to determine whether a cached md5 is still valid.
+
+    For a file this is its size, modification time (in nanoseconds), and
+    inode. For a directory the same values are gathered for every entry
+    within it and combined, as the directory's own ``mtime`` does not change
+    when a nested file is modified.
+    """
+    stat = os.stat(path)
+    key = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "inode": stat.st_ino,
+    }
+    if path.is_dir():
+        entries = hashlib.md5()
+        total_size = 0
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(dirs + files):
+                entry = os.path.join(root, name)
+                entry_stat = os.stat(entry)
+                total_size += entry_stat.st_size
+                entries.update(
+                    f"{os.path.relpath(entry, path)}\0"
+                    f"{entry_stat.st_size}\0"
+                    f"{entry_stat.st_mtime_ns}\0"
+                    f"{entry_stat.st_ino}\0".encode()
+                )
+        key["size"] = total_size
+        key["entries"] = entries.hexdigest()
+    return key
+
+
+def _read_md5_cache(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(md5_cache_path(path)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def _write_md5_cache(path: Path, key: Dict[str, Any], md5: str) -> None:
+    cache_path = md5_cache_path(path)
+    tmp_path = cache_path.with_name(cache_path.name + f".{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "md5": md5}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache is an optimization only. If the directory is read-only
+        # (e.g., a shared resource directory) we simply do not cache.
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def invalidate_md5_cache(path: Path) -> None:
+    """
+    Removes the cached md5 of ``path``, if one exists.
+
+    :param path: The path of the file or directory whose cache is removed.
+    """
+    try:
+        os.remove(md5_cache_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def update_md5_cache(path: Path, md5: str) -> None:
+    """
+    Records ``md5`` as the md5 of ``path`` in its sidecar cache. This is
+    used when the md5 is already known (e.g., computed while downloading) so
+    that it does not need to be recomputed on the next run.
+
+    :param path: The path of the file or directory.
+    :param md5: The md5 value of ``path``.
+    """
+    path = Path(path)
+    _write_md5_cache(path, _stat_key(path), md5)
+
+
+def md5_cached(path: Path, strict: bool = False) -> str:
+    """
+    Gets the md5 value of a file or directory, using a sidecar cache to avoid
+    rehashing resources which have not changed since they were last hashed.
+
+    The cache entry is keyed on the size, modification time (in nanoseconds),
+    and inode of the path. If any of these differ from the cached values the
+    entry is discarded and the md5 is recomputed.
+
+    :param path: The path to get the md5 of.
+    :param strict: If ``True``, the cache is never trusted and the md5 is
+                   always recomputed (the cache is still refreshed).
+                   ``False`` by default.
+    """
+    path = Path(path)
+    key = _stat_key(path)
+
+    if not strict:
+        entry = _read_md5_cache(path)
+        if entry and entry.get("key") == key and "md5" in entry:
+            return entry["md5"]
+
+    value = md5(path)
+    # Only cache the value if the path was not modified while being hashed.
+    if _stat_key(path) == key:
+        _write_md5_cache(path, key, value)
+    return value
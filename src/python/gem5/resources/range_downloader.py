@@ -0,0 +1,387 @@
+# Copyright (c) 2024 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import hashlib
+import json
+import os
+import re
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPResponse
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib.error import HTTPError
+
+from ..utils.socks_ssl_context import get_proxy_context
+
+"""
+This Python module downloads files over HTTP(S) by splitting them into byte
+ranges which are fetched concurrently. The data is written to a ``.part``
+file which is kept, along with a small JSON state file, if the download is
+interrupted so that a later download of the same URL resumes where it
+stopped. The md5 of the file is computed while it is written.
+"""
+
+# The size of each byte range fetched by a worker thread. Files smaller than
+# this are downloaded with a single range request.
+_SEGMENT_SIZE = 32 * 1024 * 1024
+
+# The size of the reads from the HTTP response and from the ``.part`` file.
+_CHUNK_SIZE = 1024 * 1024
+
+# The default number of concurrent range requests.
+_DEFAULT_WORKERS = 4
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+def open_url(
+    url: str, headers: Optional[Dict[str, str]] = None
+) -> HTTPResponse:
+    """
+    Opens a URL, using the SOCKS proxy set by ``GEM5_USE_PROXY`` if any.
+
+    :param url: The URL to open.
+    :param headers: Additional headers to send with the request.
+    """
+    request = urllib.request.Request(url, headers=headers or {})
+    proxy_context = get_proxy_context()
+    if proxy_context:
+        return urllib.request.urlopen(request, context=proxy_context)
+    return urllib.request.urlopen(request)
+
+
+def _probe(url: str) -> Tuple[Optional[int], bool, Optional[str]]:
+    """
+    Determines the size of the file at ``url`` and whether the server
+    supports range requests. A single-byte range is requested rather than
+    using a ``HEAD`` request as not all servers (e.g., signed redirects)
+    support the latter.
+
+    :returns: A tuple of the size of the file (``None`` if unknown), whether
+              range requests are supported, and a validator (the ``ETag`` or
+              ``Last-Modified`` header) used to check a partial download
+              refers to the same file.
+    """
+    try:
+        response = open_url(url, {"Range": "bytes=0-0"})
+    except HTTPError as e:
+        # A "Range Not Satisfiable" response is returned for empty files.
+        if e.code == 416:
+            return None, False, None
+        raise
+    with response:
+        validator = response.headers.get("ETag") or response.headers.get(
+            "Last-Modified"
+        )
+        if response.status == 206:
+            match = _CONTENT_RANGE_RE.match(
+                response.headers.get("Content-Range", "")
+            )
+            if match and match.group(3) != "*":
+                return int(match.group(3)), True, validator
+            return None, False, validator
+        length = response.headers.get("Content-Length")
+        return (int(length) if length else None), False, validator
+
+
+class _SegmentedDownload:
+    """
+    Downloads a file of a known size as a set of byte ranges fetched by a
+    thread pool.
+
+    The number of contiguous bytes written at the start of each segment is
+    recorded in a JSON state file next to the ``.part`` file. This allows an
+    interrupted download to be resumed.
+
+    The md5 is computed over a "hash frontier". Chunks written at the
+    frontier are hashed as they are written. Segments which complete ahead
+    of the frontier are hashed from the ``.part`` file when the frontier
+    reaches them (at which point they are typically still in the page cache).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        part_path: str,
+        size: int,
+        validator: Optional[str],
+        segment_size: int,
+        reporthook: Optional[Callable[[int, int, int], None]],
+    ):
+        self._url = url
+        self._part_path = part_path
+        self._state_path = f"{part_path}.json"
+        self._size = size
+        self._validator = validator
+        self._segment_size = segment_size
+        self._reporthook = reporthook
+
+        self._segments = [
+            (start, min(start + segment_size, size))
+            for start in range(0, size, segment_size)
+        ]
+        self._written = self._load_state()
+
+        self._lock = threading.Lock()
+        self._hash = hashlib.md5()
+        self._hash_offset = 0
+        self._downloaded = sum(self._written)
+
+    def _load_state(self) -> List[int]:
+        """
+        Loads the state of a previous download. If there is no state, or the
+        state refers to a different file, a new ``.part`` file is created.
+        """
+        try:
+            with open(self._state_path) as f:
+                state = json.load(f)
+            if (
+                os.path.getsize(self._part_path) == self._size
+                and state["url"] == self._url
+                and state["size"] == self._size
+                and state["validator"] == self._validator
+                and state["segment_size"] == self._segment_size
+                and len(state["written"]) == len(self._segments)
+            ):
+                return state["written"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        with open(self._part_path, "wb") as f:
+            f.truncate(self._size)
+        written = [0] * len(self._segments)
+        self._save_state(written)
+        return written
+
+    def _save_state(self, written: List[int]) -> None:
+        tmp_path = f"{self._state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "url": self._url,
+                    "size": self._size,
+                    "validator": self._validator,
+                    "segment_size": self._segment_size,
+                    "written": written,
+                },
+                f,
+            )
+        os.replace(tmp_path, self._state_path)
+
+    def _advance_hash(self) -> None:
+        """
+        Hashes the data which has been written contiguously from the current
+        hash frontier. Must be called with ``self._lock`` held.
+        """
+        with open(self._part_path, "rb") as f:
+            while self._hash_offset < self._size:
+                index = self._hash_offset // self._segment_size
+                available = self._segments[index][0] + self._written[index]
+                if available <= self._hash_offset:
+                    return
+                f.seek(self._hash_offset)
+                while self._hash_offset < available:
+                    chunk = f.read(
+                        min(_CHUNK_SIZE, available - self._hash_offset)
+                    )
+                    self._hash.update(chunk)
+                    self._hash_offset += len(chunk)
+
+    def _on_chunk_written(self, index: int, chunk: bytes) -> None:
+        with self._lock:
+            offset = self._segments[index][0] + self._written[index]
+            self._written[index] += len(chunk)
+            self._downloaded += len(chunk)
+            if offset == self._hash_offset:
+                self._hash.update(chunk)
+                self._hash_offset += len(chunk)
+            if self._reporthook:
+                self._reporthook(self._downloaded, 1, self._size)
+
+    def _fetch_segment(self, index: int) -> None:
+        start, end = self._segments[index]
+        offset = start + self._written[index]
+        if offset >= end:
+            return
+
+        with open_url(
+            self._url, {"Range": f"bytes={offset}-{end - 1}"}
+        ) as response:
+            if response.status != 206:
+                raise Exception(
+                    f"Range request for '{self._url}' returned HTTP status "
+                    f"{response.status} rather than 206."
+                )
+            # An unbuffered file is used so the data is visible to
+            # `_advance_hash` as soon as it has been written.
+            with open(self._part_path, "r+b", buffering=0) as f:
+                f.seek(offset)
+                while offset < end:
+                    chunk = response.read(min(_CHUNK_SIZE, end - offset))
+                    if not chunk:
+                        raise ConnectionResetError(
+                            104,
+                            f"Connection closed after {offset - start} of "
+                            f"{end - start} bytes of range {index} of "
+                            f"'{self._url}'.",
+                        )
+                    view = memoryview(chunk)
+                    while view:
+                        view = view[f.write(view) :]
+                    offset += len(chunk)
+                    self._on_chunk_written(index, chunk)
+
+        with self._lock:
+            self._advance_hash()
+            self._save_state(self._written)
+
+    def run(self, workers: int) -> str:
+        """
+        Downloads the remaining segments of the file.
+
+        :param workers: The number of concurrent range requests.
+
+        :returns: The md5 of the file.
+        """
+        with self._lock:
+            # Hash any data left from a previous (interrupted) download.
+            self._advance_hash()
+            if self._reporthook:
+                self._reporthook(self._downloaded, 1, self._size)
+
+        pending = [
+            index
+            for index, (start, end) in enumerate(self._segments)
+            if start + self._written[index] < end
+        ]
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = [
+                    pool.submit(self._fetch_segment, index)
+                    for index in pending
+                ]
+            # All the segments are attempted before an error is raised so
+            # that as much data as possible is kept for a resumed download.
+            for future in futures:
+                future.result()
+        finally:
+            with self._lock:
+                self._save_state(self._written)
+
+        with self._lock:
+            self._advance_hash()
+            assert self._hash_offset == self._size
+            return self._hash.hexdigest()
+
+    def cleanup(self) -> None:
+        os.remove(self._state_path)
+
+
+def _stream_download(
+    url: str,
+    part_path: str,
+    reporthook: Optional[Callable[[int, int, int], None]],
+) -> str:
+    """
+    Downloads a file with a single request. This is used when the server does
+    not support range requests or does not report the size of the file. Such
+    downloads cannot be resumed.
+
+    :returns: The md5 of the file.
+    """
+    md5 = hashlib.md5()
+    downloaded = 0
+    with open_url(url) as response:
+        total = getattr(response, "length", None) or -1
+        with open(part_path, "wb") as f:
+            for chunk in iter(lambda: response.read(_CHUNK_SIZE), b""):
+                f.write(chunk)
+                md5.update(chunk)
+                downloaded += len(chunk)
+                if reporthook:
+                    reporthook(downloaded, 1, total)
+    return md5.hexdigest()
+
+
+def download_file(
+    url: str,
+    download_to: str,
+    workers: int = _DEFAULT_WORKERS,
+    segment_size: int = _SEGMENT_SIZE,
+    reporthook: Optional[Callable[[int, int, int], None]] = None,
+) -> str:
+    """
+    Downloads a file, fetching byte ranges concurrently where the server
+    supports it.
+
+    The file is downloaded to ``download_to`` with a ``.part`` suffix and
+    renamed once complete. If the download is interrupted, the ``.part`` file
+    is kept and the next call to this function with the same ``url`` and
+    ``download_to`` will resume the download.
+
+    This function does not retry failed requests. Exceptions are raised to
+    the caller, which may retry the download (resuming from the ``.part``
+    file).
+
+    :param url: The URL of the file to download.
+    :param download_to: The location the downloaded file is to be stored.
+    :param workers: The max number of concurrent range requests.
+    :param segment_size: The size of each range request, in bytes.
+    :param reporthook: A function called as data is downloaded with the total
+                       number of bytes downloaded so far, a block size (always
+                       ``1``) and the total size of the file (``-1`` if not
+                       known). This matches the ``reporthook`` of
+                       ``urllib.request.urlretrieve``.
+
+    :returns: The md5 of the downloaded file.
+    """
+    part_path = f"{download_to}.part"
+
+    size, accepts_ranges, validator = _probe(url)
+    if size is None or not accepts_ranges:
+        md5 = _stream_download(url, part_path, reporthook)
+        os.replace(part_path, download_to)
+        return md5
+
+    download = _SegmentedDownload(
+        url=url,
+        part_path=part_path,
+        size=size,
+        validator=validator,
+        segment_size=segment_size,
+        reporthook=reporthook,
+    )
+    md5 = download.run(workers)
+    os.replace(part_path, download_to)
+    download.cleanup()
+    return md5
@@ -0,0 +1,155 @@
+# Copyright (c) 2024 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import gzip
+import hashlib
+import os
+import shutil
+import tarfile
+from typing import (
+    BinaryIO,
+    Callable,
+    Iterator,
+    Optional,
+)
+
+"""
+This Python module decompresses and unpacks resources as they are read from
+a stream (e.g., an HTTP response or a local file). This avoids writing the
+compressed archive to disk before decompressing it into a second copy.
+"""
+
+# The size of the reads from the source stream and the decompressor.
+_CHUNK_SIZE = 1024 * 1024
+
+
+class _ProgressReader:
+    """
+    Wraps a binary stream, reporting the number of bytes read through a
+    ``urllib.request.urlretrieve`` style ``reporthook``.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        reporthook: Optional[Callable[[int, int, int], None]],
+        total: int,
+    ):
+        self._stream = stream
+        self._reporthook = reporthook
+        self._total = total
+        self._read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._read += len(data)
+        if self._reporthook:
+            self._reporthook(self._read, 1, self._total)
+        return data
+
+
+def _is_within_directory(directory: str, target: str) -> bool:
+    abs_directory = os.path.abspath(directory)
+    abs_target = os.path.abspath(target)
+
+    prefix = os.path.commonprefix([abs_directory, abs_target])
+
+    return prefix == abs_directory
+
+
+def _safe_members(
+    tar: tarfile.TarFile, path: str
+) -> Iterator[tarfile.TarInfo]:
+    # In stream mode the members are only known as they are read, so each is
+    # checked just before it is extracted.
+    for member in tar:
+        if not _is_within_directory(path, os.path.join(path, member.name)):
+            raise Exception("Attempted Path Traversal in Tar File")
+        yield member
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def extract_stream(
+    stream: BinaryIO,
+    to_path: str,
+    gunzip: bool,
+    untar: bool,
+    reporthook: Optional[Callable[[int, int, int], None]] = None,
+    total: int = -1,
+) -> Optional[str]:
+    """
+    Decompresses and/or unpacks a resource while it is read from ``stream``.
+
+    The output is written to ``to_path`` with a ``.part`` suffix and renamed to
+    ``to_path`` once complete, so an interrupted extraction never leaves a
+    partial resource at ``to_path``.
+
+    :param stream: The stream of the (compressed and/or archived) resource.
+    :param to_path: The location the resource is to be extracted to.
+    :param gunzip: If ``True``, the stream is decompressed with gzip.
+    :param untar: If ``True``, the stream is unpacked as a tar archive into
+                  the directory ``to_path``. The compression of the archive is
+                  detected automatically so ``gunzip`` has no effect.
+    :param reporthook: A function called as the stream is read with the total
+                       number of bytes read so far, a block size (always
+                       ``1``) and ``total``.
+    :param total: The size of the stream, in bytes, or ``-1`` if not known.
+
+    :returns: The md5 of the file written to ``to_path``. If ``untar`` is
+              ``True``, ``None`` is returned as the md5 of a directory
+              depends on the order of the files within it, which is not the
+              order they are stored in the archive.
+    """
+    part_path = f"{to_path}.part"
+    _remove(part_path)
+    reader = _ProgressReader(stream, reporthook, total)
+
+    try:
+        if untar:
+            with tarfile.open(fileobj=reader, mode="r|*") as tar:
+                tar.extractall(part_path, _safe_members(tar, part_path))
+            md5 = None
+        else:
+            hash = hashlib.md5()
+            source = gzip.GzipFile(fileobj=reader) if gunzip else reader
+            with open(part_path, "wb") as f:
+                for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+                    f.write(chunk)
+                    hash.update(chunk)
+            md5 = hash.hexdigest()
+    except BaseException:
+        _remove(part_path)
+        raise
+
+    _remove(to_path)
+    os.replace(part_path, to_path)
+    return md5
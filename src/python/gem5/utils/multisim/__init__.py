@@ -29,5 +29,6 @@ from .multisim import (
     get_simulator_ids,
     num_simulators,
     run,
+    set_memory_budget,
     set_num_processes,
 )
@@ -29,18 +29,14 @@ This module is the entry point for the multi-simulation (MultiSim) framework.
 It provides a CLI using argparse to obtain the path to the simulation
 configuration script and the number of processes to run in parallel.
 """
-from gem5.utils.multisim.multisim import (
-    module_run,
-    run,
-)
+import gem5.utils.multisim.multisim as multisim
 
 
 def main():
     import argparse
     from pathlib import Path
 
-    global module_run
-    module_run = True
+    multisim.module_run = True
 
     parser = argparse.ArgumentParser(
         description="Pass the config script specifying the simulations to run "
@@ -52,8 +48,36 @@ def main():
         help="The path to the config script specifying the simulations to run using multisim.",
     )
 
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=int,
+        default=None,
+        help="The maximum number of simulations to run in parallel. "
+        "Overrides the number set by the config script.",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=str,
+        default=None,
+        help="The total expected memory (e.g., '64GiB') of the simulations "
+        "run in parallel. Overrides the budget set by the config script. "
+        "Defaults to the physical memory of the host.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=1,
+        help="The number of times to rerun a simulation which fails.",
+    )
+
     args = parser.parse_args()
-    run(module_path=Path(args.config))
+    multisim.run(
+        module_path=Path(args.config),
+        processes=args.processes,
+        memory_budget=args.memory_budget,
+        max_retries=args.max_retries,
+    )
 
 
 if __name__ == "__m5_main__":
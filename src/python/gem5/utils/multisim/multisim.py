@@ -27,15 +27,17 @@
 """This module contains the gem5 MultiSim framework. The gem5 MultiSim
 work functions by allowing a user to specify multiple simulations to run from
 a single gem5 config script. The MuliSim framework will then run these
-simulations in parallel using the Python multiprocessing library.
+simulations in parallel, each in its own gem5 process.
 
 The framework works by having the user add the simulators in a configuration
 via the `add_simulator` function, each with a unique, user specified, id. This
 adds the different simulations to run in parallel to a global list. The
-MultiSim framework then uses the Python multiprocessing library to run the
-simulations in parallel by loading the config script as a module in each child
-process and then selecting the simulation to run via the iid in the global set
-of scheduled simulators jobs to run.
+MultiSim framework then loads the config script once, in a child process, to
+discover the simulations to run (and any resource hints given for them). The
+simulations are then run in parallel by loading the config script as a module
+in each child process and then selecting the simulation to run via the id in
+the global set of scheduled simulators jobs to run. The order in which the
+simulations are run is decided by the scheduler in `scheduler.py`.
 The only difference between the child processes is the id of the simulator.
 
 Important notes
@@ -50,25 +52,48 @@ This script is then passed to the child processes to load.
 """
 
 import importlib
+import json
 import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
 from pathlib import Path
 from typing import (
+    Dict,
+    List,
     Optional,
     Set,
+    Tuple,
+    Union,
+)
+
+from .scheduler import (
+    Job,
+    Scheduler,
 )
 
 # A global variable which __main__.py flips to `True` when multisim is run as
 # an executable module.
 module_run = False
 
-# A global variable to store the simulators to run in parallel. If `None`, then
-# `None` is passed to the `multiprocessing.Pool` which instructs
-# multiprocessing to use the maximum number of available threads.
-# threads.
+# A global variable to store the number of simulators to run in parallel. If
+# `None`, then the number of available threads is used.
 _num_processes = None
 
+# The total expected memory, in bytes, of the simulations run at once. If
+# `None`, the physical memory of the host is used.
+_memory_budget = None
+
 _multi_sim: Set["Simulator"] = set()
 
+# The resource hints of each simulator, keyed by simulator ID: the expected
+# peak memory (in bytes) and the expected duration (in seconds).
+_hints: Dict[str, Tuple[Optional[int], Optional[float]]] = {}
+
+# The name of the file, in the output directory, summarizing each simulation.
+MANIFEST_FILE = "multisim_manifest.json"
+
 
 def _load_module(module_path: Path) -> None:
     """Load the module at the given path."""
@@ -79,82 +104,81 @@ def _load_module(module_path: Path) -> None:
     spec.loader.exec_module(modulevar)
 
 
-def _get_simulator_ids_child_process(id_list, module_path: Path) -> None:
-    """Get the ids of the simulations to be run.
-
-    This function is passed to the Python multiprocessing module and run with
-    the correct module path in the `_get_simulator_ids` function. This function
-    is run in a child process which loads the module (config script) then reads
-    the IDs.
+def _probe_child_process(conn, module_path: Path) -> None:
+    """Loads the module (config script) and sends back the simulations to
+    run, their resource hints and the scheduling settings.
 
     Note: We run this as child process as we cannot load the config script as
-    a module in the main process. This function is used in
-    `get_simulator_ids` and should be used separately.
+    a module in the main process. This function is used by `_probe` and
+    should not be used separately.
     """
 
     _load_module(module_path)
-    global _multi_sim
-    if len(id_list) != 0:
-        id_list *= 0
-    id_list.extend([sim.get_id() for sim in _multi_sim])
-
+    conn.send(
+        {
+            "jobs": [
+                (sim.get_id(),) + _hints.get(sim.get_id(), (None, None))
+                for sim in _multi_sim
+            ],
+            "num_processes": _num_processes,
+            "memory_budget": _memory_budget,
+        }
+    )
+    conn.close()
 
-def _get_num_processes_child_process(
-    num_processes_dict, module_path: Path
-) -> None:
-    """Get the ids of the simulations to be run.
 
-    This function is passed to the Python multiprocessing module and run with
-    the correct module path in the `_get_simulator_ids` function. This function
-    is run in a child process which loads the module (config script) then reads
-    the IDs.
+def _probe(config_module_path: Path) -> Dict:
+    """Determines the simulations we are to run. The only way we can know is
+    by importing the module, which we can only do in a child process. We
+    therefore create a single child process with the sole purpose of
+    importing the module and sending back everything needed to schedule the
+    simulations.
+    """
 
-    Note: We run this as child process as we cannot load the config script as
-    a module in the main process. This function is used in
-    `get_simulator_ids` and should be used separately.
+    recv_conn, send_conn = multiprocessing.Pipe(duplex=False)
+    p = multiprocessing.Process(
+        target=_probe_child_process,
+        args=(send_conn, config_module_path),
+    )
+    p.start()
+    send_conn.close()
+    try:
+        probe = recv_conn.recv()
+    except EOFError:
+        raise Exception(
+            f"Failed to load the MultiSim config script '{config_module_path}'."
+        ) from None
+    finally:
+        p.join()
+    return probe
+
+
+def get_simulator_ids(config_module_path: Path) -> List[str]:
+    """Returns the IDs of the simulations specified in the config script.
+
+    The config script is loaded in a child process, as it cannot be loaded in
+    the main process.
     """
 
-    _load_module(module_path)
-    global _num_processes
-    num_processes_dict["num_processes"] = _num_processes
+    return [job[0] for job in _probe(config_module_path)["jobs"]]
 
 
-def get_simulator_ids(config_module_path: Path) -> list[str]:
-    """This is a  hack to determine the IDs of the simulations we are to run.
-    The only way we can know is by importing the module, which we can only do
-    in the child processes. We therefore create a child process with the
-    sole purpose of importing the module and returning the IDs via
-    a `multiprocessing.Manager` dictionary.
+def get_num_processes(config_module_path: Path) -> Optional[int]:
+    """Returns the number of processes set by the config script, if any."""
 
-    This function handles the creation of the `multiprocessing.Manager` and the
-    `multiprocessing.Process`. It then waits for the process to finish to then
-    return the ids as a set of strings.
-    """
+    return _probe(config_module_path)["num_processes"]
 
-    manager = multiprocessing.Manager()
-    id_list = manager.list()
-    p = multiprocessing.Process(
-        target=_get_simulator_ids_child_process,
-        args=(id_list, config_module_path),
-    )
-    p.start()
-    p.join()
-    return id_list
 
+def _peak_rss() -> int:
+    """Returns the peak resident set size of this process, in bytes."""
+    import resource
 
-def get_num_processes(config_module_path: Path) -> Optional[int]:
-    manager = multiprocessing.Manager()
-    num_processes_dict = manager.dict()
-    p = multiprocessing.Process(
-        target=_get_num_processes_child_process,
-        args=(num_processes_dict, config_module_path),
-    )
-    p.start()
-    p.join()
-    return num_processes_dict["num_processes"]
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports the peak RSS in KiB, macOS in bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
 
 
-def _run(module_path: Path, id: str) -> None:
+def _run(module_path: Path, id: str, conn=None) -> None:
     """Run the simulator with the ID specified."""
 
     _load_module(module_path)
@@ -171,14 +195,44 @@ def _run(module_path: Path, id: str) -> None:
 
     sim_list[0].run()
 
+    if conn is not None:
+        conn.send(_peak_rss())
+        conn.close()
+
 
-def run(module_path: Path, processes: Optional[int] = None) -> None:
+def _host_memory() -> Optional[int]:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def run(
+    module_path: Path,
+    processes: Optional[int] = None,
+    memory_budget: Optional[Union[int, str]] = None,
+    max_retries: int = 1,
+) -> None:
     """Run the simulators specified in the module in parallel.
 
+    Each simulator is run in its own process. Simulators are started longest
+    first (by their expected duration) and only while the sum of their
+    expected memory fits in the memory budget (see `add_simulator`). A
+    simulator whose process fails is rerun up to `max_retries` times. Once all
+    have finished, a summary of each simulator's runs (wall time, peak RSS,
+    exit code and attempts) is written to `multisim_manifest.json` in the
+    output directory.
+
     :param module_path: The path to the module containing the simulators to
     run.
     :param processes: The number of processes to run in parallel. If not
-    specified, the number of available threads will be used.
+    specified, the number set by the config script is used or, if it has not
+    set one, the number of available threads.
+    :param memory_budget: The total expected memory of the simulators run in
+    parallel, in bytes or as a memory size string (e.g., "64GiB"). If not
+    specified, the budget set by the config script is used or, if it has not
+    set one, the physical memory of the host.
+    :param max_retries: The number of times to rerun a failed simulator.
     """
 
     assert len(_multi_sim) == 0, (
@@ -186,27 +240,92 @@ def run(module_path: Path, processes: Optional[int] = None) -> None:
         "(prior to determining number of jobs)."
     )
 
-    # Get the simulator IDs. This both provides us a list of targets
+    # A single probe provides us the list of targets, their resource hints
     # and, by-proxy, the number of jobs.
-    ids = get_simulator_ids(module_path)
-    max_num_processes = get_num_processes(module_path)
+    probe = _probe(module_path)
 
     assert len(_multi_sim) == 0, (
         "Simulators instantiated in main thread instead of child thread "
         "(after determining number of jobs)."
     )
 
-    # Setup the multiprocessing pool. If the number of processes is not
-    # specified (i.e. `None`) the default is the number or available threads.
-    from ..multiprocessing.context import gem5Context
+    import m5
+    from m5.util import (
+        inform,
+        warn,
+    )
+    from m5.util.convert import toMemorySize
+
+    if processes is None:
+        processes = probe["num_processes"] or multiprocessing.cpu_count()
+    if memory_budget is None:
+        memory_budget = probe["memory_budget"]
+    if memory_budget is None:
+        memory_budget = _host_memory()
+    elif isinstance(memory_budget, str):
+        memory_budget = toMemorySize(memory_budget)
+
+    scheduler = Scheduler(
+        jobs=[Job(*job) for job in probe["jobs"]],
+        max_processes=processes,
+        memory_budget=memory_budget,
+        max_retries=max_retries,
+    )
 
-    pool = gem5Context().Pool(processes=max_num_processes, maxtasksperchild=1)
+    # Each simulator is run in a new gem5 process. The processes report their
+    # peak RSS through a pipe once the simulation has completed.
+    from ..multiprocessing.context import gem5Context
 
-    # Use the starmap function to create N child processes each with same
-    # module path (the config script specifying all simulations using MultiSim)
-    # but a different ID. The ID is used to select the correct simulator to
-    # run.
-    pool.starmap(_run, zip([module_path for _ in range(len(ids))], tuple(ids)))
+    context = gem5Context()
+    running = {}
+    while not scheduler.done():
+        job = scheduler.next_job()
+        while job is not None:
+            recv_conn, send_conn = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_run, args=(module_path, job.id, send_conn)
+            )
+            process.start()
+            send_conn.close()
+            running[process.sentinel] = (
+                process,
+                job,
+                recv_conn,
+                time.monotonic(),
+            )
+            job = scheduler.next_job()
+
+        for sentinel in multiprocessing.connection.wait(list(running)):
+            process, job, recv_conn, start = running.pop(sentinel)
+            process.join()
+            wall_time = time.monotonic() - start
+            peak_rss = None
+            try:
+                if recv_conn.poll():
+                    peak_rss = recv_conn.recv()
+            except EOFError:
+                pass
+            recv_conn.close()
+
+            if scheduler.finish(job, process.exitcode, wall_time, peak_rss):
+                warn(
+                    "Simulator '%s' failed with exit code %s. Retrying "
+                    "(attempt %d).",
+                    job.id,
+                    process.exitcode,
+                    job.attempts + 1,
+                )
+            elif process.exitcode != 0:
+                warn(
+                    "Simulator '%s' failed with exit code %s.",
+                    job.id,
+                    process.exitcode,
+                )
+
+    manifest_path = Path(m5.options.outdir) / MANIFEST_FILE
+    with open(manifest_path, "w") as f:
+        json.dump(scheduler.manifest(), f, indent=4)
+    inform("MultiSim summary written to '%s'.", manifest_path)
 
 
 def set_num_processes(num_processes: int) -> None:
@@ -228,7 +347,31 @@ def num_simulators() -> int:
     return len(_multi_sim)
 
 
-def add_simulator(simulator: "Simulator") -> None:
+def set_memory_budget(memory_budget: Union[int, str]) -> None:
+    """Set the total expected memory of the simulators run in parallel.
+
+    Simulators are only started while the sum of the expected memory (see
+    `add_simulator`) of those running fits in this budget. By default, the
+    budget is the physical memory of the host.
+
+    :param memory_budget: The budget, in bytes or as a memory size string
+                          (e.g., "64GiB").
+    """
+    from m5.util.convert import toMemorySize
+
+    if isinstance(memory_budget, str):
+        memory_budget = toMemorySize(memory_budget)
+    if memory_budget < 1:
+        raise ValueError("Memory budget must be greater than 0.")
+    global _memory_budget
+    _memory_budget = memory_budget
+
+
+def add_simulator(
+    simulator: "Simulator",
+    expected_memory: Optional[Union[int, str]] = None,
+    expected_duration: Optional[float] = None,
+) -> None:
     """Add a single simulator to the Multisim. Doing so informs the simulators
     to run this simulator via multiprocessing.
 
@@ -240,9 +383,12 @@ def add_simulator(simulator: "Simulator") -> None:
     simulations having been run).
 
     :param simulator: The simulator to add to the multisim.
-    :param id: The id of the simulator. This is used to reference the
-    simulation. This is particularly important when referencing the correct
-    m5out subdirectory.
+    :param expected_memory: A hint of the peak memory use of the simulation,
+    in bytes or as a memory size string (e.g., "8GiB"). Used to keep the
+    simulations run in parallel within the memory budget (see
+    `set_memory_budget`).
+    :param expected_duration: A hint of the duration of the simulation, in
+    seconds. The longest simulations are started first.
     """
 
     global _multi_sim
@@ -253,6 +399,12 @@ def add_simulator(simulator: "Simulator") -> None:
         simulator.set_id(f"sim_{len(_multi_sim)}")
     _multi_sim.add(simulator)
 
+    if isinstance(expected_memory, str):
+        from m5.util.convert import toMemorySize
+
+        expected_memory = toMemorySize(expected_memory)
+    _hints[simulator.get_id()] = (expected_memory, expected_duration)
+
     # The following code is used to enable a user to run a single simulation
     # from the config script, based on an ID, in the case the config script is
     # passed a traditional gem5 config and not via the multisim module.
@@ -0,0 +1,200 @@
+# Copyright (c) 2024 The Regents of the University of California
+# All Rights Reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""The job scheduler of the MultiSim framework.
+
+Each simulation is a job, run in its own process. Jobs are started longest
+first (by their expected duration, if given) so the longest simulations do
+not end up running alone at the end. A job is only started if its expected
+memory fits in what remains of the host memory budget. When a job cannot
+fit, the scheduler looks further down the queue for one which can. As each
+process is free to take the next job which fits as soon as it finishes its
+last, no process sits idle behind a fixed assignment of jobs.
+"""
+
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+
+
+class Job:
+    """A simulation to be run by the scheduler, and the record of its runs."""
+
+    def __init__(
+        self,
+        id: str,
+        expected_memory: Optional[int] = None,
+        expected_duration: Optional[float] = None,
+    ):
+        """
+        :param id: The ID of the simulator.
+        :param expected_memory: The expected peak memory use of the
+                                simulation, in bytes.
+        :param expected_duration: The expected duration of the simulation,
+                                  in seconds.
+        """
+        self.id = id
+        self.expected_memory = expected_memory
+        self.expected_duration = expected_duration
+        self.attempts = 0
+        self.exit_code: Optional[int] = None
+        self.wall_time: Optional[float] = None
+        self.peak_rss: Optional[int] = None
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "success": self.exit_code == 0,
+            "exit_code": self.exit_code,
+            "attempts": self.attempts,
+            "wall_time": self.wall_time,
+            "peak_rss": self.peak_rss,
+            "expected_memory": self.expected_memory,
+            "expected_duration": self.expected_duration,
+        }
+
+
+class Scheduler:
+    """Decides which job to run next.
+
+    The scheduler does not run the jobs itself. The caller starts the jobs
+    returned by ``next_job()`` and reports their completion via ``finish()``
+    until ``done()``.
+    """
+
+    def __init__(
+        self,
+        jobs: Iterable[Job],
+        max_processes: int,
+        memory_budget: Optional[int] = None,
+        max_retries: int = 0,
+    ):
+        """
+        :param jobs: The jobs to run.
+        :param max_processes: The maximum number of jobs to run at once.
+        :param memory_budget: The total expected memory, in bytes, of the jobs
+                              run at once. Jobs without an expected memory do
+                              not count towards it. If ``None``, there is no
+                              limit.
+        :param max_retries: The number of times a failed job is rerun.
+        """
+        if max_processes < 1:
+            raise ValueError("The number of processes must be at least 1.")
+        if max_retries < 0:
+            raise ValueError("The number of retries cannot be negative.")
+
+        self._max_processes = max_processes
+        self._memory_budget = memory_budget
+        self._max_retries = max_retries
+
+        # Longest first. Jobs without an expected duration keep the order
+        # they were given in, after all the jobs with one.
+        self._pending: List[Job] = sorted(
+            jobs,
+            key=lambda job: (
+                job.expected_duration is None,
+                -(job.expected_duration or 0),
+            ),
+        )
+        self._running: List[Job] = []
+        self.finished: List[Job] = []
+
+    def _memory_in_use(self) -> int:
+        return sum(job.expected_memory or 0 for job in self._running)
+
+    def next_job(self) -> Optional[Job]:
+        """Returns the next job to start, or ``None`` if none can be started
+        until a running job finishes (or if there are no jobs left).
+        """
+        if len(self._running) >= self._max_processes:
+            return None
+
+        chosen = None
+        if self._memory_budget is None:
+            if self._pending:
+                chosen = 0
+        else:
+            available = self._memory_budget - self._memory_in_use()
+            for index, job in enumerate(self._pending):
+                if (job.expected_memory or 0) <= available:
+                    chosen = index
+                    break
+            if chosen is None and self._pending and not self._running:
+                # The job does not fit within the budget even on its own. It
+                # is run alone rather than never.
+                chosen = 0
+
+        if chosen is None:
+            return None
+        job = self._pending.pop(chosen)
+        job.attempts += 1
+        self._running.append(job)
+        return job
+
+    def finish(
+        self,
+        job: Job,
+        exit_code: int,
+        wall_time: float,
+        peak_rss: Optional[int] = None,
+    ) -> bool:
+        """Records the completion of a job.
+
+        :param job: The job, as returned by ``next_job()``.
+        :param exit_code: The exit code of the job's process.
+        :param wall_time: The wall time of this run of the job, in seconds.
+        :param peak_rss: The peak resident set size of this run of the job,
+                         in bytes, if known.
+
+        :returns: ``True`` if the job failed and will be retried.
+        """
+        self._running.remove(job)
+        job.exit_code = exit_code
+        job.wall_time = wall_time
+        job.peak_rss = peak_rss
+
+        if exit_code != 0 and job.attempts <= self._max_retries:
+            # Retried before the other pending jobs, as it was started
+            # before them.
+            self._pending.insert(0, job)
+            return True
+        self.finished.append(job)
+        return False
+
+    def done(self) -> bool:
+        """Returns ``True`` once every job has finished."""
+        return not self._pending and not self._running
+
+    def manifest(self) -> List[Dict[str, Any]]:
+        """Returns a summary of every finished job, ordered by ID."""
+        return [
+            job.to_json()
+            for job in sorted(self.finished, key=lambda job: job.id)
+        ]
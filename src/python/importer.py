@@ -28,23 +28,29 @@ import importlib
 import importlib.abc
 import importlib.util
 import os
+import types
 
 
 class ByteCodeLoader(importlib.abc.Loader):
+    # The code may be given as a function returning the code object, in
+    # which case it is only called once the module is imported.
     def __init__(self, code):
         super().__init__()
         self.code = code
 
     def exec_module(self, module):
-        exec(self.code, module.__dict__)
+        exec(self.get_code(module.__name__), module.__dict__)
 
     def get_code(self, _):
+        if not isinstance(self.code, types.CodeType):
+            self.code = self.code()
         return self.code
 
 
 # Simple importer that allows python to import data from a dict of
 # code objects.  The keys are the module path, and the items are the
-# filename and bytecode of the file.
+# filename and bytecode of the file, or a function returning the bytecode
+# (which embedded modules use to defer uncompressing their code).
 class CodeImporter:
     def __init__(self):
         self.modules = {}
@@ -300,6 +300,16 @@ class MetaSimObject(type):
             else:
                 setattr(cls, key, val)
 
+        # The layout of the C++ params struct, as used by getCCParams(). The
+        # params and ports of a class are fixed once it has been defined, so
+        # they are sorted once here rather than every time a params struct is
+        # created.
+        cls._cc_param_layout = tuple(
+            (name, isinstance(pdesc, VectorParamDesc))
+            for name, pdesc in sorted(cls._params.items())
+        )
+        cls._cc_port_layout = tuple(sorted(cls._ports.keys()))
+
     def _set_keyword(cls, keyword, val, kwtype):
         if not isinstance(val, kwtype):
             raise TypeError(
@@ -1186,11 +1196,11 @@ class SimObject(metaclass=MetaSimObject):
 
         cc_params_struct = getattr(m5.internal.params, f"{self.type}Params")
         cc_params = cc_params_struct()
-        cc_params.name = str(self)
 
-        param_names = list(self._params.keys())
-        param_names.sort()
-        for param in param_names:
+        # The name, param values and port connection counts, in the order
+        # expected by the params struct's _set_params binding.
+        values = [str(self)]
+        for param, is_vector in self._cc_param_layout:
             value = self._values.get(param)
             if value is None:
                 fatal(
@@ -1215,34 +1225,17 @@ class SimObject(metaclass=MetaSimObject):
                 )
 
             value = value.getValue()
-            if isinstance(self._params[param], VectorParamDesc):
+            if is_vector:
                 assert isinstance(value, list)
-                vec = getattr(cc_params, param)
-                assert not len(vec)
-                # Some types are exposed as opaque types. They support
-                # the append operation unlike the automatically
-                # wrapped types.
-                if isinstance(vec, list):
-                    setattr(cc_params, param, list(value))
-                else:
-                    for v in value:
-                        getattr(cc_params, param).append(v)
-            else:
-                setattr(cc_params, param, value)
+            values.append(value)
 
-        port_names = list(self._ports.keys())
-        port_names.sort()
-        for port_name in port_names:
+        for port_name in self._cc_port_layout:
             port = self._port_refs.get(port_name, None)
-            if port != None:
-                port_count = len(port)
-            else:
-                port_count = 0
-            setattr(
-                cc_params,
-                "port_" + port_name + "_connection_count",
-                port_count,
-            )
+            values.append(len(port) if port != None else 0)
+
+        # All the values are set in a single call to C++.
+        cc_params._set_params(tuple(values))
+
         self._ccParams = cc_params
         return self._ccParams
 
@@ -25,12 +25,23 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 from .abstract_stat import AbstractStat
+from .columnar import (
+    ColumnarStats,
+    ColumnarWriter,
+    load_columnar,
+)
+from .deltas import (
+    DeltaEncoder,
+    iter_dumps,
+)
 from .group import (
     Group,
+    PathIndex,
     SimObjectGroup,
     SimObjectVectorGroup,
 )
 from .jsonloader import JsonLoader
+from .lazyloader import load_lazy
 from .serializable_stat import SerializableStat
 from .simstat import SimStat
 from .statistic import (
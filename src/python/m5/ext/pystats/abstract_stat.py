@@ -37,6 +37,10 @@ from typing import (
 
 from .serializable_stat import SerializableStat
 
+# Matches the index at the end of the name of a SimObject vector element
+# (e.g., the "3" in "cpu3").
+_VECTOR_INDEX = re.compile("[0-9]+$")
+
 
 class AbstractStat(SerializableStat):
     """
@@ -89,9 +93,7 @@ class AbstractStat(SerializableStat):
             pattern = re.compile(regex)
         else:
             pattern = regex
-        return self.children(
-            lambda _name: re.match(pattern, _name), recursive=True
-        )
+        return self.children(pattern.match, recursive=True)
 
     def _get_vector_item(self, item: str) -> Optional[Tuple[str, int, Any]]:
         """It has been the case in gem5 that SimObject vectors are stored as
@@ -101,8 +103,9 @@ class AbstractStat(SerializableStat):
         split into a SimObject name and index, or if the SimObject does not
         exit at `Simobject[index]`, the function returns None.
         """
-        regex = re.compile("[0-9]+$")
-        match = regex.search(item)
+        if not item[-1:].isdigit():
+            return None
+        match = _VECTOR_INDEX.search(item)
         if not match:
             return None
 
@@ -117,7 +120,7 @@ class AbstractStat(SerializableStat):
             try:
                 vector_value = vector[vector_index]
                 return vector_name, vector_index, vector_value
-            except KeyError:
+            except (KeyError, IndexError):
                 pass
         return None
 
@@ -0,0 +1,405 @@
+# Copyright (c) 2024 The Regents of The University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A columnar store for time series of statistics.
+
+Each stats dump is appended as a row of a table of 64-bit floats with one
+column per statistic, stored column-major so that a statistic's values across
+every dump are contiguous on disk and can be read from a memory map without
+touching the other statistics. The names of the columns are stored in a JSON
+sidecar file (``<path>.json``).
+
+Layout
+------
+
+The file starts with a header (``_FILE_HEADER``) holding a magic number, the
+byte order of the values and the alignment of the blocks. The rows are then
+stored in blocks, the first starting at the block alignment. Each block holds
+up to ``capacity`` rows of its first ``columns`` columns:
+
+* a ``_BLOCK_HEADER_SIZE`` byte header of three little-endian 64-bit
+  integers: ``capacity``, ``columns`` and ``rows`` (the number of rows
+  written so far);
+* ``columns`` runs of ``capacity`` doubles, one per column, of which the
+  first ``rows`` are valid.
+
+The next block starts at the following multiple of the alignment. A block is
+full when it holds ``capacity`` rows, and a new block is started when
+statistics are added, so rows which are already written are never moved.
+Columns added after a block was started are NaN in that block. The capacity
+of a block grows with the number of rows in the store (up to
+``_MAX_BLOCK_ROWS``), so a long time series is read in a few large runs. The
+unused capacity of the last block is never written, so it takes little disk
+space on file systems with sparse files.
+
+Usage
+-----
+
+.. code-block::
+
+        import m5.ext.pystats as pystats
+
+        stats = pystats.load_columnar("m5out/stats.col")
+        ipc = stats["board.processor.cores0.core.ipc"]
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    Tuple,
+    Union,
+)
+
+_MAGIC = b"\x93GEM5COL"
+
+# The magic number, the byte order of the values ("<" or ">") and the
+# alignment of the blocks.
+_FILE_HEADER = struct.Struct("<8sc7xQ")
+
+# The capacity, number of columns and number of rows of a block. The header
+# is padded so the values are aligned.
+_BLOCK_HEADER = struct.Struct("<QQQ")
+_BLOCK_HEADER_SIZE = 64
+
+# The blocks are memory-mapped by the writer, so they are aligned as mmap
+# offsets must be.
+_ALIGNMENT = mmap.ALLOCATIONGRANULARITY
+
+_MIN_BLOCK_ROWS = 16
+_MAX_BLOCK_ROWS = 1024
+
+_BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+
+# The name of the column holding the tick of each dump.
+TICK_COLUMN = "tick"
+
+
+def _import_numpy() -> Any:
+    # NumPy is only used to read stores, so it is not imported when gem5
+    # starts (this module is imported with m5.stats).
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _columns_path(path: Union[str, Path]) -> str:
+    return f"{path}.json"
+
+
+def _block_end(
+    offset: int, capacity: int, columns: int, alignment: int = _ALIGNMENT
+) -> int:
+    """Returns the offset of the block following the one at ``offset``."""
+    end = offset + _BLOCK_HEADER_SIZE + capacity * columns * 8
+    return -(-end // alignment) * alignment
+
+
+class ColumnarWriter:
+    """
+    Appends rows of statistics to a columnar store.
+
+    The set of columns is not fixed: a statistic first seen in a later row is
+    added as a new column, holding NaN in the earlier rows. Statistics missing
+    from a row are also NaN.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        :param path: The path of the store. Any existing file is overwritten.
+        """
+        self._path = str(path)
+        self._columns: List[str] = [TICK_COLUMN]
+        self._index: Dict[str, int] = {TICK_COLUMN: 0}
+        self._rows = 0
+        self._file = open(self._path, "w+b")
+        self._file.write(_FILE_HEADER.pack(_MAGIC, _BYTE_ORDER, _ALIGNMENT))
+        self._file.flush()
+        self._write_columns()
+
+        # The current block, mapped in memory.
+        self._block_offset = _ALIGNMENT
+        self._block = None
+        self._data = None
+        self._capacity = 0
+        self._block_columns = 0
+        self._block_rows = 0
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    def _write_columns(self) -> None:
+        # Written atomically so a reader never sees a partial file.
+        path = _columns_path(self._path)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"columns": self._columns}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _end_block(self) -> None:
+        if self._block is None:
+            return
+        self._data.release()
+        self._block.close()
+        self._block = None
+        self._data = None
+        if self._block_rows:
+            self._block_offset = _block_end(
+                self._block_offset, self._capacity, self._block_columns
+            )
+
+    def _start_block(self) -> None:
+        self._capacity = min(max(self._rows, _MIN_BLOCK_ROWS), _MAX_BLOCK_ROWS)
+        self._block_columns = len(self._columns)
+        self._block_rows = 0
+        size = _BLOCK_HEADER_SIZE + self._capacity * self._block_columns * 8
+        # Extending the file leaves the block unwritten, so only the pages
+        # of the rows which are appended are allocated.
+        self._file.truncate(self._block_offset + size)
+        self._block = mmap.mmap(
+            self._file.fileno(), size, offset=self._block_offset
+        )
+        _BLOCK_HEADER.pack_into(
+            self._block, 0, self._capacity, self._block_columns, 0
+        )
+        self._data = memoryview(self._block)[_BLOCK_HEADER_SIZE:].cast("d")
+
+    def append(self, tick: int, values: Mapping[str, float]) -> None:
+        """
+        Appends a row to the store.
+
+        :param tick: The tick at which the statistics were dumped.
+        :param values: The values of the statistics, keyed by name.
+        """
+        new = [name for name in values if name not in self._index]
+        if new:
+            for name in new:
+                self._index[name] = len(self._columns)
+                self._columns.append(name)
+            self._write_columns()
+            self._end_block()
+        if self._block is None or self._block_rows == self._capacity:
+            self._end_block()
+            self._start_block()
+
+        data = self._data
+        capacity = self._capacity
+        row = self._block_rows
+        nan = float("nan")
+        for name, column in self._index.items():
+            data[column * capacity + row] = values.get(name, nan)
+        data[row] = tick
+
+        # The row is only counted once its values are written, so readers
+        # never see a partial row.
+        self._block_rows += 1
+        self._rows += 1
+        _BLOCK_HEADER.pack_into(
+            self._block,
+            0,
+            self._capacity,
+            self._block_columns,
+            self._block_rows,
+        )
+
+    def close(self) -> None:
+        self._end_block()
+        self._file.close()
+
+
+class ColumnarStats:
+    """
+    A read-only view of a columnar store. The store is memory-mapped, so only
+    the columns which are read are loaded from disk. The view holds the rows
+    written when it was opened.
+
+    If NumPy is available, columns are returned as NumPy arrays (views of the
+    memory map when the store has a single block). Otherwise they are
+    returned as ``array``s of doubles.
+
+    The memory map is released by ``close()``, or on leaving a ``with``
+    block.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        with open(_columns_path(path)) as f:
+            self.columns: List[str] = json.load(f)["columns"]
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+        with open(path, "rb") as f:
+            header = f.read(_FILE_HEADER.size)
+            if len(header) < _FILE_HEADER.size or not header.startswith(
+                _MAGIC
+            ):
+                raise ValueError(f"'{path}' is not a columnar stats file.")
+            _, byte_order, alignment = _FILE_HEADER.unpack(header)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._numpy = _import_numpy()
+        if self._numpy is None and byte_order != _BYTE_ORDER:
+            raise NotImplementedError(
+                "NumPy is required to read columnar stats written on a host "
+                "with a different byte order."
+            )
+        dtype = f"{byte_order.decode()}f8"
+
+        # The rows, number of columns, capacity and values of each block.
+        self._blocks: List[Tuple[int, int, int, Any]] = []
+        self.rows = 0
+        offset = alignment
+        while offset + _BLOCK_HEADER_SIZE <= len(self._mmap):
+            capacity, columns, rows = _BLOCK_HEADER.unpack_from(
+                self._mmap, offset
+            )
+            start = offset + _BLOCK_HEADER_SIZE
+            end = start + capacity * columns * 8
+            if not capacity or end > len(self._mmap):
+                # A block the writer has not finished starting.
+                break
+            if self._numpy is not None:
+                data = self._numpy.frombuffer(
+                    self._mmap,
+                    dtype=dtype,
+                    count=capacity * columns,
+                    offset=start,
+                ).reshape(columns, capacity)
+            else:
+                data = memoryview(self._mmap)[start:end]
+            self._blocks.append((rows, columns, capacity, data))
+            self.rows += rows
+            offset = _block_end(offset, capacity, columns, alignment)
+
+    def close(self) -> None:
+        """
+        Releases the memory map of the store.
+
+        :raises BufferError: If NumPy views of the store returned by the
+                             view are still referenced.
+        """
+        for _, _, _, data in self._blocks:
+            if isinstance(data, memoryview):
+                data.release()
+        self._blocks = []
+        self._mmap.close()
+
+    def __enter__(self) -> "ColumnarStats":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _check_open(self) -> None:
+        if self._mmap.closed:
+            raise ValueError("The columnar stats are closed.")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, name: str) -> Any:
+        """
+        Returns the values of a statistic in every dump, in dump order.
+
+        :param name: The name of the statistic (or ``TICK_COLUMN``).
+        """
+        self._check_open()
+        column = self._index[name]
+        nan = float("nan")
+        if self._numpy is not None:
+            numpy = self._numpy
+            parts = [
+                (
+                    data[column, :rows]
+                    if column < columns
+                    else numpy.full(rows, nan)
+                )
+                for rows, columns, _, data in self._blocks
+            ]
+            if len(parts) == 1:
+                return parts[0]
+            return numpy.concatenate(parts) if parts else numpy.empty(0)
+
+        values = array("d")
+        for rows, columns, capacity, data in self._blocks:
+            if column < columns:
+                start = column * capacity * 8
+                values.frombytes(data[start : start + rows * 8])
+            else:
+                values.extend([nan] * rows)
+        return values
+
+    @property
+    def ticks(self) -> Any:
+        return self[TICK_COLUMN]
+
+    def row(self, index: int) -> Dict[str, float]:
+        """Returns the statistics of a single dump, keyed by name."""
+        self._check_open()
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError("row index out of range")
+        for rows, columns, capacity, data in self._blocks:
+            if index < rows:
+                break
+            index -= rows
+
+        nan = float("nan")
+        if self._numpy is not None:
+            values = data[:, index].tolist()
+        else:
+            values = data.cast("d")[index::capacity].tolist()
+        values += [nan] * (len(self.columns) - columns)
+        return dict(zip(self.columns, values))
+
+
+def load_columnar(path: Union[str, Path]) -> ColumnarStats:
+    """
+    Opens a columnar statistics store written by ``ColumnarWriter`` (e.g.,
+    via the ``columnar://`` stats output).
+
+    :param path: The path of the store.
+
+    :returns: A ``ColumnarStats`` view of the file.
+    """
+    return ColumnarStats(path)
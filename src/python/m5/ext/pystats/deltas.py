@@ -0,0 +1,147 @@
+# Copyright (c) 2024 The Regents of The University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Incremental (delta) encoding of a time series of statistics dumps.
+
+Each dump is written as one JSON object per line:
+
+.. code-block:: json
+
+    {"tick": 1000, "snapshot": false, "values": {"board.cache.hits": 42.0}}
+
+A snapshot record holds the value of every statistic. Other records only
+hold the statistics whose value changed since the previous dump (and, under
+"removed", any which are no longer dumped). A snapshot is written
+periodically so the state at any dump can be recovered by replaying the
+records from the last snapshot before it, even if earlier records are lost.
+"""
+
+import json
+import math
+from types import MappingProxyType
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterator,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+
+def _changed(old: Optional[float], new: float) -> bool:
+    if old == new:
+        return False
+    # NaN is never equal to itself, but an unchanged NaN is not a change.
+    return not (
+        isinstance(old, float)
+        and isinstance(new, float)
+        and math.isnan(old)
+        and math.isnan(new)
+    )
+
+
+class DeltaEncoder:
+    """
+    Encodes successive dumps of (flattened) statistics as deltas from the
+    previous dump, with a full snapshot every ``snapshot_interval`` dumps.
+    """
+
+    def __init__(self, snapshot_interval: int = 100):
+        """
+        :param snapshot_interval: The number of dumps between snapshots. The
+                                  first dump is always a snapshot.
+        """
+        if snapshot_interval < 1:
+            raise ValueError("The snapshot interval must be at least 1.")
+        self.snapshot_interval = snapshot_interval
+        self._dumps = 0
+        self._last: Dict[str, float] = {}
+
+    def encode(self, tick: int, values: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Returns the record of a dump.
+
+        :param tick: The tick at which the statistics were dumped.
+        :param values: The value of every statistic dumped, keyed by name.
+        """
+        snapshot = self._dumps % self.snapshot_interval == 0
+        self._dumps += 1
+
+        record = {"tick": tick, "snapshot": snapshot}
+        if snapshot:
+            record["values"] = dict(values)
+        else:
+            last = self._last
+            record["values"] = {
+                name: value
+                for name, value in values.items()
+                if _changed(last.get(name), value)
+            }
+            removed = [name for name in last if name not in values]
+            if removed:
+                record["removed"] = removed
+        self._last = dict(values)
+        return record
+
+    def write(self, fp: IO[str], tick: int, values: Dict[str, float]) -> None:
+        """Encodes a dump and writes its record to ``fp`` as a line."""
+        fp.write(json.dumps(self.encode(tick, values)))
+        fp.write("\n")
+
+
+def iter_dumps(fp: IO[str]) -> Iterator[Tuple[int, Mapping[str, float]]]:
+    """
+    Replays the records written by a ``DeltaEncoder``, yielding the tick and
+    the full set of statistic values of each dump.
+
+    The values are a read-only view of the replayed state, which the next
+    record updates in place, so only the changed statistics are processed
+    for each dump. Copy them (e.g., with ``dict(values)``) to keep the
+    values of a dump.
+
+    Records before the first snapshot cannot be replayed and are skipped, as
+    is an incomplete last line (e.g., if the simulation was killed while
+    dumping).
+
+    :param fp: The text stream of the records.
+    """
+    values: Optional[Dict[str, float]] = None
+    for line in fp:
+        if not line.endswith("\n"):
+            break
+        record = json.loads(line)
+        if record["snapshot"]:
+            values = dict(record["values"])
+        elif values is None:
+            continue
+        else:
+            for name in record.get("removed", ()):
+                values.pop(name, None)
+            values.update(record["values"])
+        yield record["tick"], MappingProxyType(values)
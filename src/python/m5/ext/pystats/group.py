@@ -24,19 +24,116 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import bisect
+import fnmatch
+import re
 from typing import (
     Any,
     Callable,
     Dict,
+    Iterator,
     List,
     Optional,
+    Tuple,
     Union,
 )
+from weakref import WeakKeyDictionary
 
 from .abstract_stat import AbstractStat
 from .statistic import Statistic
 from .timeconversion import TimeConversion
 
+# The path indexes of groups, created on first use. These are not stored as
+# attributes as every attribute of a group is a member of the stats tree.
+_path_indexes: "WeakKeyDictionary[Group, PathIndex]" = WeakKeyDictionary()
+
+# The characters which have a special meaning in a glob pattern.
+_GLOB_SPECIAL = re.compile(r"[*?\[]")
+
+
+class PathIndex:
+    """
+    A flat index of the statistics and groups below a group, keyed by their
+    dotted path relative to that group (e.g.,
+    ``board.processor.cores3.core.numCycles``). The elements of a SimObject
+    vector are given the path of the vector with their index appended (e.g.,
+    ``cores3``), as in gem5's text stats output.
+
+    Exact lookups are dictionary lookups, and prefix and glob queries only
+    scan the range of (sorted) paths which share the query's literal prefix.
+    """
+
+    def __init__(self, stats: Dict[str, AbstractStat]):
+        self._stats = stats
+        self._paths = sorted(stats)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._stats
+
+    def __getitem__(self, path: str) -> AbstractStat:
+        return self._stats[path]
+
+    def get(
+        self, path: str, default: Optional[AbstractStat] = None
+    ) -> Optional[AbstractStat]:
+        """Returns the stat at ``path``, or ``default`` if there is none."""
+        return self._stats.get(path, default)
+
+    def _range(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._paths, prefix)
+        end = bisect.bisect_left(self._paths, prefix + "\U0010ffff", start)
+        return self._paths[start:end]
+
+    def prefix(self, prefix: str) -> List[Tuple[str, AbstractStat]]:
+        """
+        Returns the ``(path, stat)`` pairs, in path order, of every path which
+        starts with ``prefix`` (e.g., ``board.processor.cores3.``).
+        """
+        return [(path, self._stats[path]) for path in self._range(prefix)]
+
+    def glob(self, pattern: str) -> List[Tuple[str, AbstractStat]]:
+        """
+        Returns the ``(path, stat)`` pairs, in path order, of every path which
+        matches the glob ``pattern`` (e.g.,
+        ``board.processor.cores*.core.numCycles``). As with ``fnmatch``, a
+        ``*`` also matches across ``.`` separators.
+        """
+        match = _GLOB_SPECIAL.search(pattern)
+        if not match:
+            stat = self._stats.get(pattern)
+            return [(pattern, stat)] if stat is not None else []
+
+        regex = re.compile(fnmatch.translate(pattern))
+        return [
+            (path, self._stats[path])
+            for path in self._range(pattern[: match.start()])
+            if regex.match(path)
+        ]
+
+
+def _index_group(
+    group: "Group", prefix: str, stats: Dict[str, AbstractStat]
+) -> None:
+    for attr in group:
+        obj = getattr(group, attr)
+        if not isinstance(obj, AbstractStat):
+            continue
+        path = f"{prefix}{attr}"
+        stats[path] = obj
+        if isinstance(obj, SimObjectVectorGroup):
+            for index, element in enumerate(obj.value):
+                stats[f"{path}{index}"] = element
+                if isinstance(element, Group):
+                    _index_group(element, f"{path}{index}.", stats)
+        elif isinstance(obj, Group):
+            _index_group(obj, f"{path}.", stats)
+
 
 class Group(AbstractStat):
     """
@@ -75,11 +172,36 @@ class Group(AbstractStat):
                 if (predicate and predicate(attr)) or not predicate:
                     to_return.append(obj)
                 if recursive:
-                    to_return = to_return + obj.children(
-                        predicate=predicate, recursive=True
+                    to_return.extend(
+                        obj.children(predicate=predicate, recursive=True)
                     )
         return to_return
 
+    def path_index(self, rebuild: bool = False) -> PathIndex:
+        """
+        Returns the flat path index of the stats below this group.
+
+        .. code-block::
+
+            >>> index = simstat.path_index()
+            >>> index["board.processor.cores3.core.numCycles"]
+            >>> index.glob("board.processor.cores*.core.numCycles")
+
+        The index is built the first time it is used and then cached, so it
+        does not reflect later changes to the stats tree unless ``rebuild`` is
+        ``True``.
+
+        :param rebuild: If ``True``, the index is rebuilt from the current
+                        stats tree.
+        """
+        index = None if rebuild else _path_indexes.get(self)
+        if index is None:
+            stats = {}
+            _index_group(self, "", stats)
+            index = PathIndex(stats)
+            _path_indexes[self] = index
+        return index
+
 
 class SimObjectGroup(Group):
     """A group of statistics encapulated within a SimObject."""
@@ -125,8 +247,8 @@ class SimObjectVectorGroup(Group):
     ) -> List["AbstractStat"]:
         to_return = []
         for child in self.value:
-            to_return = to_return + child.children(
-                predicate=predicate, recursive=recursive
+            to_return.extend(
+                child.children(predicate=predicate, recursive=recursive)
             )
 
         return to_return
@@ -0,0 +1,499 @@
+# Copyright (c) 2024 The Regents of The University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A lazy loader for the JSON statistics output (``stats.json``).
+
+Rather than decoding the whole file, the loader memory-maps it and builds a
+byte-offset index of the members of the groups within it. A group's members
+are decoded into PyStats objects only when they are accessed (as attributes,
+by index, or through ``children``/``find``). Memory use is therefore bounded
+by the parts of the statistics tree which are used.
+"""
+
+import json
+import mmap
+import re
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .abstract_stat import AbstractStat
+from .group import (
+    Group,
+    SimObjectGroup,
+    SimObjectVectorGroup,
+)
+from .simstat import SimStat
+from .statistic import (
+    Distribution,
+    Scalar,
+    SparseHist,
+    Vector,
+    Vector2d,
+)
+from .storagetype import StorageType
+from .timeconversion import TimeConversion
+
+# A span is the (start, end) byte offsets of a JSON value in the file.
+Span = Tuple[int, int]
+
+# The scanner works on the bytes of the file, so these patterns are bytes
+# patterns (other than _NUMBER, which matches decoded keys).
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_NUMBER = re.compile(r"-?\d+(\.\d+)?([eE][-+]?\d+)?")
+
+# The contents of a JSON string. Escapes are only checked when the string is
+# decoded.
+_CHARS = rb'[^"\\]*(?:\\.[^"\\]*)*'
+
+_STRING = re.compile(rb'"' + _CHARS + rb'"', re.DOTALL)
+
+# The key of an object member and the colon after it.
+_MEMBER = re.compile(rb'"(' + _CHARS + rb')"[ \t\n\r]*:[ \t\n\r]*', re.DOTALL)
+
+# A JSON number or literal (including the NaN and Infinity Python writes).
+_LITERAL = re.compile(
+    rb"-?(?:\d+(?:\.\d+)?(?:[eE][-+]?\d+)?|Infinity)|NaN|true|false|null"
+)
+
+# Everything up to the next bracket which is not in a string, or up to a
+# string holding an escape. Strings with escapes are rare, so they are
+# skipped separately to keep this pattern simple (and fast).
+_TO_BRACKET = re.compile(rb'[^"{}\[\]]*(?:"[^"\\]*"[^"{}\[\]]*)*')
+
+# An object holding no objects, arrays or escapes, as most statistics are.
+_FLAT_OBJECT = re.compile(rb'\{[^"{}\[\]]*(?:"[^"\\]*"[^"{}\[\]]*)*\}')
+
+_OPEN = (ord("{"), ord("["))
+
+# Matches the start of an object whose first member is "value".
+_STATISTIC = re.compile(rb'\{\s*"value"\s*:')
+
+
+class _Node:
+    """
+    The index of a JSON object which is (likely to be) a group: the spans of
+    its members and the indexes of those members which are also groups.
+    Arrays of groups (e.g., a ``SimObjectVectorGroup``'s "value") are indexed
+    as a list of ``(span, node)`` tuples.
+    """
+
+    __slots__ = ("members", "nested")
+
+    def __init__(self):
+        self.members: Dict[str, Span] = {}
+        self.nested: Dict[str, Any] = {}
+
+
+class _Scanner:
+    """
+    Builds the ``_Node`` index of the groups within a span of the JSON file.
+
+    Members which are statistics are skipped by matching regular expressions
+    over the bytes of the file, with one match per bracket they hold, so
+    Python-level work is mostly done for the members of groups. An object is
+    assumed to be a statistic if its first member is "value", as is the case
+    for PyStats output. If this guess is wrong the object is simply indexed
+    (or decoded) later when it is accessed.
+    """
+
+    def __init__(self, buf: bytes, span: Span):
+        # The bytes are scanned in place, so positions are file offsets.
+        self._buf = buf
+        self._start, self._end = span
+
+    def _error(self, message: str, pos: int) -> ValueError:
+        return ValueError(f"{message} at offset {pos}")
+
+    def _expect(self, pos: int, char: bytes) -> int:
+        pos = _WHITESPACE.match(self._buf, pos, self._end).end()
+        if self._buf[pos : pos + 1] != char:
+            raise self._error(f"Expected '{char.decode()}'", pos)
+        return _WHITESPACE.match(self._buf, pos + 1, self._end).end()
+
+    def _skip_container(self, pos: int) -> int:
+        """Returns the end of the object or array at ``pos``."""
+        depth = 0
+        while True:
+            pos = _TO_BRACKET.match(self._buf, pos, self._end).end()
+            char = self._buf[pos : pos + 1]
+            if char == b'"':
+                match = _STRING.match(self._buf, pos, self._end)
+                if match is None:
+                    raise self._error("Unterminated JSON string", pos)
+                pos = match.end()
+                continue
+            if char in (b"{", b"["):
+                depth += 1
+            elif char in (b"}", b"]"):
+                depth -= 1
+                if not depth:
+                    return pos + 1
+            else:
+                raise self._error("Unterminated JSON value", pos)
+            pos += 1
+
+    def _scan_value(self, pos: int) -> Tuple[Any, int]:
+        """
+        Returns the index of the value at ``pos`` (``None`` if it is not
+        indexed) and the position of the end of the value.
+        """
+        char = self._buf[pos : pos + 1]
+        if char == b"{":
+            if _STATISTIC.match(self._buf, pos, self._end):
+                match = _FLAT_OBJECT.match(self._buf, pos, self._end)
+                if match:
+                    return None, match.end()
+                return None, self._skip_container(pos)
+            return self.index_object(pos)
+        if char == b"[":
+            return self.index_array(pos)
+        pattern = _STRING if char == b'"' else _LITERAL
+        match = pattern.match(self._buf, pos, self._end)
+        if match is None:
+            raise self._error("Invalid JSON value", pos)
+        return None, match.end()
+
+    def index_object(self, pos: Optional[int] = None) -> Tuple[_Node, int]:
+        buf = self._buf
+        node = _Node()
+        pos = self._expect(self._start if pos is None else pos, b"{")
+        if buf[pos : pos + 1] == b"}":
+            return node, pos + 1
+        while True:
+            match = _MEMBER.match(buf, pos, self._end)
+            if match is None:
+                raise self._error("Expected a JSON member", pos)
+            key = match.group(1)
+            if key.isascii() and b"\\" not in key:
+                key = key.decode("ascii")
+            else:
+                key = json.loads(buf[pos : match.end(1) + 1])
+            pos = match.end()
+            nested, end = self._scan_value(pos)
+            node.members[key] = (pos, end)
+            if nested is not None:
+                node.nested[key] = nested
+            pos = _WHITESPACE.match(buf, end, self._end).end()
+            if buf[pos : pos + 1] == b"}":
+                return node, pos + 1
+            pos = self._expect(pos, b",")
+
+    def index_array(
+        self, pos: Optional[int] = None
+    ) -> Tuple[List[Tuple[Span, Optional[_Node]]], int]:
+        elements = []
+        pos = self._expect(self._start if pos is None else pos, b"[")
+        if self._buf[pos : pos + 1] == b"]":
+            return elements, pos + 1
+        while True:
+            nested, end = self._scan_value(pos)
+            elements.append(((pos, end), nested))
+            pos = _WHITESPACE.match(self._buf, end, self._end).end()
+            if self._buf[pos : pos + 1] == b"]":
+                return elements, pos + 1
+            pos = self._expect(pos, b",")
+
+
+def _decode(buf: bytes, span: Span) -> Any:
+    return json.loads(buf[span[0] : span[1]])
+
+
+def _parse_key(key: str) -> Union[str, int, float]:
+    # JSON keys are always strings, but vectors may be indexed by numbers.
+    if key.isdigit():
+        return int(key)
+    if _NUMBER.fullmatch(key):
+        return float(key)
+    return key
+
+
+def _to_scalar(d: Dict[str, Any]) -> Scalar:
+    datatype = d.get("datatype")
+    return Scalar(
+        value=d["value"],
+        unit=d.get("unit"),
+        description=d.get("description"),
+        datatype=StorageType[datatype] if datatype else None,
+    )
+
+
+def _to_scalars(d: Dict[str, Any]) -> Dict[Union[str, int, float], Scalar]:
+    return {_parse_key(key): _to_scalar(value) for key, value in d.items()}
+
+
+def _to_statistic(d: Dict[str, Any]) -> AbstractStat:
+    """Converts a decoded JSON statistic into a PyStats ``Statistic``."""
+    type = d.get("type")
+    if type == "Scalar":
+        return _to_scalar(d)
+    if type == "Distribution":
+        return Distribution(
+            value=_to_scalars(d["value"]),
+            min=d["min"],
+            max=d["max"],
+            num_bins=d["num_bins"],
+            bin_size=d["bin_size"],
+            sum=d.get("sum"),
+            sum_squared=d.get("sum_squared"),
+            underflow=d.get("underflow"),
+            overflow=d.get("overflow"),
+            logs=d.get("logs"),
+            description=d.get("description"),
+        )
+    if type == "SparseHist":
+        return SparseHist(
+            value=_to_scalars(d["value"]), description=d.get("description")
+        )
+
+    # Vectors and 2d vectors are not always given a type. A 2d vector is a
+    # vector of vectors, so it is identified by its elements.
+    elements = d["value"]
+    first = next(iter(elements.values()), None)
+    if type == "Vector2d" or (
+        type is None
+        and isinstance(first, dict)
+        and "type" in first
+        and first["type"] != "Scalar"
+    ):
+        return Vector2d(
+            value={
+                _parse_key(key): _to_statistic(value)
+                for key, value in elements.items()
+            },
+            type=type,
+            description=d.get("description"),
+        )
+    return Vector(
+        value=_to_scalars(elements),
+        type=type,
+        description=d.get("description"),
+    )
+
+
+def _is_scalar(buf: bytes, span: Span, nested: Any) -> bool:
+    if nested is not None or buf[span[0]] != _OPEN[0]:
+        return False
+    return _decode(buf, span).get("type") == "Scalar"
+
+
+def _is_statistic(members: Union[Dict[str, Any], Dict[str, Span]]) -> bool:
+    # All `Statistic`s have a "value" and a "description". Groups do not.
+    return "value" in members and "description" in members
+
+
+class _LazyGroupMixin:
+    """
+    Replaces the eager members of a ``Group`` with an index of the spans of
+    its members in the JSON file. A member is decoded and stored as a normal
+    attribute the first time it is accessed.
+
+    The lazy state is stored in ``__slots__`` rather than the instance
+    ``__dict__`` so the ``Group`` behaves identically once its members have
+    been decoded (e.g., when serialized with ``to_json``).
+    """
+
+    __slots__ = ("_buf", "_index", "_nested", "_keys")
+
+    @classmethod
+    def _create(cls, buf: bytes, node: _Node) -> "Group":
+        group = cls.__new__(cls)
+        group._buf = buf
+        group._index = {}
+        group._nested = node.nested
+        group._keys = list(node.members)
+        for key, span in node.members.items():
+            if buf[span[0]] in _OPEN:
+                group._index[key] = span
+            else:
+                # Non-container members (e.g., "type") are small so they are
+                # decoded immediately.
+                group.__dict__[key] = _decode(buf, span)
+        return group
+
+    def _materialize(self, key: str) -> Any:
+        span = self._index.pop(key)
+        nested = self._nested.pop(key, None)
+        if key == "time_conversion":
+            value = TimeConversion(**_decode(self._buf, span))
+        else:
+            value = _decode_value(self._buf, span, nested)
+        self.__dict__[key] = value
+        return value
+
+    def _materialize_all(self) -> None:
+        for key in list(self._index):
+            self._materialize(key)
+
+    def __getattr__(self, item: str) -> Any:
+        if item in self._index:
+            return self._materialize(item)
+        return super().__getattr__(item)
+
+    def __iter__(self):
+        return iter(dict.fromkeys(self._keys + list(self.__dict__)))
+
+    def to_json(self) -> Dict:
+        self._materialize_all()
+        return super().to_json()
+
+    def children(
+        self,
+        predicate: Optional[Callable[[str], bool]] = None,
+        recursive: bool = False,
+    ) -> List[AbstractStat]:
+        to_return = []
+        for attr in self:
+            if attr in self._index:
+                matched = not predicate or predicate(attr)
+                if not matched and not recursive:
+                    continue
+                span = self._index[attr]
+                if not matched and _is_scalar(
+                    self._buf, span, self._nested.get(attr)
+                ):
+                    # A Scalar has no children, so there is no need to
+                    # decode it if it does not match.
+                    continue
+                obj = self._materialize(attr)
+            else:
+                obj = self.__dict__.get(attr)
+            if isinstance(obj, AbstractStat):
+                if not predicate or predicate(attr):
+                    to_return.append(obj)
+                if recursive:
+                    to_return.extend(
+                        obj.children(predicate=predicate, recursive=True)
+                    )
+        return to_return
+
+
+class LazySimStat(_LazyGroupMixin, SimStat):
+    """A ``SimStat`` whose members are decoded from JSON on first access."""
+
+    __slots__ = ()
+
+
+class LazySimObjectGroup(_LazyGroupMixin, SimObjectGroup):
+    """A ``SimObjectGroup`` whose members are decoded on first access."""
+
+    __slots__ = ()
+
+
+class LazyGroup(_LazyGroupMixin, Group):
+    """A ``Group`` whose members are decoded on first access."""
+
+    __slots__ = ()
+
+
+def _decode_value(buf: bytes, span: Span, nested: Any = None) -> Any:
+    """
+    Decodes a member of a group. Groups are returned as lazy groups, using
+    their index (``nested``) from the first pass if there is one.
+    """
+    if buf[span[0]] == _OPEN[1]:
+        if nested is None:
+            nested, _ = _Scanner(buf, span).index_array()
+        return [
+            _decode_value(buf, element, element_nested)
+            for element, element_nested in nested
+        ]
+    if buf[span[0]] != _OPEN[0]:
+        return _decode(buf, span)
+
+    if nested is None:
+        # The first pass assumed this object was a statistic.
+        value = _decode(buf, span)
+        if _is_statistic(value):
+            return _to_statistic(value)
+        nested, _ = _Scanner(buf, span).index_object()
+
+    members = nested.members
+    type = _decode(buf, members["type"]) if "type" in members else None
+    if type == "SimObject":
+        return LazySimObjectGroup._create(buf, nested)
+    if type == "SimObjectVector":
+        time_conversion = (
+            _decode(buf, members["time_conversion"])
+            if "time_conversion" in members
+            else None
+        )
+        return SimObjectVectorGroup(
+            value=_decode_value(
+                buf, members["value"], nested.nested.get("value")
+            ),
+            time_conversion=(
+                TimeConversion(**time_conversion) if time_conversion else None
+            ),
+        )
+    if type in (None, "Group") and not _is_statistic(members):
+        return LazyGroup._create(buf, nested)
+    return _to_statistic(_decode(buf, span))
+
+
+def load_lazy(json_file: Union[str, Path, IO[bytes]]) -> SimStat:
+    """
+    Loads a JSON statistics file lazily. A single pass over the file indexes
+    the byte offsets of the members of every group. Members are decoded into
+    PyStats objects as they are accessed.
+
+    Usage
+    -----
+
+    .. code-block::
+
+            import m5.ext.pystats as pystats
+
+            simstat = pystats.load_lazy("m5out/stats.json")
+            simstat.board.processor.cores0.core.numCycles
+
+    :param json_file: The path of the JSON file, or a binary file object
+                      opened on it.
+
+    :returns: The ``SimStat`` of the file.
+    """
+    if isinstance(json_file, (str, Path)):
+        with open(json_file, "rb") as f:
+            return load_lazy(f)
+
+    try:
+        buf = mmap.mmap(json_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        # Not a regular file (or an empty one), so it cannot be mapped.
+        buf = json_file.read()
+        if isinstance(buf, str):
+            buf = buf.encode()
+    node, _ = _Scanner(buf, (0, len(buf))).index_object()
+    return LazySimStat._create(buf, node)
@@ -174,8 +174,8 @@ class Vector(Statistic):
                     or not predicate
                 ):
                     to_return.append(obj)
-                to_return = to_return + obj.children(
-                    predicate=predicate, recursive=True
+                to_return.extend(
+                    obj.children(predicate=predicate, recursive=True)
                 )
         return to_return
 
@@ -257,9 +257,7 @@ class Vector2d(Statistic):
                 or not predicate
             ):
                 to_return.append(obj)
-            to_return = to_return + obj.children(
-                predicate=predicate, recursive=True
-            )
+            to_return.extend(obj.children(predicate=predicate, recursive=True))
         return to_return
 
     def __contains__(self, item) -> bool:
@@ -261,6 +261,12 @@ def parse_options():
         help="Create DOT & pdf outputs of the DVFS configuration"
         + " [Default: %default]",
     )
+    option(
+        "--instantiate-profile",
+        action="store_true",
+        default=False,
+        help="Report the time taken by each phase of m5.instantiate()",
+    )
 
     # Debugging options
     group("Debugging Options")
@@ -468,8 +474,13 @@ def main():
         debug.help()
 
     if options.list_sim_objects:
-        from . import SimObject
+        from . import (
+            SimObject,
+            objects,
+        )
 
+        # SimObject modules are otherwise only imported when first used.
+        objects._load_all()
         done = True
         print("SimObjects:")
         objects = list(SimObject.allClasses.keys())
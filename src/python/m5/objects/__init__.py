@@ -24,6 +24,92 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-for module in __spec__.loader_state:
-    if module.startswith("m5.objects."):
-        exec(f"from {module} import *")
+import importlib as _importlib
+import sys as _sys
+import types as _types
+
+# SimObject modules are imported when one of their names is first used,
+# rather than all of them being imported (and all of their classes being
+# built) with m5.objects. The index, generated at build time, maps each
+# name to the one module defining it.
+try:
+    from m5.objects._index import index as _index
+except ImportError:
+    _index = {}
+
+_modules = [
+    module
+    for module in __spec__.loader_state
+    if module.startswith("m5.objects.") and module != "m5.objects._index"
+]
+_embedded = set(_modules)
+_all_loaded = False
+
+
+class _ObjectsModule(_types.ModuleType):
+    def __setattr__(self, name, value):
+        # Importing m5.objects.<name> binds that module as an attribute of
+        # this package once it is executed. That happens whichever module
+        # imports it (e.g., "from m5.objects.ClockedObject import
+        # ClockedObject" in another SimObject module), and would hide the
+        # class of the same name, which __getattr__ is then never asked
+        # for. Bind the class instead, as "from <module> import *" did.
+        if (
+            isinstance(value, _types.ModuleType)
+            and value.__name__ == f"{__name__}.{name}"
+        ):
+            value = getattr(value, name, value)
+        super().__setattr__(name, value)
+
+
+_sys.modules[__name__].__class__ = _ObjectsModule
+
+
+def _load_all():
+    """
+    Imports every SimObject module, binding their public names in this
+    namespace as "from <module> import *" would.
+    """
+    global _all_loaded
+    if _all_loaded:
+        return
+    _all_loaded = True
+    for module in _modules:
+        names = vars(_importlib.import_module(module))
+        globals().update(
+            (name, value)
+            for name, value in list(names.items())
+            if not name.startswith("_")
+        )
+
+
+def __getattr__(name):
+    # "from m5.objects import *" still imports every module.
+    if name == "__all__":
+        _load_all()
+        return [name for name in globals() if not name.startswith("_")]
+
+    module = _index.get(name)
+    if not _all_loaded and module in _embedded:
+        value = getattr(_importlib.import_module(module), name, None)
+        if value is not None:
+            globals()[name] = value
+            return value
+
+    # Names which are not in the index, such as those a module imports
+    # from elsewhere, can only be found by importing everything.
+    _load_all()
+    try:
+        return globals()[name]
+    except KeyError:
+        raise AttributeError(
+            f"module '{__name__}' has no attribute '{name}'"
+        ) from None
+
+
+def __dir__():
+    names = set(globals())
+    names.update(
+        name for name, module in _index.items() if module in _embedded
+    )
+    return sorted(names)
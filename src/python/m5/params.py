@@ -187,7 +187,13 @@ class ParamDesc:
         if attr == "ptype":
             from . import SimObject
 
-            ptype = SimObject.allClasses[self.ptype_str]
+            ptype = SimObject.allClasses.get(self.ptype_str)
+            if ptype is None:
+                # The module defining the type may not have been imported
+                # yet, as m5.objects imports them on first use.
+                from . import objects
+
+                ptype = getattr(objects, self.ptype_str)
             assert isSimObjectClass(ptype)
             self.ptype = ptype
             return ptype
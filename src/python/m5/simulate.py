@@ -40,6 +40,8 @@
 import atexit
 import os
 import sys
+import time
+from contextlib import contextmanager
 
 from m5.util.dot_writer import (
     do_dot,
@@ -64,6 +66,7 @@ from .citations import gather_citations
 from .util import (
     attrdict,
     fatal,
+    inform,
     warn,
 )
 
@@ -74,11 +77,46 @@ _drain_manager = _m5.drain.DrainManager.instance()
 
 _instantiated = False  # Has m5.instantiate() been called?
 
+# The SimObjects of the hierarchy in descendants() order, as found by
+# m5.instantiate().
+_all_objects = []
+
+
+class _PhaseProfile:
+    """Records the time taken by each phase of instantiate()."""
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.phases = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self, num_objects):
+        if not self.enabled:
+            return
+        total = time.perf_counter() - self._start
+        lines = [f"m5.instantiate() profile ({num_objects} SimObjects):"]
+        for name, duration in self.phases:
+            lines.append(f"  {name:<24} {duration:10.3f} s")
+        lines.append(f"  {'total':<24} {total:10.3f} s")
+        inform("%s", "\n".join(lines))
+
 
 # The final call to instantiate the SimObject graph and initialize the
 # system.
 def instantiate(ckpt_dir=None):
     global _instantiated
+    global _all_objects
     from m5 import options
 
     if _instantiated:
@@ -91,66 +129,89 @@ def instantiate(ckpt_dir=None):
     if not root:
         fatal("Need to instantiate Root() before calling instantiate()")
 
+    profile = _PhaseProfile(options.instantiate_profile)
+
     # we need to fix the global frequency
     ticks.fixGlobalFrequency()
 
     # Make sure SimObject-valued params are in the configuration
-    # hierarchy so we catch them with future descendants() walks
-    for obj in root.descendants():
-        obj.adoptOrphanParams()
+    # hierarchy so we catch them with future descendants() walks. This
+    # walk has to be done on the live hierarchy as adopting an orphan adds
+    # it (and its own orphans) to the walk.
+    with profile.phase("adoptOrphanParams"):
+        for obj in root.descendants():
+            obj.adoptOrphanParams()
+
+    # The hierarchy is frozen from here on, so it is flattened once (in the
+    # deterministic, sorted order of descendants()) and every later phase
+    # iterates over this list rather than walking the hierarchy again.
+    with profile.phase("descendants"):
+        all_objects = _all_objects = list(root.descendants())
 
     # Unproxy in sorted order for determinism
-    for obj in root.descendants():
-        obj.unproxyParams()
+    with profile.phase("unproxyParams"):
+        for obj in all_objects:
+            obj.unproxyParams()
 
     if options.dump_config:
-        ini_file = open(os.path.join(options.outdir, options.dump_config), "w")
-        # Print ini sections in sorted order for easier diffing
-        for obj in sorted(root.descendants(), key=lambda o: o.path()):
-            obj.print_ini(ini_file)
-        ini_file.close()
+        with profile.phase("dump_config"):
+            ini_file = open(
+                os.path.join(options.outdir, options.dump_config), "w"
+            )
+            # Print ini sections in sorted order for easier diffing
+            for obj in sorted(all_objects, key=lambda o: o.path()):
+                obj.print_ini(ini_file)
+            ini_file.close()
 
     if options.json_config:
-        try:
-            import json
-
-            json_file = open(
-                os.path.join(options.outdir, options.json_config), "w"
-            )
-            d = root.get_config_as_dict()
-            json.dump(d, json_file, indent=4)
-            json_file.close()
-        except ImportError:
-            pass
+        with profile.phase("json_config"):
+            try:
+                import json
+
+                json_file = open(
+                    os.path.join(options.outdir, options.json_config), "w"
+                )
+                d = root.get_config_as_dict()
+                json.dump(d, json_file, indent=4)
+                json_file.close()
+            except ImportError:
+                pass
 
     if options.dot_config:
-        do_dot(root, options.outdir, options.dot_config)
-        do_ruby_dot(root, options.outdir, options.dot_config)
+        with profile.phase("dot_config"):
+            do_dot(root, options.outdir, options.dot_config)
+            do_ruby_dot(root, options.outdir, options.dot_config)
 
     # Initialize the global statistics
     stats.initSimStats()
 
     # Create the C++ sim objects and connect ports
-    for obj in root.descendants():
-        obj.createCCObject()
-    for obj in root.descendants():
-        obj.connectPorts()
+    with profile.phase("createCCObject"):
+        for obj in all_objects:
+            obj.createCCObject()
+    with profile.phase("connectPorts"):
+        for obj in all_objects:
+            obj.connectPorts()
 
     # Do a second pass to finish initializing the sim objects
-    for obj in root.descendants():
-        obj.init()
+    with profile.phase("init"):
+        for obj in all_objects:
+            obj.init()
 
     # Do a third pass to initialize statistics
-    stats._bindStatHierarchy(root)
-    root.regStats()
+    with profile.phase("regStats"):
+        stats._bindStatHierarchy(root)
+        root.regStats()
 
     # Do a fourth pass to initialize probe points
-    for obj in root.descendants():
-        obj.regProbePoints()
+    with profile.phase("regProbePoints"):
+        for obj in all_objects:
+            obj.regProbePoints()
 
     # Do a fifth pass to connect probe listeners
-    for obj in root.descendants():
-        obj.regProbeListeners()
+    with profile.phase("regProbeListeners"):
+        for obj in all_objects:
+            obj.regProbeListeners()
 
     # We want to generate the DVFS diagram for the system. This can only be
     # done once all of the CPP objects have been created and initialised so
@@ -159,17 +220,20 @@ def instantiate(ckpt_dir=None):
         do_dvfs_dot(root, options.outdir, options.dot_dvfs_config)
 
     # We're done registering statistics.  Enable the stats package now.
-    stats.enable()
+    with profile.phase("stats.enable"):
+        stats.enable()
 
     # Restore checkpoint (if any)
     if ckpt_dir:
-        _drain_manager.preCheckpointRestore()
-        ckpt = _m5.core.getCheckpoint(ckpt_dir)
-        for obj in root.descendants():
-            obj.loadState(ckpt)
+        with profile.phase("loadState"):
+            _drain_manager.preCheckpointRestore()
+            ckpt = _m5.core.getCheckpoint(ckpt_dir)
+            for obj in all_objects:
+                obj.loadState(ckpt)
     else:
-        for obj in root.descendants():
-            obj.initState()
+        with profile.phase("initState"):
+            for obj in all_objects:
+                obj.initState()
 
     # Check to see if any of the stat events are in the past after resuming from
     # a checkpoint, If so, this call will shift them to be at a valid time.
@@ -177,6 +241,8 @@ def instantiate(ckpt_dir=None):
 
     gather_citations(root)
 
+    profile.report(len(all_objects))
+
 
 need_startup = True
 
@@ -189,8 +255,7 @@ def simulate(*args, **kwargs):
         fatal("m5.instantiate() must be called before m5.simulate().")
 
     if need_startup:
-        root = objects.Root.getInstance()
-        for obj in root.descendants():
+        for obj in _all_objects:
             obj.startup()
         need_startup = False
 
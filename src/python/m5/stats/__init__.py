@@ -51,10 +51,22 @@ import _m5.stats
 from _m5.stats import periodicStatDump
 from _m5.stats import schedStatEvent as schedEvent
 
-from .gem5stats import JsonOutputVistor
+from .gem5stats import (
+    ColumnarOutputVisitor,
+    IncrementalJsonOutputVisitor,
+    JsonOutputVistor,
+)
 
 outputList = []
 
+# The stat visitors implemented in Python. These dump a whole root (or list of
+# roots) at once rather than being visited stat by stat from C++.
+_python_visitors = (
+    JsonOutputVistor,
+    ColumnarOutputVisitor,
+    IncrementalJsonOutputVisitor,
+)
+
 # Dictionary of stat visitor factories populated by the _url_factory
 # visitor.
 factories = {}
@@ -191,17 +203,49 @@ def _hdf5Factory(fn, chunking=10, desc=True, formulas=True):
 
 
 @_url_factory(["json"])
-def _jsonFactory(fn):
+def _jsonFactory(fn, incremental=False, snapshot_interval=100):
     """Output stats in JSON format.
 
+    By default, each dump overwrites the file with the full stats tree. In
+    incremental mode each dump instead appends a line (JSON Lines) holding
+    only the stats which changed since the previous dump, plus a full
+    snapshot of all stats every snapshot_interval dumps. Use
+    m5.ext.pystats.iter_dumps() to replay the output.
+
+    Parameters:
+      * incremental (bool): Only output the changed stats (default: False)
+      * snapshot_interval (int): Dumps between full snapshots in incremental
+        mode (default: 100)
+
     Example:
       json://stats.json
+      json://stats.jsonl?incremental=True&snapshot_interval=50
 
     """
 
+    if incremental:
+        return IncrementalJsonOutputVisitor(fn, snapshot_interval)
     return JsonOutputVistor(fn)
 
 
+@_url_factory(["columnar"])
+def _columnarFactory(fn):
+    """Output stats as a columnar time series.
+
+    Every dump is appended as a row to a memory-mappable table with one
+    column per statistic, stored column-major so the values of a statistic
+    across all dumps can be read as a single column. The column names are
+    stored in a JSON file alongside (fn + ".json"). Use
+    m5.ext.pystats.load_columnar() to read the output.
+
+    Example:
+      columnar://stats.col
+
+    """
+
+    return ColumnarOutputVisitor(fn)
+
+
 def addStatVisitor(url):
     """Add a stat visitor specified using a URL string
 
@@ -418,7 +462,7 @@ def dump(roots=None):
         prepare()
 
     for output in outputList:
-        if isinstance(output, JsonOutputVistor):
+        if isinstance(output, _python_visitors):
             if not all_roots:
                 output.dump(Root.getInstance())
             else:
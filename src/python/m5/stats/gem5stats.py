@@ -33,9 +33,12 @@ from datetime import datetime
 from typing import (
     IO,
     List,
+    Tuple,
     Union,
 )
 
+from m5.ext.pystats.columnar import ColumnarWriter
+from m5.ext.pystats.deltas import DeltaEncoder
 from m5.ext.pystats.group import *
 from m5.ext.pystats.simstat import *
 from m5.ext.pystats.statistic import *
@@ -43,6 +46,7 @@ from m5.ext.pystats.storagetype import *
 from m5.objects import *
 from m5.params import SimObjectVector
 
+import _m5.core
 import _m5.stats
 
 
@@ -84,6 +88,186 @@ class JsonOutputVistor:
             simstat.dump(fp=fp, **self.json_args)
 
 
+class _FlatOutputVisitor:
+    """
+    A base class for the visitors which output the stats as a flat mapping of
+    stat names to values. The stats to dump are found by walking the stat
+    groups on the first dump, and then cached: the stats hierarchy cannot
+    change once the stats have been enabled, so later dumps only read the
+    values of the stats.
+    """
+
+    def __init__(self):
+        self._roots_key = None
+        self._stats: List[Tuple[str, _m5.stats.Info]] = []
+
+    def _flatten(
+        self, roots: Union[List[SimObject], Root]
+    ) -> Dict[str, float]:
+        if isinstance(roots, Root):
+            roots_key = (id(roots),)
+        else:
+            roots_key = tuple(id(root) for root in roots)
+
+        if roots_key != self._roots_key:
+            self._stats = []
+            if isinstance(roots, Root):
+                _find_stats(roots, "", self._stats)
+            else:
+                for root in roots:
+                    prefix = ".".join(root.path_list())
+                    _find_stats(
+                        root, f"{prefix}." if prefix else "", self._stats
+                    )
+            self._roots_key = roots_key
+
+        values = {}
+        for name, stat in self._stats:
+            _flatten_statistic(name, stat, values)
+        return values
+
+
+class ColumnarOutputVisitor(_FlatOutputVisitor):
+    """
+    A helper visitor class used to include a columnar output via the stats
+    API (``src/python/m5/stats/__init__.py``). Each dump is appended as a row
+    to a memory-mappable table with one column per statistic (see
+    ``m5.ext.pystats.columnar``), rather than overwriting the previous dump.
+    """
+
+    def __init__(self, file: str):
+        """
+        :param file: The output file location of the columnar store.
+        """
+
+        super().__init__()
+        self.file = file
+        self._writer = None
+
+    def dump(self, roots: Union[List[SimObject], Root]) -> None:
+        """
+        Appends the stats of a simulation root (or list of roots) to the
+        columnar store.
+
+        .. warning::
+
+            This dump assumes the statistics have already been prepared
+            for the target root.
+
+        :param roots: The Root, or List of roots, whose stats are to be
+                      dumped.
+        """
+
+        if self._writer is None:
+            self._writer = ColumnarWriter(self.file)
+        self._writer.append(_m5.core.curTick(), self._flatten(roots))
+
+
+class IncrementalJsonOutputVisitor(_FlatOutputVisitor):
+    """
+    A helper visitor class used to include an incremental JSON output via the
+    stats API (``src/python/m5/stats/__init__.py``). Rather than rewriting
+    every stat on each dump, each dump appends a line holding only the stats
+    which changed since the previous dump, with a full snapshot every
+    ``snapshot_interval`` dumps (see ``m5.ext.pystats.deltas``).
+    """
+
+    def __init__(self, file: str, snapshot_interval: int = 100):
+        """
+        :param file: The output file location of the JSON lines.
+
+        :param snapshot_interval: The number of dumps between full snapshots.
+        """
+
+        super().__init__()
+        self.file = file
+        self._encoder = DeltaEncoder(snapshot_interval)
+        self._fp = None
+
+    def dump(self, roots: Union[List[SimObject], Root]) -> None:
+        """
+        Appends the changed stats of a simulation root (or list of roots) to
+        the output file.
+
+        .. warning::
+
+            This dump assumes the statistics have already been prepared
+            for the target root.
+
+        :param roots: The Root, or List of roots, whose stats are to be
+                      dumped.
+        """
+
+        if self._fp is None:
+            self._fp = open(self.file, "w")
+        self._encoder.write(self._fp, _m5.core.curTick(), self._flatten(roots))
+        self._fp.flush()
+
+
+def _find_stats(
+    group: _m5.stats.Group,
+    prefix: str,
+    stats: List[Tuple[str, _m5.stats.Info]],
+) -> None:
+    for stat in group.getStats():
+        stats.append((f"{prefix}{stat.name}", stat))
+    for name, child in group.getStatGroups().items():
+        _find_stats(child, f"{prefix}{name}.", stats)
+
+
+def _flatten_statistic(
+    name: str, statistic: _m5.stats.Info, values: Dict[str, float]
+) -> None:
+    """
+    Adds the value(s) of a statistic to ``values``. Statistics with more than
+    one value are split into one column per value, named as in the text
+    stats output (``name::subname``).
+    """
+
+    if isinstance(statistic, _m5.stats.ScalarInfo):
+        values[name] = statistic.value
+    elif isinstance(statistic, _m5.stats.DistInfo):
+        values[f"{name}::underflow"] = statistic.underflow
+        for index, value in enumerate(statistic.values):
+            values[f"{name}::{index}"] = value
+        values[f"{name}::overflow"] = statistic.overflow
+        values[f"{name}::min_value"] = statistic.min_val
+        values[f"{name}::max_value"] = statistic.max_val
+        values[f"{name}::sum"] = statistic.sum
+        values[f"{name}::squares"] = statistic.squares
+    elif isinstance(statistic, _m5.stats.VectorInfo):
+        # This includes formulas, which are evaluated as vectors.
+        vector = statistic.value
+        if isinstance(statistic, _m5.stats.FormulaInfo) and len(vector) == 1:
+            values[name] = vector[0]
+            return
+        subnames = statistic.subnames
+        for index, value in enumerate(vector):
+            subname = (
+                subnames[index]
+                if len(subnames) > index and subnames[index]
+                else index
+            )
+            values[f"{name}::{subname}"] = value
+    elif isinstance(statistic, _m5.stats.Vector2dInfo):
+        # Each access to the pybind properties converts the whole vector, so
+        # they are only read once.
+        vector = statistic.value
+        subnames = statistic.subnames
+        ysubnames = statistic.ysubnames
+        y_size = statistic.y_size
+        for x in range(statistic.x_size):
+            x_name = subnames[x] if len(subnames) > x and subnames[x] else x
+            for y in range(y_size):
+                y_name = (
+                    ysubnames[y] if len(ysubnames) > y and ysubnames[y] else y
+                )
+                values[f"{name}::{x_name}::{y_name}"] = vector[x * y_size + y]
+    elif isinstance(statistic, _m5.stats.SparseHistInfo):
+        for sample, count in statistic.values.items():
+            values[f"{name}::{sample}"] = count
+
+
 def __get_statistic(statistic: _m5.stats.Info) -> Optional[Statistic]:
     """
     Translates a _m5.stats.Info object into a Statistic object, to process
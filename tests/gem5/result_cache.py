@@ -0,0 +1,205 @@
+# Copyright (c) 2026 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A cache of the output of gem5 runs, used to skip the simulations whose
+inputs are identical to those of a previous passing run. It is enabled by
+giving a cache directory with the ``--result-cache`` option.
+
+A run is identified by the gem5 binary, the config script, the gem5 and
+config arguments and the local resources it may use: those in the test
+resource directory (``--bin-path``), those ``obtain_resource`` downloads to
+(``GEM5_RESOURCE_DIR``, or ``~/.cache/gem5`` by default) and the resource
+JSON files given with ``GEM5_RESOURCE_JSON`` or
+``GEM5_RESOURCE_JSON_APPEND``. Only the runs where gem5 exits successfully
+are stored. On a hit the output directory of the stored run is restored, so
+the verifiers (e.g., ``MatchStdout`` or ``MatchJSONStats``) check the same
+files they would after running gem5.
+
+.. note:: The cache cannot cover changes it does not see locally:
+
+    * The Python modules imported by a config script are not part of the
+      key unless they are embedded in the gem5 binary.
+    * A resource obtained with ``obtain_resource`` is identified by its
+      local copy. A new version published in the gem5 resources database is
+      only seen once it is downloaded, which a cached run does not do. This
+      affects the tests of the stdlib and of ``configs/example/gem5_library``
+      (e.g., ``gem5_library_example_tests``).
+
+    Remove the cache directory after changing the modules or when the
+    resources are updated.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from testlib.configuration import config
+
+_CHUNK_SIZE = 1024 * 1024
+
+# Files written next to the resources by the resource downloader which do
+# not change the resources themselves.
+_IGNORED_RESOURCE_SUFFIXES = (".md5cache", ".part", ".tmp")
+
+# The environment variables giving local resource JSON files, which select
+# the resources (and their versions) obtain_resource uses.
+_RESOURCE_JSON_VARIABLES = ("GEM5_RESOURCE_JSON", "GEM5_RESOURCE_JSON_APPEND")
+
+_file_digests = {}
+_file_digests_lock = threading.Lock()
+
+
+def _file_digest(path):
+    """
+    Returns the sha256 of a file. The digests are kept for the length of the
+    test run, keyed on the size and modification time of the file, as the
+    same gem5 binary is used by many runs.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _file_digests_lock:
+        if key not in _file_digests:
+            hash = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                    hash.update(chunk)
+            _file_digests[key] = hash.hexdigest()
+        return _file_digests[key]
+
+
+def _resource_directories():
+    """
+    :returns: The directories a gem5 run may read resources from: the test
+        resource directory and the directory ``obtain_resource`` downloads
+        to.
+    """
+    return [
+        config.bin_path,
+        os.environ.get(
+            "GEM5_RESOURCE_DIR",
+            os.path.join(os.path.expanduser("~"), ".cache", "gem5"),
+        ),
+    ]
+
+
+def _resources_digest(directory):
+    """
+    Returns a digest of the resources in ``directory``. Resources are
+    identified by their path, size and modification time, which change
+    whenever the resource downloader replaces them, rather than by their
+    contents as hashing every disk image takes longer than most runs.
+    """
+    hash = hashlib.sha256(f"{os.path.abspath(directory)}\0".encode())
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(_IGNORED_RESOURCE_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            hash.update(
+                f"{os.path.relpath(path, directory)}\0{stat.st_size}\0"
+                f"{stat.st_mtime_ns}\0".encode()
+            )
+    return hash.hexdigest()
+
+
+class ResultCache:
+    """
+    The output directories of passing gem5 runs, stored in ``directory``
+    under the key of the run.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def key(self, gem5, config_script, config_args, gem5_args):
+        """
+        :returns: The key of a run of the ``gem5`` binary with the given
+            config script and arguments, using the resources in the resource
+            directories and resource JSON files as they are now.
+        """
+        inputs = [
+            _file_digest(gem5),
+            _file_digest(config_script),
+            [str(arg) for arg in config_args],
+            [str(arg) for arg in gem5_args],
+        ]
+        inputs.extend(
+            _resources_digest(directory)
+            for directory in _resource_directories()
+        )
+        for variable in _RESOURCE_JSON_VARIABLES:
+            value = os.environ.get(variable)
+            inputs.append(value)
+            if value and os.path.isfile(value):
+                inputs.append(_file_digest(value))
+        return hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def restore(self, key, outdir):
+        """
+        Copies the output of the run ``key`` to ``outdir``.
+
+        :returns: ``True`` if the run was found in the cache.
+        """
+        entry = self._entry(key)
+        if not os.path.isdir(entry):
+            return False
+        shutil.copytree(entry, outdir, symlinks=True, dirs_exist_ok=True)
+        return True
+
+    def store(self, key, outdir):
+        """
+        Stores ``outdir`` as the output of the run ``key``. The output is
+        copied to a temporary directory and then renamed, so that concurrent
+        test runs sharing the cache never see a partial entry.
+        """
+        entry = self._entry(key)
+        if os.path.isdir(entry):
+            return
+        tmp_entry = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copytree(outdir, tmp_entry, symlinks=True)
+        try:
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # Another run stored the same entry first.
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+
+def get_result_cache():
+    """
+    :returns: The :class:`ResultCache` given with ``--result-cache``, or
+        ``None`` if the cache is not enabled.
+    """
+    if config.result_cache:
+        return ResultCache(config.result_cache)
+    return None
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# Copyright (c) 2026 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Compares two gem5 statistics files, allowing the values of chosen
+statistics to differ by an absolute or relative tolerance.
+
+Both files, either the text output of gem5 (stats.txt) or JSON (e.g., the
+output of ``m5.stats.gem5stats``), are flattened to a map of statistic path
+to value. Every statistic of the reference must be present in the test
+output with a value within its tolerance. Statistics only in the test output
+are ignored.
+
+This module does not depend on testlib so it can also be run as a script:
+
+    tests/gem5/stats_diff.py --tolerance 'system\\.cpu.*Lat' 0 0.01 \\
+        trusted_stats.json m5out/output.json
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+
+_BEGIN_DUMP = "---------- Begin Simulation Statistics ----------"
+
+
+def flatten(stats):
+    """
+    Flattens nested JSON statistics to a dict from the path of each value
+    (the keys and list indices leading to it, joined with ".") to the value.
+    """
+    flat = {}
+
+    def visit(obj, path):
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                visit(value, f"{path}.{key}" if path else key)
+        elif isinstance(obj, list):
+            for index, value in enumerate(obj):
+                visit(value, f"{path}.{index}" if path else str(index))
+        else:
+            flat[path] = obj
+
+    visit(stats, "")
+    return flat
+
+
+def _value(token):
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+
+def parse_stats_txt(lines):
+    """
+    Parses the text statistics of gem5 to a dict from the name of each
+    statistic to its value. Only the first value of each line is kept (i.e.,
+    not the percentages of distributions). The statistics of the dumps after
+    the first are prefixed with "dump<N>/".
+    """
+    stats = {}
+    prefix = ""
+    dump = -1
+    for line in lines:
+        if line.startswith(_BEGIN_DUMP):
+            dump += 1
+            prefix = f"dump{dump}/" if dump else ""
+            continue
+        fields = line.split(None, 2)
+        if len(fields) < 2 or fields[0].startswith(("-", "#")):
+            continue
+        stats[prefix + fields[0]] = _value(fields[1])
+    return stats
+
+
+def load_stats(path):
+    """
+    Loads a statistics file, in JSON or gem5's text format, as a flat dict
+    from the path of each statistic to its value.
+    """
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith(("{", "[")):
+        return flatten(json.loads(text))
+    return parse_stats_txt(text.splitlines())
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Tolerance:
+    """
+    The difference allowed between the reference and test values of the
+    statistics whose path matches ``pattern`` (with :func:`re.match`). A value
+    is accepted if it is within ``absolute`` of the reference or within
+    ``relative`` times the reference.
+    """
+
+    def __init__(self, pattern, absolute=0.0, relative=0.0):
+        self.pattern = pattern
+        self.regex = re.compile(pattern)
+        self.absolute = absolute
+        self.relative = relative
+
+    def allows(self, reference, value):
+        # An infinite or NaN value only matches itself, which the caller
+        # checks, even with a relative tolerance of an infinite reference.
+        if not (math.isfinite(reference) and math.isfinite(value)):
+            return False
+        difference = abs(value - reference)
+        return difference <= max(self.absolute, self.relative * abs(reference))
+
+
+class Deviation:
+    """A statistic whose test value is not within its tolerance."""
+
+    def __init__(self, path, reference, value):
+        self.path = path
+        self.reference = reference
+        self.value = value
+
+    @property
+    def relative(self):
+        """
+        The difference relative to the reference, or ``inf`` if it cannot be
+        computed (the reference is zero or a value is not a finite number).
+        """
+        if not (_is_number(self.reference) and _is_number(self.value)):
+            return math.inf
+        if not (math.isfinite(self.reference) and math.isfinite(self.value)):
+            return math.inf
+        if self.reference == 0:
+            return math.inf
+        return abs(self.value - self.reference) / abs(self.reference)
+
+    def __str__(self):
+        if math.isinf(self.relative):
+            change = ""
+        else:
+            change = f" ({self.relative * 100:.3g}% off)"
+        return (
+            f"{self.path}: reference {self.reference}, "
+            f"test {self.value}{change}"
+        )
+
+
+class StatsDiffResult:
+    """The outcome of a comparison made by :class:`StatsDiff`."""
+
+    def __init__(self, compared, deviations, missing):
+        self.compared = compared
+        # Largest relative deviation first.
+        self.deviations = sorted(
+            deviations, key=lambda d: (-d.relative, d.path)
+        )
+        self.missing = sorted(missing)
+
+    @property
+    def passed(self):
+        return not self.deviations and not self.missing
+
+    def report(self, top=10):
+        """
+        Describes the comparison, listing at most ``top`` of the deviations
+        (the largest ones) and of the missing statistics.
+        """
+        if self.passed:
+            return f"All {self.compared} statistics match."
+
+        lines = [
+            f"{len(self.deviations)} of {self.compared} statistics differ "
+            f"and {len(self.missing)} are missing from the test output."
+        ]
+        for title, items in (
+            ("Largest differences:", self.deviations),
+            ("Missing statistics:", self.missing),
+        ):
+            if items:
+                lines.append(title)
+                lines.extend(f"  {item}" for item in items[:top])
+                if len(items) > top:
+                    lines.append(f"  ... and {len(items) - top} more")
+        return "\n".join(lines)
+
+
+class StatsDiff:
+    """
+    Compares statistics, as flat dicts from path to value, using the first
+    of ``tolerances`` whose pattern matches the path of each statistic, or
+    the default ``absolute`` and ``relative`` tolerances if none do.
+    Statistics whose path matches one of ``ignore`` are not compared.
+    """
+
+    def __init__(self, tolerances=(), absolute=0.0, relative=0.0, ignore=()):
+        self.tolerances = list(tolerances)
+        self.default = Tolerance("", absolute, relative)
+        self.ignore = [re.compile(regex) for regex in ignore]
+
+    def tolerance(self, path):
+        for tolerance in self.tolerances:
+            if tolerance.regex.match(path):
+                return tolerance
+        return self.default
+
+    def compare(self, reference, test):
+        """
+        :returns: A :class:`StatsDiffResult` of the comparison of the
+            ``test`` statistics to the ``reference`` ones.
+        """
+        compared = 0
+        deviations = []
+        missing = []
+        for path, expected in reference.items():
+            if any(regex.match(path) for regex in self.ignore):
+                continue
+            compared += 1
+            if path not in test:
+                missing.append(path)
+                continue
+            value = test[path]
+            # Most statistics are identical, so the tolerance is only looked
+            # up for those that are not.
+            if value == expected:
+                continue
+            if _is_number(expected) and _is_number(value):
+                if math.isnan(expected) and math.isnan(value):
+                    continue
+                if self.tolerance(path).allows(expected, value):
+                    continue
+            deviations.append(Deviation(path, expected, value))
+        return StatsDiffResult(compared, deviations, missing)
+
+    def compare_files(self, reference_path, test_path):
+        return self.compare(load_stats(reference_path), load_stats(test_path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare the statistics of a gem5 run to reference "
+        "statistics, in gem5's text format or JSON."
+    )
+    parser.add_argument("reference", help="The reference statistics")
+    parser.add_argument("test", help="The statistics to check")
+    parser.add_argument(
+        "--tolerance",
+        nargs=3,
+        action="append",
+        default=[],
+        metavar=("REGEX", "ABS", "REL"),
+        help="Absolute and relative tolerance of the statistics whose path "
+        "matches REGEX. The first matching tolerance is used. Can be given "
+        "several times.",
+    )
+    parser.add_argument(
+        "--abs",
+        type=float,
+        default=0.0,
+        help="Absolute tolerance of the other statistics "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--rel",
+        type=float,
+        default=0.0,
+        help="Relative tolerance of the other statistics "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--ignore",
+        action="append",
+        default=[],
+        metavar="REGEX",
+        help="Do not compare the statistics whose path matches REGEX",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of differences to report (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    tolerances = [
+        Tolerance(regex, float(absolute), float(relative))
+        for regex, absolute, relative in args.tolerance
+    ]
+    stats_diff = StatsDiff(tolerances, args.abs, args.rel, args.ignore)
+    result = stats_diff.compare_files(args.reference, args.test)
+    print(result.report(args.top))
+    return 0 if result.passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -55,6 +55,7 @@ from .fixture import (
     TempdirFixture,
     VariableFixture,
 )
+from .result_cache import get_result_cache
 
 
 def gem5_verify_config(
@@ -192,6 +193,14 @@ def _create_test_run_gem5(config, config_args, gem5_args):
         command.append(config)
         # Config_args should set up the program args.
         command.extend(config_args)
+
+        result_cache = get_result_cache()
+        if result_cache is not None:
+            key = result_cache.key(gem5, config, config_args, _gem5_args)
+            if result_cache.restore(key, tempdir):
+                params.log.info(f"Reusing the cached output of run {key}")
+                return
+
         log_call(
             params.log,
             command,
@@ -200,4 +209,10 @@ def _create_test_run_gem5(config, config_args, gem5_args):
             stderr=sys.stderr,
         )
 
+        if result_cache is not None:
+            # The resources downloaded by the run are part of the key of the
+            # next identical run, so the key is computed again.
+            key = result_cache.key(gem5, config, config_args, _gem5_args)
+            result_cache.store(key, tempdir)
+
     return test_run_gem5
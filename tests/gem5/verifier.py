@@ -40,7 +40,6 @@
 """
 Built in test cases that verify particular details about a gem5 run.
 """
-import json
 import os
 import re
 
@@ -51,6 +50,8 @@ from testlib.helper import (
     joinpath,
 )
 
+from .stats_diff import StatsDiff
+
 
 class Verifier:
     def __init__(self, fixtures=tuple()):
@@ -190,11 +191,51 @@ class MatchStderr(DerivedGoldStandard):
     _default_ignore_regex = []
 
 
-class MatchStats(DerivedGoldStandard):
-    # TODO: Likely will want to change this verifier since we have the weird
-    # perl script right now. A simple diff probably isn't going to work.
-    _file = constants.gem5_simulation_stats
-    _default_ignore_regex = []
+class MatchStats(Verifier):
+    """
+    Compares the statistics of the test to reference statistics, in gem5's
+    text format or JSON, allowing for the given tolerances.
+
+    .. seealso:: :class:`stats_diff.StatsDiff`
+    """
+
+    def __init__(
+        self,
+        standard_filename,
+        ignore_regex=None,
+        tolerances=(),
+        absolute=0.0,
+        relative=0.0,
+        test_filename=constants.gem5_simulation_stats,
+    ):
+        """
+        :param standard_filename: The path of the reference statistics.
+
+        :param ignore_regex: A string, compiled regex, or iterable containing
+        either. Statistics whose path matches are not compared.
+
+        :param tolerances: An iterable of :class:`stats_diff.Tolerance`, the
+        first one matching the path of a statistic is used.
+
+        :param absolute: The absolute tolerance of the other statistics.
+
+        :param relative: The relative tolerance of the other statistics.
+        """
+        super().__init__()
+        self.standard_filename = standard_filename
+        self.test_filename = test_filename
+        self.stats_diff = StatsDiff(
+            tolerances, absolute, relative, _iterable_regex(ignore_regex)
+        )
+
+    def test(self, params):
+        tempdir = params.fixtures[constants.tempdir_fixture_name].path
+        _check_stats(
+            self.stats_diff,
+            self.standard_filename,
+            joinpath(tempdir, self.test_filename),
+            tempdir,
+        )
 
 
 class MatchConfigINI(DerivedGoldStandard):
@@ -286,50 +327,48 @@ class MatchJSONStats(Verifier):
         truth_name: str,
         test_name: str,
         test_name_in_outdir: bool = False,
+        tolerances=(),
+        absolute: float = 0.0,
+        relative: float = 0.0,
     ):
         """
         :param truth_dir: The path to the directory including the trusted_stats
         for this test.
         :param test_name_in_m5out: True if the 'test_name' dir is to found in
         the `m5.options.outdir`.
+        :param tolerances: An iterable of :class:`stats_diff.Tolerance`, the
+        first one matching the path of a statistic is used.
+        :param absolute: The absolute tolerance of the other statistics.
+        :param relative: The relative tolerance of the other statistics.
         """
         super().__init__()
         self.truth_name = truth_name
         self.test_name = test_name
         self.test_name_in_outdir = test_name_in_outdir
-
-    def _compare_stats(self, trusted_file, test_file):
-        trusted_stats = json.load(trusted_file)
-        test_stats = json.load(test_file)
-        is_subset = trusted_stats.items() <= test_stats.items()
-        if is_subset:
-            err = (
-                "Following differences found between "
-                + f"{self.truth_name} and {self.test_name}.\n"
-            )
-            diffs = set(trusted_stats.items()) - set(test_stats.items())
-            for diff in diffs:
-                trusted_value = trusted_stats[diff[0]]
-                test_value = None
-                if diff[0] in test_stats.keys():
-                    test_value = test_stats[diff[0]]
-                err += f"{diff[0]}:\n"
-                err += (
-                    f"trusted_value: {trusted_value}, "
-                    + f"test_value: {test_value}"
-                )
-            test_util.fail(err)
+        self.stats_diff = StatsDiff(tolerances, absolute, relative)
 
     def test(self, params):
-        trusted_file = open(self.truth_name)
         if self.test_name_in_outdir:
             fixtures = params.fixtures
             tempdir = fixtures[constants.tempdir_fixture_name].path
-            test_file = open(joinpath(tempdir, self.test_name))
+            test_name = joinpath(tempdir, self.test_name)
         else:
-            test_file = open(self.test_name)
+            tempdir = None
+            test_name = self.test_name
 
-        return self._compare_stats(trusted_file, test_file)
+        _check_stats(self.stats_diff, self.truth_name, test_name, tempdir)
+
+
+def _check_stats(stats_diff, reference_filename, test_filename, tempdir):
+    result = stats_diff.compare_files(reference_filename, test_filename)
+    if not result.passed:
+        err = (
+            f"Statistics of {test_filename} did not match "
+            f"{reference_filename}:\n{result.report()}"
+        )
+        if tempdir is not None:
+            err += f"\nSee {tempdir} for full results"
+        test_util.fail(err)
 
 
 _re_type = type(re.compile(""))
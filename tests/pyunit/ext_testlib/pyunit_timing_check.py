@@ -0,0 +1,119 @@
+# Copyright (c) 2026 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# testlib is not part of gem5, so it is imported from ext.
+_EXT_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "ext")
+)
+sys.path.insert(0, _EXT_DIR)
+
+from testlib.timing import (
+    TimingDatabase,
+    longest_first,
+    shard,
+)
+
+
+class _Suite:
+    def __init__(self, uid):
+        self.uid = uid
+
+    def __repr__(self):
+        return self.uid
+
+
+def _uids(suites):
+    return [suite.uid for suite in suites]
+
+
+class TimingTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        self.timings = TimingDatabase(os.path.join(self.dir, "timings.json"))
+        durations = {"a": 10.0, "b": 1.0, "c": 5.0, "d": 5.0, "e": 2.0}
+        for uid, duration in durations.items():
+            self.timings.record(uid, duration)
+        self.suites = [_Suite(uid) for uid in "abcdef"]
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    def test_save_and_load(self) -> None:
+        self.timings.save()
+        timings = TimingDatabase(self.timings.path)
+        self.assertEqual(5.0, timings.duration("c"))
+        self.assertIsNone(timings.duration("f"))
+
+    def test_longest_first(self) -> None:
+        # The suite which never ran ("f") is assumed to be as long as the
+        # longest one, and suites with the same duration keep their order.
+        self.assertEqual(
+            ["a", "f", "c", "d", "e", "b"],
+            _uids(longest_first(self.suites, self.timings)),
+        )
+
+    def test_longest_first_without_timings(self) -> None:
+        timings = TimingDatabase(os.path.join(self.dir, "missing.json"))
+        self.assertEqual(self.suites, longest_first(self.suites, timings))
+
+    def test_shards_cover_every_suite_once(self) -> None:
+        for count in range(1, 8):
+            shards = [
+                shard(self.suites, self.timings, index, count)
+                for index in range(1, count + 1)
+            ]
+            uids = sorted(uid for suites in shards for uid in _uids(suites))
+            self.assertEqual(list("abcdef"), uids)
+
+    def test_shards_are_balanced(self) -> None:
+        # "a" and "f" (estimated as long as "a") are split between the
+        # shards, then each of the other suites, longest first, goes to the
+        # shard with the least work: 17 and 16 seconds.
+        shards = [shard(self.suites, self.timings, i, 2) for i in (1, 2)]
+        self.assertEqual(
+            [["a", "c", "e"], ["b", "d", "f"]],
+            [_uids(suites) for suites in shards],
+        )
+
+    def test_shard_does_not_depend_on_suite_order(self) -> None:
+        reordered = list(reversed(self.suites))
+        for index in (1, 2, 3):
+            self.assertEqual(
+                _uids(shard(self.suites, self.timings, index, 3)),
+                sorted(_uids(shard(reordered, self.timings, index, 3))),
+            )
+
+    def test_shard_index_out_of_range(self) -> None:
+        with self.assertRaises(ValueError):
+            shard(self.suites, self.timings, 0, 2)
+        with self.assertRaises(ValueError):
+            shard(self.suites, self.timings, 3, 2)
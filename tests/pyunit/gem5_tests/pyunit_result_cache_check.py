@@ -0,0 +1,198 @@
+# Copyright (c) 2026 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# testlib is not part of gem5, so it is imported from ext.
+_EXT_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "ext")
+)
+sys.path.insert(0, _EXT_DIR)
+
+# The tests/gem5 directory would shadow the gem5 stdlib as a package, so the
+# module is loaded from its file.
+_spec = importlib.util.spec_from_file_location(
+    "result_cache",
+    os.path.join(
+        os.path.dirname(__file__), "..", "..", "gem5", "result_cache.py"
+    ),
+)
+result_cache = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(result_cache)
+
+
+class ResultCacheTestSuite(unittest.TestCase):
+    """Tests for the cache of gem5 run outputs."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+        self.bin_path = os.path.join(self.tmp, "bin")
+        self.resource_dir = os.path.join(self.tmp, "resources")
+        os.makedirs(self.bin_path)
+        os.makedirs(self.resource_dir)
+
+        self.gem5 = self._write("gem5.opt", "gem5")
+        self.config_script = self._write("config.py", "print('config')")
+
+        patcher = mock.patch.object(
+            result_cache, "config", SimpleNamespace(bin_path=self.bin_path)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(
+            os.environ, {"GEM5_RESOURCE_DIR": self.resource_dir}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for variable in result_cache._RESOURCE_JSON_VARIABLES:
+            os.environ.pop(variable, None)
+
+        self.cache = result_cache.ResultCache(os.path.join(self.tmp, "cache"))
+
+    def _write(self, name, contents, directory=None):
+        path = os.path.join(directory or self.tmp, name)
+        with open(path, "w") as f:
+            f.write(contents)
+        return path
+
+    def _key(self, config_args=("--cpu", "timing"), gem5_args=("-re",)):
+        return self.cache.key(
+            self.gem5, self.config_script, config_args, gem5_args
+        )
+
+    def test_key_is_stable(self):
+        key = self._key()
+        self.assertEqual(key, self._key())
+        other_cache = result_cache.ResultCache(self.cache.directory)
+        self.assertEqual(
+            key,
+            other_cache.key(
+                self.gem5, self.config_script, ["--cpu", "timing"], ["-re"]
+            ),
+        )
+
+    def test_key_ignores_downloader_files(self):
+        key = self._key()
+        self._write("disk.img.md5cache", "{}", self.resource_dir)
+        self._write("disk.img.part", "", self.resource_dir)
+        self.assertEqual(key, self._key())
+
+    def test_key_changes_with_binary(self):
+        key = self._key()
+        self._write("gem5.opt", "a rebuilt gem5")
+        self.assertNotEqual(key, self._key())
+
+    def test_key_changes_with_config_script(self):
+        key = self._key()
+        self._write("config.py", "print('another config')")
+        self.assertNotEqual(key, self._key())
+
+    def test_key_changes_with_arguments(self):
+        key = self._key()
+        self.assertNotEqual(key, self._key(config_args=("--cpu", "atomic")))
+        self.assertNotEqual(key, self._key(gem5_args=()))
+
+    def test_key_changes_with_test_resources(self):
+        key = self._key()
+        self._write("hello", "binary", self.bin_path)
+        self.assertNotEqual(key, self._key())
+
+    def test_key_changes_with_downloaded_resources(self):
+        key = self._key()
+        self._write("arm-hello64-static", "binary", self.resource_dir)
+        self.assertNotEqual(key, self._key())
+
+    def test_key_changes_with_resource_json(self):
+        resources = self._write("resources.json", "[]")
+        key = self._key()
+        os.environ["GEM5_RESOURCE_JSON"] = resources
+        json_key = self._key()
+        self.assertNotEqual(key, json_key)
+        self._write("resources.json", '[{"id": "arm-hello64-static"}]')
+        self.assertNotEqual(json_key, self._key())
+
+    def test_store_then_restore(self):
+        outdir = os.path.join(self.tmp, "m5out")
+        os.makedirs(os.path.join(outdir, "fs"))
+        self._write("stats.txt", "simTicks 1000", outdir)
+        self._write("console", "hello", os.path.join(outdir, "fs"))
+
+        key = self._key()
+        restored = os.path.join(self.tmp, "restored")
+        self.assertFalse(self.cache.restore(key, restored))
+        self.assertFalse(os.path.exists(restored))
+
+        self.cache.store(key, outdir)
+        entry_dir = os.path.dirname(self.cache._entry(key))
+        self.assertEqual(os.listdir(entry_dir), [key])
+
+        self.assertTrue(self.cache.restore(key, restored))
+        with open(os.path.join(restored, "stats.txt")) as f:
+            self.assertEqual(f.read(), "simTicks 1000")
+        with open(os.path.join(restored, "fs", "console")) as f:
+            self.assertEqual(f.read(), "hello")
+
+    def test_store_keeps_existing_entry(self):
+        outdir = os.path.join(self.tmp, "m5out")
+        os.makedirs(outdir)
+        self._write("stats.txt", "simTicks 1000", outdir)
+        key = self._key()
+        self.cache.store(key, outdir)
+
+        self._write("stats.txt", "simTicks 2000", outdir)
+        self.cache.store(key, outdir)
+        entry_dir = os.path.dirname(self.cache._entry(key))
+        self.assertEqual(os.listdir(entry_dir), [key])
+
+        restored = os.path.join(self.tmp, "restored")
+        self.assertTrue(self.cache.restore(key, restored))
+        with open(os.path.join(restored, "stats.txt")) as f:
+            self.assertEqual(f.read(), "simTicks 1000")
+
+    def test_store_discards_losing_entry(self):
+        outdir = os.path.join(self.tmp, "m5out")
+        os.makedirs(outdir)
+        self._write("stats.txt", "simTicks 1000", outdir)
+        key = self._key()
+
+        # Another run stores the entry between the check and the rename.
+        def rename(src, dst):
+            os.makedirs(dst)
+            raise OSError("Directory not empty")
+
+        with mock.patch.object(result_cache.os, "rename", rename):
+            self.cache.store(key, outdir)
+        entry_dir = os.path.dirname(self.cache._entry(key))
+        self.assertEqual(os.listdir(entry_dir), [key])
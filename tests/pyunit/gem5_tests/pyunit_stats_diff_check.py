@@ -0,0 +1,308 @@
+# Copyright (c) 2026 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import contextlib
+import importlib.util
+import io
+import json
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+# The tests/gem5 directory would shadow the gem5 stdlib as a package, so the
+# module is loaded from its file.
+_spec = importlib.util.spec_from_file_location(
+    "stats_diff",
+    os.path.join(
+        os.path.dirname(__file__), "..", "..", "gem5", "stats_diff.py"
+    ),
+)
+stats_diff = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(stats_diff)
+
+_STATS_TXT = """
+---------- Begin Simulation Statistics ----------
+simSeconds                                   0.000100   # (Second)
+simTicks                                    100000000   # (Tick)
+system.cpu.numCycles                           200000   # (Cycle)
+system.mem.readLat::samples                        10   # (Tick)
+system.mem.readLat::0-99                         4   40.00%   40.00% # (Tick)
+system.mem.readLat::100-199                      6   60.00%  100.00% # (Tick)
+system.mem.readLat::total                          10   # (Tick)
+system.cpu.ipc                                    nan   # (Count)
+
+---------- End Simulation Statistics   ----------
+
+---------- Begin Simulation Statistics ----------
+simSeconds                                   0.000200   # (Second)
+system.cpu.numCycles                           400000   # (Cycle)
+
+---------- End Simulation Statistics   ----------
+
+---------- Begin Simulation Statistics ----------
+simSeconds                                   0.000300   # (Second)
+
+---------- End Simulation Statistics   ----------
+"""
+
+
+class ParseStatsTxtTestSuite(unittest.TestCase):
+    """Tests for parsing the text statistics of gem5."""
+
+    def setUp(self):
+        self.stats = stats_diff.parse_stats_txt(_STATS_TXT.splitlines())
+
+    def test_first_dump_is_not_prefixed(self):
+        self.assertEqual(self.stats["simSeconds"], 0.0001)
+        self.assertEqual(self.stats["simTicks"], 100000000)
+        self.assertEqual(self.stats["system.cpu.numCycles"], 200000)
+
+    def test_later_dumps_are_prefixed(self):
+        self.assertEqual(self.stats["dump1/simSeconds"], 0.0002)
+        self.assertEqual(self.stats["dump1/system.cpu.numCycles"], 400000)
+        self.assertEqual(self.stats["dump2/simSeconds"], 0.0003)
+        self.assertNotIn("dump1/simTicks", self.stats)
+        self.assertNotIn("dump0/simSeconds", self.stats)
+
+    def test_distribution_keeps_first_value(self):
+        self.assertEqual(self.stats["system.mem.readLat::samples"], 10)
+        self.assertEqual(self.stats["system.mem.readLat::0-99"], 4)
+        self.assertEqual(self.stats["system.mem.readLat::100-199"], 6)
+        self.assertEqual(self.stats["system.mem.readLat::total"], 10)
+
+    def test_nan(self):
+        self.assertTrue(math.isnan(self.stats["system.cpu.ipc"]))
+
+    def test_skips_separators(self):
+        self.assertEqual(
+            [path for path in self.stats if path.startswith("-")], []
+        )
+        self.assertEqual(len(self.stats), 11)
+
+
+class FlattenTestSuite(unittest.TestCase):
+    """Tests for flattening JSON statistics."""
+
+    def test_dicts(self):
+        self.assertEqual(
+            stats_diff.flatten(
+                {"system": {"cpu": {"ipc": 1.5, "name": "cpu"}}, "ticks": 3}
+            ),
+            {"system.cpu.ipc": 1.5, "system.cpu.name": "cpu", "ticks": 3},
+        )
+
+    def test_lists(self):
+        self.assertEqual(
+            stats_diff.flatten(
+                {"cpus": [{"ipc": 1.0}, {"ipc": 2.0}], "bins": [4, 6]}
+            ),
+            {"cpus.0.ipc": 1.0, "cpus.1.ipc": 2.0, "bins.0": 4, "bins.1": 6},
+        )
+
+    def test_top_level_list(self):
+        self.assertEqual(stats_diff.flatten([{"a": 1}, 2]), {"0.a": 1, "1": 2})
+
+
+class StatsDiffTestSuite(unittest.TestCase):
+    """Tests for comparing statistics with tolerances."""
+
+    def test_identical(self):
+        stats = {"a": 1.0, "b": "name", "c": 0}
+        result = stats_diff.StatsDiff().compare(stats, dict(stats))
+        self.assertTrue(result.passed)
+        self.assertEqual(result.compared, 3)
+        self.assertEqual(result.report(), "All 3 statistics match.")
+
+    def test_exact_by_default(self):
+        result = stats_diff.StatsDiff().compare({"a": 1.0}, {"a": 1.000001})
+        self.assertFalse(result.passed)
+        self.assertEqual([d.path for d in result.deviations], ["a"])
+
+    def test_default_tolerance(self):
+        diff = stats_diff.StatsDiff(absolute=0.5, relative=0.1)
+        # Within the relative tolerance.
+        self.assertTrue(diff.compare({"a": 100.0}, {"a": 109.0}).passed)
+        # Within the absolute tolerance.
+        self.assertTrue(diff.compare({"a": 1.0}, {"a": 1.4}).passed)
+        self.assertFalse(diff.compare({"a": 100.0}, {"a": 111.0}).passed)
+
+    def test_first_matching_tolerance_wins(self):
+        diff = stats_diff.StatsDiff(
+            [
+                stats_diff.Tolerance(r"system\.cpu\.ipc", 0, 0.01),
+                stats_diff.Tolerance(r"system\.cpu\.", 0, 0.5),
+            ],
+            relative=0.2,
+        )
+        self.assertEqual(diff.tolerance("system.cpu.ipc").relative, 0.01)
+        self.assertEqual(diff.tolerance("system.cpu.cycles").relative, 0.5)
+        self.assertIs(diff.tolerance("system.mem.reads"), diff.default)
+
+        reference = {
+            "system.cpu.ipc": 1.0,
+            "system.cpu.cycles": 100.0,
+            "system.mem.reads": 100.0,
+        }
+        result = diff.compare(
+            reference,
+            {
+                "system.cpu.ipc": 1.1,
+                "system.cpu.cycles": 140.0,
+                "system.mem.reads": 130.0,
+            },
+        )
+        self.assertEqual(
+            sorted(d.path for d in result.deviations),
+            ["system.cpu.ipc", "system.mem.reads"],
+        )
+
+    def test_ignore(self):
+        diff = stats_diff.StatsDiff(ignore=[r"host"])
+        result = diff.compare(
+            {"hostSeconds": 1.0, "simTicks": 5}, {"simTicks": 5}
+        )
+        self.assertTrue(result.passed)
+        self.assertEqual(result.compared, 1)
+
+    def test_nan(self):
+        diff = stats_diff.StatsDiff(relative=0.5)
+        self.assertTrue(diff.compare({"a": math.nan}, {"a": math.nan}).passed)
+        self.assertFalse(diff.compare({"a": math.nan}, {"a": 1.0}).passed)
+        self.assertFalse(diff.compare({"a": 1.0}, {"a": math.nan}).passed)
+
+    def test_inf(self):
+        diff = stats_diff.StatsDiff(relative=0.5)
+        self.assertTrue(diff.compare({"a": math.inf}, {"a": math.inf}).passed)
+        self.assertFalse(diff.compare({"a": math.inf}, {"a": 1.0}).passed)
+        self.assertFalse(diff.compare({"a": 1.0}, {"a": math.inf}).passed)
+        self.assertFalse(
+            diff.compare({"a": math.inf}, {"a": -math.inf}).passed
+        )
+
+    def test_non_finite_deviation_is_infinite(self):
+        result = stats_diff.StatsDiff().compare(
+            {"a": 1.0, "b": 2.0, "c": 0.0, "d": "x"},
+            {"a": math.nan, "b": 3.0, "c": 1.0, "d": "y"},
+        )
+        relative = {d.path: d.relative for d in result.deviations}
+        self.assertEqual(relative["a"], math.inf)
+        self.assertEqual(relative["b"], 0.5)
+        self.assertEqual(relative["c"], math.inf)
+        self.assertEqual(relative["d"], math.inf)
+        # The largest deviations come first.
+        self.assertEqual(result.deviations[-1].path, "b")
+
+    def test_missing(self):
+        result = stats_diff.StatsDiff().compare(
+            {"a": 1, "b": 2, "c": 3}, {"a": 1, "d": 4}
+        )
+        self.assertFalse(result.passed)
+        self.assertEqual(result.missing, ["b", "c"])
+        self.assertEqual(result.deviations, [])
+        self.assertEqual(result.compared, 3)
+
+    def test_report_top(self):
+        reference = {f"stat{i:02}": 100.0 for i in range(15)}
+        test = {f"stat{i:02}": 100.0 + i + 1 for i in range(15)}
+        reference.update({f"missing{i}": 1 for i in range(4)})
+        result = stats_diff.StatsDiff().compare(reference, test)
+
+        lines = result.report(top=3).splitlines()
+        self.assertEqual(
+            lines[0],
+            "15 of 19 statistics differ and 4 are missing from the test "
+            "output.",
+        )
+        self.assertEqual(lines[1], "Largest differences:")
+        self.assertEqual(
+            lines[2], "  stat14: reference 100.0, test 115.0 (15% off)"
+        )
+        self.assertEqual(lines[5], "  ... and 12 more")
+        self.assertEqual(lines[6], "Missing statistics:")
+        self.assertEqual(lines[7:10], [f"  missing{i}" for i in range(3)])
+        self.assertEqual(lines[10], "  ... and 1 more")
+        self.assertEqual(len(lines), 11)
+
+        self.assertEqual(len(result.report(top=20).splitlines()), 1 + 16 + 5)
+
+
+class MainTestSuite(unittest.TestCase):
+    """Tests for running the comparison as a script."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.reference = os.path.join(self.tmp, "trusted_stats.json")
+        with open(self.reference, "w") as f:
+            json.dump({"system": {"cpu": {"ipc": 1.0}}, "simTicks": 100}, f)
+
+    def _main(self, test_stats, *args):
+        test = os.path.join(self.tmp, "stats.txt")
+        with open(test, "w") as f:
+            f.write(test_stats)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            status = stats_diff.main([*args, self.reference, test])
+        return status, output.getvalue()
+
+    def test_match(self):
+        status, output = self._main(
+            "system.cpu.ipc 1.0 # IPC\nsimTicks 100 # Ticks\n"
+        )
+        self.assertEqual(status, 0)
+        self.assertEqual(output, "All 2 statistics match.\n")
+
+    def test_difference(self):
+        status, output = self._main(
+            "system.cpu.ipc 1.05 # IPC\nsimTicks 100 # Ticks\n"
+        )
+        self.assertEqual(status, 1)
+        self.assertIn("system.cpu.ipc", output)
+
+    def test_tolerance(self):
+        status, _ = self._main(
+            "system.cpu.ipc 1.05 # IPC\nsimTicks 101 # Ticks\n",
+            "--tolerance",
+            r"system\.cpu\.",
+            "0",
+            "0.1",
+            "--abs",
+            "1",
+        )
+        self.assertEqual(status, 0)
+
+    def test_missing(self):
+        status, output = self._main("simTicks 100 # Ticks\n")
+        self.assertEqual(status, 1)
+        self.assertIn("  system.cpu.ipc", output)
+
+    def test_ignore(self):
+        status, _ = self._main(
+            "simTicks 100 # Ticks\n", "--ignore", r"system\."
+        )
+        self.assertEqual(status, 0)
@@ -0,0 +1,128 @@
+# Copyright (c) 2026 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import importlib
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import m5
+
+_objects_init = os.path.join(
+    os.path.dirname(os.path.abspath(m5.__file__)), "objects", "__init__.py"
+)
+
+# Stand-ins for SimObject modules. As in gem5, a module imports the classes
+# of the others from their own module rather than through m5.objects.
+_sources = {
+    "Base": "class Base:\n    pass\n",
+    "Derived": (
+        "from m5.objects.Base import Base\n\n\n"
+        "class Derived(Base):\n    pass\n"
+    ),
+    "Other": "from m5.objects.Base import Base\n\nOther = 42\n",
+    "_index": (
+        "index = {'Base': 'm5.objects.Base', "
+        "'Derived': 'm5.objects.Derived', 'Other': 'm5.objects.Other'}\n"
+    ),
+}
+
+
+class LazyObjectsTestSuite(unittest.TestCase):
+    """Tests the lazy imports of the SimObject modules by m5.objects."""
+
+    def setUp(self):
+        self._saved_modules = {
+            name: module
+            for name, module in sys.modules.items()
+            if name == "m5.objects" or name.startswith("m5.objects.")
+        }
+        self._saved_attr = m5.__dict__.get("objects")
+        for name in self._saved_modules:
+            del sys.modules[name]
+
+        self.directory = tempfile.mkdtemp()
+        for name, source in _sources.items():
+            with open(os.path.join(self.directory, f"{name}.py"), "w") as f:
+                f.write(source)
+
+        spec = importlib.util.spec_from_file_location(
+            "m5.objects",
+            _objects_init,
+            submodule_search_locations=[self.directory],
+        )
+        # The gem5 importer lists the embedded modules in the loader state.
+        spec.loader_state = [f"m5.objects.{name}" for name in _sources]
+        self.objects = importlib.util.module_from_spec(spec)
+        sys.modules["m5.objects"] = self.objects
+        spec.loader.exec_module(self.objects)
+        m5.objects = self.objects
+
+    def tearDown(self):
+        for name in list(sys.modules):
+            if name == "m5.objects" or name.startswith("m5.objects."):
+                del sys.modules[name]
+        sys.modules.update(self._saved_modules)
+        if self._saved_attr is None:
+            m5.__dict__.pop("objects", None)
+        else:
+            m5.objects = self._saved_attr
+        shutil.rmtree(self.directory)
+
+    def test_lazy_import(self) -> None:
+        self.assertNotIn("m5.objects.Base", sys.modules)
+        base = self.objects.Base
+        self.assertIsInstance(base, type)
+        self.assertIn("m5.objects.Base", sys.modules)
+        self.assertNotIn("m5.objects.Derived", sys.modules)
+
+    def test_class_imported_by_another_module(self) -> None:
+        # Importing Derived imports m5.objects.Base as a side effect, which
+        # binds it as an attribute of m5.objects.
+        derived = self.objects.Derived
+        self.assertIsInstance(self.objects.Base, type)
+        self.assertTrue(issubclass(derived, self.objects.Base))
+
+        from m5.objects import Base
+
+        self.assertIs(Base, self.objects.Base)
+
+    def test_module_imported_directly(self) -> None:
+        module = importlib.import_module("m5.objects.Derived")
+        self.assertIs(self.objects.Derived, module.Derived)
+        self.assertIs(self.objects.Base, module.Base)
+
+    def test_module_without_class_of_its_name(self) -> None:
+        self.assertEqual(self.objects.Other, 42)
+
+    def test_load_all(self) -> None:
+        importlib.import_module("m5.objects.Other")
+        self.assertIn("Derived", self.objects.__all__)
+        for name in ("Base", "Derived"):
+            self.assertIsInstance(getattr(self.objects, name), type)
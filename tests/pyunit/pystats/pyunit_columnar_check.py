@@ -0,0 +1,137 @@
+# Copyright (c) 2024 The Regents of The University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+from m5.ext.pystats import (
+    ColumnarWriter,
+    load_columnar,
+)
+
+
+class ColumnarTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "stats.col")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    def test_columns(self) -> None:
+        writer = ColumnarWriter(self.path)
+        for tick in range(5):
+            writer.append(tick * 100, {"a": tick, "b.c::0": tick * 2})
+        writer.close()
+
+        stats = load_columnar(self.path)
+        self.assertEqual(["tick", "a", "b.c::0"], stats.columns)
+        self.assertEqual(5, len(stats))
+        self.assertEqual([0, 100, 200, 300, 400], list(stats.ticks))
+        self.assertEqual([0, 1, 2, 3, 4], list(stats["a"]))
+        self.assertEqual([0, 2, 4, 6, 8], list(stats["b.c::0"]))
+        self.assertIn("a", stats)
+        self.assertNotIn("d", stats)
+
+    def test_new_and_missing_columns(self) -> None:
+        writer = ColumnarWriter(self.path)
+        writer.append(1, {"a": 1.0, "b": 2.0})
+        writer.append(2, {"a": 3.0, "c": 4.0})
+        writer.close()
+
+        stats = load_columnar(self.path)
+        self.assertEqual(["tick", "a", "b", "c"], stats.columns)
+        self.assertEqual([1.0, 3.0], list(stats["a"]))
+        b = list(stats["b"])
+        self.assertEqual(2.0, b[0])
+        self.assertTrue(math.isnan(b[1]))
+        c = list(stats["c"])
+        self.assertTrue(math.isnan(c[0]))
+        self.assertEqual(4.0, c[1])
+        self.assertEqual(
+            {"tick": 2.0, "a": 3.0, "c": 4.0},
+            {k: v for k, v in stats.row(-1).items() if not math.isnan(v)},
+        )
+
+    def test_read_while_writing(self) -> None:
+        writer = ColumnarWriter(self.path)
+        self.assertEqual(0, len(load_columnar(self.path)))
+        writer.append(1, {"a": 1.0})
+        self.assertEqual([1.0], list(load_columnar(self.path)["a"]))
+        writer.close()
+
+    def test_schema_change_keeps_rows(self) -> None:
+        writer = ColumnarWriter(self.path)
+        writer.append(1, {"a": 1.0})
+        with open(self.path, "rb") as f:
+            first = f.read()
+        writer.append(2, {"a": 2.0, "b": 3.0})
+        writer.close()
+
+        # The rows already written are not moved when a column is added.
+        with open(self.path, "rb") as f:
+            self.assertEqual(first, f.read(len(first)))
+        stats = load_columnar(self.path)
+        self.assertEqual([1.0, 2.0], list(stats["a"]))
+        self.assertTrue(math.isnan(stats["b"][0]))
+        self.assertEqual(3.0, stats["b"][1])
+
+    def test_many_blocks(self) -> None:
+        writer = ColumnarWriter(self.path)
+        for tick in range(3000):
+            writer.append(tick, {"a": tick * 2.0, "b": -tick})
+        writer.close()
+
+        stats = load_columnar(self.path)
+        self.assertEqual(3000, len(stats))
+        self.assertEqual(
+            [tick * 2.0 for tick in range(3000)], list(stats["a"])
+        )
+        self.assertEqual(list(range(3000)), list(stats.ticks))
+        self.assertEqual({"tick": 2999, "a": 5998, "b": -2999}, stats.row(-1))
+        self.assertEqual({"tick": 16, "a": 32, "b": -16}, stats.row(16))
+
+    def test_not_columnar(self) -> None:
+        ColumnarWriter(self.path).close()
+        with open(self.path, "wb") as f:
+            f.write(b"not a columnar file")
+        with self.assertRaises(ValueError):
+            load_columnar(self.path)
+
+    def test_close(self) -> None:
+        writer = ColumnarWriter(self.path)
+        writer.append(1, {"a": 1.0})
+        writer.close()
+
+        with load_columnar(self.path) as stats:
+            self.assertEqual([1.0], list(stats["a"]))
+        with self.assertRaises(ValueError):
+            stats["a"]
+        with self.assertRaises(ValueError):
+            stats.row(0)
@@ -0,0 +1,100 @@
+# Copyright (c) 2024 The Regents of The University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import io
+import json
+import unittest
+
+from m5.ext.pystats import (
+    DeltaEncoder,
+    iter_dumps,
+)
+
+
+class DeltaEncoderTestSuite(unittest.TestCase):
+    def test_only_changes_encoded(self) -> None:
+        encoder = DeltaEncoder(snapshot_interval=3)
+        dumps = [
+            {"a": 1.0, "b": 2.0},
+            {"a": 1.0, "b": 3.0},
+            {"a": 1.0, "b": 3.0},
+            {"a": 1.0, "b": 3.0},
+        ]
+        records = [encoder.encode(i, d) for i, d in enumerate(dumps)]
+        self.assertEqual(
+            [True, False, False, True], [r["snapshot"] for r in records]
+        )
+        self.assertEqual({"a": 1.0, "b": 2.0}, records[0]["values"])
+        self.assertEqual({"b": 3.0}, records[1]["values"])
+        self.assertEqual({}, records[2]["values"])
+        self.assertEqual(dumps[3], records[3]["values"])
+
+    def test_nan_unchanged(self) -> None:
+        encoder = DeltaEncoder()
+        encoder.encode(0, {"a": float("nan")})
+        self.assertEqual({}, encoder.encode(1, {"a": float("nan")})["values"])
+
+    def test_replay(self) -> None:
+        dumps = [
+            {"a": 1.0, "b": 2.0},
+            {"a": 4.0, "b": 2.0, "c": 5.0},
+            {"a": 4.0, "c": 6.0},
+            {"a": 7.0, "c": 6.0},
+        ]
+        fp = io.StringIO()
+        encoder = DeltaEncoder(snapshot_interval=2)
+        for tick, values in enumerate(dumps):
+            encoder.write(fp, tick * 10, values)
+
+        fp.seek(0)
+        self.assertEqual(
+            [(tick * 10, values) for tick, values in enumerate(dumps)],
+            [(tick, dict(values)) for tick, values in iter_dumps(fp)],
+        )
+
+    def test_replay_recovery(self) -> None:
+        fp = io.StringIO()
+        encoder = DeltaEncoder(snapshot_interval=2)
+        for tick in range(4):
+            encoder.write(fp, tick, {"a": float(tick)})
+        lines = fp.getvalue().splitlines(keepends=True)
+
+        # The records before the second snapshot are lost and the last line
+        # is incomplete.
+        self.assertTrue(json.loads(lines[2])["snapshot"])
+        partial = io.StringIO("".join(lines[1:3]) + lines[3][:5])
+        self.assertEqual(
+            [(2, {"a": 2.0})],
+            [(tick, dict(values)) for tick, values in iter_dumps(partial)],
+        )
+
+    def test_replay_is_read_only(self) -> None:
+        fp = io.StringIO()
+        DeltaEncoder().write(fp, 1, {"a": 1.0})
+        fp.seek(0)
+        ((_, values),) = iter_dumps(fp)
+        with self.assertRaises(TypeError):
+            values["a"] = 2.0
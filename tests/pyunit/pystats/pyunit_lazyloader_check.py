@@ -0,0 +1,147 @@
+# Copyright (c) 2024 The Regents of The University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from m5.ext.pystats import (
+    Distribution,
+    Group,
+    Scalar,
+    SimObjectGroup,
+    SimObjectVectorGroup,
+    SimStat,
+    Vector,
+    load_lazy,
+)
+
+
+def _get_mock_simstat() -> SimStat:
+    return SimStat(
+        simulated_begin_time=0,
+        simulated_end_time=1000,
+        board=SimObjectGroup(
+            processor=SimObjectGroup(
+                cores=SimObjectVectorGroup(
+                    value=[
+                        SimObjectGroup(
+                            numCycles=Scalar(value=i * 10, unit="Cycle"),
+                            ipc=Scalar(value=0.5 + i, description="IPC"),
+                        )
+                        for i in range(4)
+                    ]
+                ),
+            ),
+            memory=SimObjectGroup(
+                readReqs=Vector(
+                    value={0: Scalar(value=1), "total": Scalar(value=2)},
+                    type="Vector",
+                    description="reads [per bank]",
+                ),
+                latency=Distribution(
+                    value={0: Scalar(value=3), 1: Scalar(value=4)},
+                    min=0,
+                    max=1,
+                    num_bins=2,
+                    bin_size=1,
+                ),
+                queue=Group(depth=Scalar(value=7)),
+            ),
+        ),
+    )
+
+
+class LazyLoaderTestSuite(unittest.TestCase):
+    """Test cases for m5.ext.pystats.lazyloader.load_lazy()"""
+
+    def setUp(self) -> None:
+        self.simstat = _get_mock_simstat()
+        self.json = self.simstat.dumps()
+        self.lazy = load_lazy(io.BytesIO(self.json.encode()))
+
+    def test_attributes(self) -> None:
+        self.assertEqual(1000, self.lazy.simulated_end_time)
+        self.assertIsInstance(self.lazy.board, SimObjectGroup)
+        self.assertEqual(
+            30, self.lazy.board.processor.cores[3].numCycles.value
+        )
+        self.assertEqual(self.lazy.board.processor.cores1.ipc.value, 1.5)
+        self.assertEqual(2, self.lazy.board.memory["readReqs"]["total"].value)
+        self.assertEqual(1, self.lazy.board.memory.readReqs[0].value)
+        self.assertIsInstance(self.lazy.board.memory.latency, Distribution)
+        self.assertEqual(7, self.lazy.board.memory.queue.depth.value)
+
+    def test_only_accessed_members_decoded(self) -> None:
+        self.lazy.board.processor
+        self.assertIn("processor", self.lazy.board.__dict__)
+        self.assertNotIn("memory", self.lazy.board.__dict__)
+
+    def test_find(self) -> None:
+        self.assertEqual(
+            [0, 10, 20, 30],
+            [stat.value for stat in self.lazy.find("numCycles")],
+        )
+        # Scalars which do not match are not decoded.
+        self.assertNotIn("ipc", self.lazy.board.processor.cores[0].__dict__)
+
+    def test_to_json(self) -> None:
+        self.assertEqual(json.loads(self.json), json.loads(self.lazy.dumps()))
+
+    def test_load_from_path(self) -> None:
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".json", delete=False
+        ) as f:
+            f.write(self.json)
+        try:
+            lazy = load_lazy(f.name)
+            self.assertEqual(10, lazy.board.processor.cores[1].numCycles.value)
+        finally:
+            os.remove(f.name)
+
+    def test_escaped_strings(self) -> None:
+        simstat = SimStat(
+            simulated_begin_time=0,
+            board=SimObjectGroup(
+                **{
+                    "cacheé": Group(
+                        hits=Scalar(value=1, description='a "}" \\ {[')
+                    ),
+                    "vector": Vector(
+                        value={0: Scalar(value=2, description='"]\n')},
+                        type="Vector",
+                        description="é]",
+                    ),
+                    "depth": Scalar(value=3),
+                }
+            ),
+        )
+        lazy = load_lazy(io.BytesIO(simstat.dumps().encode()))
+        self.assertEqual(3, lazy.board.depth.value)
+        self.assertEqual('a "}" \\ {[', lazy.board["cacheé"].hits.description)
+        self.assertEqual(2, lazy.board.vector[0].value)
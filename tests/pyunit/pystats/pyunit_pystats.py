@@ -206,3 +206,61 @@ class NavigatingPyStatsTestCase(unittest.TestCase):
             self.simstat.find("sparse_hist"),
             [self.simstat.simobject_vector[1]["sparse_hist"]],
         )
+
+
+class PathIndexTestCase(unittest.TestCase):
+    """Tests the flat path index of a SimStat."""
+
+    def setUp(self) -> None:
+        self.simstat = _get_mock_simstat()
+        self.index = self.simstat.path_index()
+
+    def test_exact(self):
+        self.assertIs(
+            self.simstat.simobject_vector[0].vector2d,
+            self.index["simobject_vector0.vector2d"],
+        )
+        self.assertIs(
+            self.simstat.simobject_vector, self.index["simobject_vector"]
+        )
+        self.assertIsNone(self.index.get("simobject_vector2"))
+        self.assertNotIn("simobject_vector.vector2d", self.index)
+
+    def test_prefix(self):
+        self.assertEqual(
+            [
+                "simobject_vector1.distribution",
+                "simobject_vector1.sparse_hist",
+            ],
+            [path for path, _ in self.index.prefix("simobject_vector1.")],
+        )
+
+    def test_glob(self):
+        self.assertEqual(
+            [
+                (
+                    "simobject_vector0.vector2d",
+                    self.simstat.simobject_vector0.vector2d,
+                ),
+            ],
+            self.index.glob("simobject_vector*.vector*"),
+        )
+        self.assertEqual(
+            ["simobject_vector0", "simobject_vector1"],
+            [path for path, _ in self.index.glob("simobject_vector?")],
+        )
+        self.assertEqual([], self.index.glob("missing*"))
+
+    def test_cached(self):
+        self.assertIs(self.index, self.simstat.path_index())
+        self.simstat.simobject_vector[1].extra = Scalar(value=1)
+        self.assertNotIn("simobject_vector1.extra", self.simstat.path_index())
+        self.assertIn(
+            "simobject_vector1.extra",
+            self.simstat.path_index(rebuild=True),
+        )
+        # The index is not a member of the stats tree.
+        self.assertNotIn("path_index", self.simstat.to_json())
+
+    def test_vector_item_out_of_range(self):
+        self.assertIsNone(self.simstat.simobject_vector5)
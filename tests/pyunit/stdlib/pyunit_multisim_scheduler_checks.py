@@ -0,0 +1,122 @@
+# Copyright (c) 2024 The Regents of the University of California
+# All Rights Reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+
+from gem5.utils.multisim.scheduler import (
+    Job,
+    Scheduler,
+)
+
+
+def _start_all(scheduler: Scheduler) -> list:
+    started = []
+    job = scheduler.next_job()
+    while job is not None:
+        started.append(job)
+        job = scheduler.next_job()
+    return started
+
+
+class MultiSimSchedulerTestSuite(unittest.TestCase):
+    """Tests for gem5.utils.multisim.scheduler.Scheduler"""
+
+    def test_longest_first(self) -> None:
+        scheduler = Scheduler(
+            jobs=[
+                Job("short", expected_duration=1),
+                Job("unknown"),
+                Job("long", expected_duration=100),
+                Job("medium", expected_duration=10),
+            ],
+            max_processes=4,
+        )
+        self.assertEqual(
+            ["long", "medium", "short", "unknown"],
+            [job.id for job in _start_all(scheduler)],
+        )
+
+    def test_max_processes(self) -> None:
+        scheduler = Scheduler(
+            jobs=[Job(f"sim_{i}") for i in range(3)], max_processes=2
+        )
+        started = _start_all(scheduler)
+        self.assertEqual(2, len(started))
+        scheduler.finish(started[0], 0, 1.0)
+        self.assertEqual("sim_2", scheduler.next_job().id)
+        self.assertIsNone(scheduler.next_job())
+
+    def test_memory_budget(self) -> None:
+        scheduler = Scheduler(
+            jobs=[
+                Job("big", expected_memory=6, expected_duration=3),
+                Job("bigger", expected_memory=8, expected_duration=2),
+                Job("small", expected_memory=4, expected_duration=1),
+            ],
+            max_processes=3,
+            memory_budget=10,
+        )
+        # "bigger" does not fit alongside "big", but "small" does.
+        started = _start_all(scheduler)
+        self.assertEqual(["big", "small"], [job.id for job in started])
+
+        scheduler.finish(started[0], 0, 3.0)
+        self.assertIsNone(scheduler.next_job())
+        scheduler.finish(started[1], 0, 1.0)
+        self.assertEqual("bigger", scheduler.next_job().id)
+
+    def test_over_budget_run_alone(self) -> None:
+        scheduler = Scheduler(
+            jobs=[Job("huge", expected_memory=100), Job("small")],
+            max_processes=2,
+            memory_budget=10,
+        )
+        started = _start_all(scheduler)
+        self.assertEqual(["small"], [job.id for job in started])
+        scheduler.finish(started[0], 0, 1.0)
+        self.assertEqual("huge", scheduler.next_job().id)
+
+    def test_retry(self) -> None:
+        scheduler = Scheduler(
+            jobs=[Job("flaky"), Job("other")], max_processes=1, max_retries=1
+        )
+        job = scheduler.next_job()
+        self.assertTrue(scheduler.finish(job, 1, 1.0))
+        # The failed job is rerun before the other job.
+        job = scheduler.next_job()
+        self.assertEqual("flaky", job.id)
+        self.assertFalse(scheduler.finish(job, 1, 2.0, peak_rss=1024))
+        job = scheduler.next_job()
+        self.assertEqual("other", job.id)
+        scheduler.finish(job, 0, 3.0)
+        self.assertTrue(scheduler.done())
+
+        manifest = scheduler.manifest()
+        self.assertEqual(["flaky", "other"], [e["id"] for e in manifest])
+        self.assertEqual(2, manifest[0]["attempts"])
+        self.assertFalse(manifest[0]["success"])
+        self.assertEqual(1024, manifest[0]["peak_rss"])
+        self.assertTrue(manifest[1]["success"])
@@ -24,6 +24,7 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import json
 import os
 import shutil
 import tempfile
@@ -31,6 +32,8 @@ import unittest
 from pathlib import Path
 
 from gem5.resources.md5_utils import (
+    md5_cache_path,
+    md5_cached,
     md5_dir,
     md5_file,
 )
@@ -116,3 +119,71 @@ class MD5DirTestSuite(unittest.TestCase):
         shutil.rmtree(dir2)
 
         self.assertEqual(first_md5, second_md5)
+
+
+class MD5CachedTestSuite(unittest.TestCase):
+    """Test cases for gem5.resources.md5_utils.md5_cached()"""
+
+    def setUp(self) -> None:
+        self.dir = Path(tempfile.mkdtemp())
+        self.file = self.dir / "resource"
+        with open(self.file, "w") as f:
+            f.write("This is a test string, to be put in a temp file")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    def test_md5CachedMatchesMd5File(self) -> None:
+        # This test ensures the cached md5 is the same as the md5 and that the
+        # sidecar cache file is created.
+
+        self.assertEqual(md5_file(self.file), md5_cached(self.file))
+        self.assertTrue(md5_cache_path(self.file).exists())
+
+    def test_md5CachedHit(self) -> None:
+        # This test ensures a valid cache entry is used rather than rehashing
+        # the file. The cached md5 is tampered with to detect this.
+
+        md5_cached(self.file)
+        cache_path = md5_cache_path(self.file)
+        with open(cache_path) as f:
+            entry = json.load(f)
+        entry["md5"] = "cached"
+        with open(cache_path, "w") as f:
+            json.dump(entry, f)
+
+        self.assertEqual("cached", md5_cached(self.file))
+        self.assertEqual(
+            "b113b29fce251f2023066c3fda2ec9dd",
+            md5_cached(self.file, strict=True),
+        )
+
+    def test_md5CachedInvalidatedOnChange(self) -> None:
+        # This test ensures the cache entry is discarded when the file
+        # changes.
+
+        first_md5 = md5_cached(self.file)
+        with open(self.file, "a") as f:
+            f.write("More data")
+
+        self.assertNotEqual(first_md5, md5_cached(self.file))
+        self.assertEqual(md5_file(self.file), md5_cached(self.file))
+
+    def test_md5CachedDirInvalidatedOnNestedChange(self) -> None:
+        # This test ensures the cache entry of a directory is discarded when a
+        # nested file changes.
+
+        resource_dir = self.dir / "resource_dir"
+        os.mkdir(resource_dir)
+        os.mkdir(resource_dir / "dir2")
+        with open(resource_dir / "dir2" / "file1", "w") as f:
+            f.write("Yet more data")
+
+        first_md5 = md5_cached(resource_dir)
+        self.assertEqual(md5_dir(resource_dir), first_md5)
+
+        with open(resource_dir / "dir2" / "file1", "a") as f:
+            f.write("Even more data")
+
+        self.assertEqual(md5_dir(resource_dir), md5_cached(resource_dir))
+        self.assertNotEqual(first_md5, md5_cached(resource_dir))
@@ -0,0 +1,165 @@
+# Copyright (c) 2024 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import hashlib
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+from urllib.error import HTTPError
+
+from gem5.resources.range_downloader import download_file
+
+
+class _RangeRequestHandler(BaseHTTPRequestHandler):
+    """
+    A minimal stand-in for a resources server. It serves ``server.data`` at
+    every path and supports single byte-range requests unless
+    ``server.accept_ranges`` is ``False``. Range requests starting at an
+    offset in ``server.fail_offsets`` fail with a 500 status code.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        data = self.server.data
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if not match or not self.server.accept_ranges:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            self.server.bytes_served += len(data)
+            return
+
+        start, end = int(match.group(1)), int(match.group(2))
+        if start in self.server.fail_offsets:
+            self.send_error(500)
+            return
+        body = data[start : end + 1]
+        self.send_response(206)
+        self.send_header(
+            "Content-Range",
+            f"bytes {start}-{start + len(body) - 1}/{len(data)}",
+        )
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"test-etag"')
+        self.end_headers()
+        self.wfile.write(body)
+        if start != 0 or end != 0:
+            self.server.bytes_served += len(body)
+
+
+class RangeDownloaderTestSuite(unittest.TestCase):
+    """Test cases for gem5.resources.range_downloader.download_file()"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), _RangeRequestHandler
+        )
+        cls.server_thread = threading.Thread(
+            target=cls.server.serve_forever, daemon=True
+        )
+        cls.server_thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/resource"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        rng = random.Random(0)
+        self.server.data = bytes(rng.getrandbits(8) for _ in range(100000))
+        self.server.accept_ranges = True
+        self.server.fail_offsets = set()
+        self.server.bytes_served = 0
+        self.dir = tempfile.mkdtemp()
+        self.download_to = os.path.join(self.dir, "resource")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    def _check_download(self, md5: str) -> None:
+        with open(self.download_to, "rb") as f:
+            self.assertEqual(self.server.data, f.read())
+        self.assertEqual(hashlib.md5(self.server.data).hexdigest(), md5)
+        self.assertFalse(os.path.exists(f"{self.download_to}.part"))
+        self.assertFalse(os.path.exists(f"{self.download_to}.part.json"))
+
+    def test_parallel_download(self) -> None:
+        md5 = download_file(
+            self.url, self.download_to, workers=4, segment_size=4096
+        )
+        self._check_download(md5)
+        self.assertEqual(len(self.server.data), self.server.bytes_served)
+
+    def test_download_without_range_support(self) -> None:
+        self.server.accept_ranges = False
+        md5 = download_file(
+            self.url, self.download_to, workers=4, segment_size=4096
+        )
+        self._check_download(md5)
+
+    def test_resume_download(self) -> None:
+        self.server.fail_offsets = {40960}
+        with self.assertRaises(HTTPError):
+            download_file(
+                self.url, self.download_to, workers=4, segment_size=4096
+            )
+        self.assertTrue(os.path.exists(f"{self.download_to}.part"))
+        self.assertTrue(os.path.exists(f"{self.download_to}.part.json"))
+
+        # Only the failed segment should be downloaded when resuming.
+        self.server.fail_offsets = set()
+        self.server.bytes_served = 0
+        md5 = download_file(
+            self.url, self.download_to, workers=4, segment_size=4096
+        )
+        self._check_download(md5)
+        self.assertEqual(4096, self.server.bytes_served)
+
+    def test_reporthook(self) -> None:
+        reported = []
+        download_file(
+            self.url,
+            self.download_to,
+            workers=2,
+            segment_size=4096,
+            reporthook=lambda b, bsize, tsize: reported.append((b, tsize)),
+        )
+        self.assertEqual(
+            (len(self.server.data), len(self.server.data)), reported[-1]
+        )
@@ -0,0 +1,118 @@
+# Copyright (c) 2024 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+from gem5.resources.md5_utils import md5_dir
+from gem5.resources.stream_extract import extract_stream
+
+
+class StreamExtractTestSuite(unittest.TestCase):
+    """Test cases for gem5.resources.stream_extract.extract_stream()"""
+
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        self.to_path = os.path.join(self.dir, "resource")
+        self.data = b"Some disk image data\n" * 10000
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    def _create_tar(self, compress: bool) -> bytes:
+        source = os.path.join(self.dir, "source")
+        os.makedirs(os.path.join(source, "dir2"))
+        with open(os.path.join(source, "file1"), "wb") as f:
+            f.write(self.data)
+        with open(os.path.join(source, "dir2", "file2"), "wb") as f:
+            f.write(b"Yet more data")
+
+        buffer = io.BytesIO()
+        with tarfile.open(
+            fileobj=buffer, mode="w:gz" if compress else "w"
+        ) as tar:
+            for name in ("file1", "dir2"):
+                tar.add(os.path.join(source, name), arcname=name)
+        self.source_md5 = md5_dir(Path(source))
+        shutil.rmtree(source)
+        return buffer.getvalue()
+
+    def test_gunzip(self) -> None:
+        md5 = extract_stream(
+            io.BytesIO(gzip.compress(self.data)),
+            self.to_path,
+            gunzip=True,
+            untar=False,
+        )
+        with open(self.to_path, "rb") as f:
+            self.assertEqual(self.data, f.read())
+        self.assertEqual(hashlib.md5(self.data).hexdigest(), md5)
+        self.assertFalse(os.path.exists(f"{self.to_path}.part"))
+
+    def test_untar(self) -> None:
+        md5 = extract_stream(
+            io.BytesIO(self._create_tar(compress=False)),
+            self.to_path,
+            gunzip=False,
+            untar=True,
+        )
+        self.assertIsNone(md5)
+        self.assertEqual(self.source_md5, md5_dir(Path(self.to_path)))
+
+    def test_gunzip_untar(self) -> None:
+        reported = []
+        archive = self._create_tar(compress=True)
+        extract_stream(
+            io.BytesIO(archive),
+            self.to_path,
+            gunzip=True,
+            untar=True,
+            reporthook=lambda b, bsize, tsize: reported.append(b),
+            total=len(archive),
+        )
+        self.assertEqual(self.source_md5, md5_dir(Path(self.to_path)))
+        self.assertEqual(len(archive), reported[-1])
+
+    def test_path_traversal(self) -> None:
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            info = tarfile.TarInfo("../escaped")
+            info.size = len(self.data)
+            tar.addfile(info, io.BytesIO(self.data))
+        buffer.seek(0)
+
+        with self.assertRaises(Exception):
+            extract_stream(buffer, self.to_path, gunzip=False, untar=True)
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "escaped")))
+        self.assertFalse(os.path.exists(self.to_path))
+        self.assertFalse(os.path.exists(f"{self.to_path}.part"))
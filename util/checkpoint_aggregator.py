@@ -30,8 +30,16 @@ import gzip
 import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 
+_PAGE_SIZE = 4096
+# The size of the reads from the input memory images and of the blocks that
+# are compressed in parallel. Each block is written as a separate gzip
+# member, which gzread() (and so gem5) reads back as a single stream.
+_BLOCK_SIZE = 16 * 1024 * 1024
+_ZERO_PAGE = bytes(_PAGE_SIZE)
+
 
 class myCP(ConfigParser):
     def __init__(self):
@@ -41,19 +49,133 @@ class myCP(ConfigParser):
         return optionstr
 
 
-def aggregate(output_dir, cpts, no_compress, memory_size):
+class SparseWriter:
+    """
+    Writes a memory image to an uncompressed file, leaving holes in place of
+    zero pages so that they take no space on disk.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self.size = 0
+
+    def write(self, data):
+        view = memoryview(data)
+        start = None
+        for offset in range(0, len(view), _PAGE_SIZE):
+            page = view[offset : offset + _PAGE_SIZE]
+            if page == _ZERO_PAGE[: len(page)]:
+                if start is not None:
+                    self._write_run(view[start:offset], start)
+                    start = None
+            elif start is None:
+                start = offset
+        if start is not None:
+            self._write_run(view[start:], start)
+        self.size += len(view)
+
+    def _write_run(self, run, offset):
+        self._file.seek(self.size + offset)
+        self._file.write(run)
+
+    def pad(self, size):
+        self.size += size
+
+    def close(self):
+        # Extending the file with truncate() leaves any trailing zero pages
+        # as a hole rather than writing them out.
+        self._file.truncate(self.size)
+        self._file.close()
+
+
+class ParallelGzipWriter:
+    """
+    Writes a memory image as a series of independently compressed gzip
+    members. The blocks are compressed by a pool of threads (zlib releases
+    the GIL while compressing) and written out in order.
+    """
+
+    def __init__(self, path, jobs=None):
+        self._file = open(path, "wb")
+        self._jobs = jobs or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(self._jobs)
+        self._pending = []
+        self._buffer = bytearray()
+        self._zero_block = None
+        self.size = 0
+
+    def _drain(self, limit):
+        while len(self._pending) > limit:
+            self._file.write(self._pending.pop(0).result())
+
+    def _submit(self, block):
+        self._pending.append(self._pool.submit(gzip.compress, block))
+        # Bound the number of blocks held in memory.
+        self._drain(2 * self._jobs)
+
+    def write(self, data):
+        self.size += len(data)
+        self._buffer += data
+        if len(self._buffer) >= _BLOCK_SIZE:
+            view = memoryview(self._buffer)
+            full = len(view) - len(view) % _BLOCK_SIZE
+            for offset in range(0, full, _BLOCK_SIZE):
+                self._submit(bytes(view[offset : offset + _BLOCK_SIZE]))
+            view.release()
+            del self._buffer[:full]
+
+    def pad(self, size):
+        # Top up the partial block, then reuse a single compressed block of
+        # zeroes for the rest of the padding.
+        fill = min(size, -len(self._buffer) % _BLOCK_SIZE)
+        self.write(bytes(fill))
+        size -= fill
+        if size >= _BLOCK_SIZE:
+            if self._zero_block is None:
+                self._zero_block = gzip.compress(bytes(_BLOCK_SIZE))
+            self._drain(0)
+            for _ in range(size // _BLOCK_SIZE):
+                self._file.write(self._zero_block)
+            self.size += size - size % _BLOCK_SIZE
+        self.write(bytes(size % _BLOCK_SIZE))
+
+    def close(self):
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        self._drain(0)
+        self._pool.shutdown()
+        self._file.close()
+
+
+def copy_pages(src_path, dest, pages):
+    """
+    Copies the first ``pages`` pages of the gzipped memory image at
+    ``src_path`` to ``dest`` using large buffered reads.
+    """
+    remaining = pages * _PAGE_SIZE
+    with gzip.open(src_path, "rb") as src:
+        while remaining > 0:
+            data = src.read(min(remaining, _BLOCK_SIZE))
+            if not data:
+                break
+            dest.write(data)
+            remaining -= len(data)
+
+
+def aggregate(output_dir, cpts, no_compress, memory_size, jobs=None):
     merged_config = None
     page_ptr = 0
 
     output_path = output_dir
-    if not os.path.isdir(output_path):
-        os.system("mkdir -p " + output_path)
-
-    agg_mem_file = open(output_path + "/system.physmem.store0.pmem", "wb+")
-    agg_config_file = open(output_path + "/m5.cpt", "wb+")
+    os.makedirs(output_path, exist_ok=True)
 
-    if not no_compress:
-        merged_mem = gzip.GzipFile(fileobj=agg_mem_file, mode="wb")
+    mem_path = output_path + "/system.physmem.store0.pmem"
+    if no_compress:
+        merged_mem = SparseWriter(mem_path)
+    else:
+        merged_mem = ParallelGzipWriter(mem_path, jobs)
+    agg_config_file = open(output_path + "/m5.cpt", "w")
 
     max_curtick = 0
     num_digits = len(str(len(cpts) - 1))
@@ -62,7 +184,8 @@ def aggregate(output_dir, cpts, no_compress, memory_size):
         print(arg)
         merged_config = myCP()
         config = myCP()
-        config.readfp(open(cpts[i] + "/m5.cpt"))
+        with open(cpts[i] + "/m5.cpt") as f:
+            config.read_file(f)
 
         for sec in config.sections():
             if re.compile("cpu").search(sec):
@@ -73,13 +196,15 @@ def aggregate(output_dir, cpts, no_compress, memory_size):
                 for item in items:
                     if item[0] == "paddr":
                         merged_config.set(
-                            newsec, item[0], int(item[1]) + (page_ptr << 12)
+                            newsec,
+                            item[0],
+                            str(int(item[1]) + (page_ptr << 12)),
                         )
                         continue
                     merged_config.set(newsec, item[0], item[1])
 
                 if re.compile("workload.FdMap256$").search(sec):
-                    merged_config.set(newsec, "M5_pid", i)
+                    merged_config.set(newsec, "M5_pid", str(i))
 
             elif sec == "system":
                 pass
@@ -101,34 +226,17 @@ def aggregate(output_dir, cpts, no_compress, memory_size):
         page_ptr = page_ptr + pages
         print("pages to be read: ", pages)
 
-        f = open(cpts[i] + "/system.physmem.store0.pmem", "rb")
-        gf = gzip.GzipFile(fileobj=f, mode="rb")
-
-        x = 0
-        while x < pages:
-            bytesRead = gf.read(1 << 12)
-            if not no_compress:
-                merged_mem.write(bytesRead)
-            else:
-                agg_mem_file.write(bytesRead)
-            x += 1
-
-        gf.close()
-        f.close()
+        copy_pages(cpts[i] + "/system.physmem.store0.pmem", merged_mem, pages)
 
     merged_config.add_section("system")
-    merged_config.set("system", "pagePtr", page_ptr)
-    merged_config.set("system", "nextPID", len(cpts))
-
-    file_size = page_ptr * 4 * 1024
-    dummy_data = "".zfill(4096)
-    while file_size < memory_size:
-        if not no_compress:
-            merged_mem.write(dummy_data)
-        else:
-            agg_mem_file.write(dummy_data)
-        file_size += 4 * 1024
-        page_ptr += 1
+    merged_config.set("system", "pagePtr", str(page_ptr))
+    merged_config.set("system", "nextPID", str(len(cpts)))
+
+    file_size = page_ptr * _PAGE_SIZE
+    if memory_size is not None and file_size < memory_size:
+        pad_pages = -(-(memory_size - file_size) // _PAGE_SIZE)
+        merged_mem.pad(pad_pages * _PAGE_SIZE)
+        page_ptr += pad_pages
 
     print("WARNING: ")
     print(
@@ -136,19 +244,16 @@ def aggregate(output_dir, cpts, no_compress, memory_size):
     )
     print(page_ptr, "x 4K of memory")
     merged_config.set(
-        "system.physmem.store0", "range_size", page_ptr * 4 * 1024
+        "system.physmem.store0", "range_size", str(page_ptr * _PAGE_SIZE)
     )
 
     merged_config.add_section("Globals")
-    merged_config.set("Globals", "curTick", max_curtick)
+    merged_config.set("Globals", "curTick", str(max_curtick))
 
     merged_config.write(agg_config_file)
 
-    if not no_compress:
-        merged_mem.close()
-        agg_mem_file.close()
-    else:
-        agg_mem_file.close()
+    merged_mem.close()
+    agg_config_file.close()
 
 
 if __name__ == "__main__":
@@ -161,9 +266,22 @@ if __name__ == "__main__":
     parser.add_argument(
         "-o", "--output-dir", action="store", help="Output directory"
     )
-    parser.add_argument("-c", "--no-compress", action="store_true")
+    parser.add_argument(
+        "-c",
+        "--no-compress",
+        action="store_true",
+        help="Write the memory image uncompressed, as a sparse file",
+    )
     parser.add_argument("--cpts", nargs="+")
     parser.add_argument("--memory-size", action="store", type=int)
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of threads compressing the memory image "
+        "(default: the number of CPUs)",
+    )
 
     # Assume x86 ISA.  Any other ISAs would need extra stuff in this script
     # to appropriately parse their page tables and understand page sizes.
@@ -180,4 +298,5 @@ if __name__ == "__main__":
         options.cpts,
         options.no_compress,
         options.memory_size,
+        options.jobs,
     )
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Copyright (c) 2026 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Measures the time spent generating code with code_formatter by the SLICC
+protocols, which are its heaviest users in a gem5 build. For each protocol
+the AST is processed and the C++ code is written to a scratch directory,
+which is where the code_formatter calls are made; parsing is not timed.
+
+Example:
+
+    util/code_formatter_benchmark.py --repeat 5 MESI_Two_Level chi/CHI
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+base = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(1, os.path.join(base, "src/mem"))
+sys.path.insert(1, os.path.join(base, "build_tools"))
+sys.path.insert(1, os.path.join(base, "ext/ply"))
+
+from slicc.parser import SLICC
+
+protocol_dir = os.path.join(base, "src/mem/ruby/protocol")
+
+
+class BenchmarkSLICC(SLICC):
+    """SLICC which does not write the PLY parser tables into the tree"""
+
+    def setupParserFactory(self, **kwargs):
+        super().setupParserFactory(debug=False, write_tables=False, **kwargs)
+
+
+def all_protocols():
+    paths = glob.glob(os.path.join(protocol_dir, "*.slicc"))
+    paths += glob.glob(os.path.join(protocol_dir, "*", "*.slicc"))
+    return sorted(
+        os.path.relpath(path, protocol_dir)[: -len(".slicc")] for path in paths
+    )
+
+
+def generate(protocol):
+    """Parse a protocol then time the generation of its code"""
+    slicc = BenchmarkSLICC(
+        os.path.join(protocol_dir, f"{protocol}.slicc"),
+        protocol_dir,
+        verbose=False,
+    )
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        slicc.process()
+        slicc.writeCodeFiles(output_dir, [])
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the code generation of the SLICC protocols."
+    )
+    parser.add_argument(
+        "protocols",
+        nargs="*",
+        help="Protocols to generate, relative to src/mem/ruby/protocol "
+        "(default: all of them)",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of times each protocol is generated, the fastest of "
+        "which is reported (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    total = 0.0
+    for protocol in args.protocols or all_protocols():
+        best = min(generate(protocol) for _ in range(args.repeat))
+        total += best
+        print(f"{protocol:<32} {best:8.3f}s")
+    print(f"{'total':<32} {total:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -71,9 +71,12 @@
 
 import configparser
 import glob
+import multiprocessing
 import os
 import os.path as osp
+import re
 import sys
+import traceback
 import types
 
 verbose_print = False
@@ -92,6 +95,7 @@ class Upgrader:
     untag_set = set()  # tags to remove by downgrading
     by_tag = {}
     legacy = {}
+    plans = {}  # upgrade plans, keyed by the tag set they start from
 
     def __init__(self, filename):
         self.filename = filename
@@ -161,6 +165,35 @@ class Upgrader:
     def get(tag):
         return Upgrader.by_tag[tag]
 
+    @staticmethod
+    def plan(tags):
+        """
+        Returns the upgrades and downgrades to apply to a checkpoint with the
+        given tags, in an order respecting their dependences, and the set of
+        tags whose dependences could not be resolved. Plans are cached, so
+        checkpoints sharing a tag set only resolve the dependences once.
+        """
+        tags = frozenset(tags)
+        if tags not in Upgrader.plans:
+            # Apply migrations for tags not in checkpoint and tags present
+            # for which downgraders are present, respecting dependences
+            to_apply = (Upgrader.tag_set - tags) | (Upgrader.untag_set & tags)
+            plan = []
+            current = set(tags)
+            while to_apply:
+                ready = {t for t in to_apply if Upgrader.get(t).ready(current)}
+                if not ready:
+                    break
+                for tag in sorted(ready):
+                    plan.append(tag)
+                    if tag in Upgrader.tag_set:
+                        current.add(tag)
+                    else:
+                        current.remove(tag)
+                to_apply -= ready
+            Upgrader.plans[tags] = (tuple(plan), frozenset(to_apply))
+        return Upgrader.plans[tags]
+
     @staticmethod
     def load_all():
         util_dir = osp.dirname(osp.abspath(__file__))
@@ -192,6 +225,121 @@ class Upgrader:
                     sys.exit(1)
 
 
+def warn_unknown_tags(tags):
+    # If the current checkpoint has a tag we don't know about, we have
+    # a divergence that (in general) must be addressed by (e.g.) merging
+    # simulator support for its changes.
+    unknown_tags = tags - (Upgrader.tag_set | Upgrader.untag_set)
+    if unknown_tags:
+        print(
+            "warning: upgrade script does not recognize the following "
+            "tags in this checkpoint:",
+            " ".join(unknown_tags),
+        )
+
+
+def _find_option(data, section, option):
+    # Finds the value of an option in a section of a checkpoint, without
+    # parsing the rest of the file.
+    header = b"[" + section + b"]"
+    start = 0 if data.startswith(header) else data.find(b"\n" + header)
+    if start < 0:
+        return None
+    end = data.find(b"\n[", start + 1)
+    body = data[start : end if end >= 0 else len(data)]
+    match = re.search(
+        rb"^" + re.escape(option) + rb"[ \t]*[=:][ \t]*(.*?)[ \t\r]*$",
+        body,
+        re.MULTILINE,
+    )
+    return match.group(1).decode() if match else None
+
+
+def read_version_tags(path):
+    """
+    Returns the version tags of the checkpoint at ``path`` with a scan for
+    the sections holding them, rather than parsing the whole checkpoint.
+    None is returned for checkpoints with a legacy version number or no
+    version information, which have to go through process_file().
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if _find_option(data, b"root", b"cpt_ver") is not None:
+        return None
+    for section in (b"Globals", b"root.globals"):
+        tags = _find_option(data, section, b"version_tags")
+        if tags is not None:
+            return set(tags.split())
+    return None
+
+
+def is_current(path):
+    """
+    Returns True if the checkpoint at ``path`` has no upgrades or
+    downgrades left to apply.
+    """
+    tags = read_version_tags(path)
+    if tags is None:
+        return False
+    warn_unknown_tags(tags)
+    plan, unresolved = Upgrader.plan(tags)
+    return not plan and not unresolved
+
+
+def _init_worker(verbose):
+    global verbose_print
+    verbose_print = verbose
+    # Workers which are not forked from the parent have to load the
+    # upgraders themselves.
+    if not Upgrader.by_tag:
+        Upgrader.load_all()
+
+
+def _process_batch_file(path, backup):
+    # A checkpoint which cannot be upgraded is reported rather than
+    # stopping the rest of the batch.
+    try:
+        process_file(path, backup=backup)
+    except SystemExit:
+        return path, False
+    except Exception:
+        traceback.print_exc()
+        return path, False
+    return path, True
+
+
+def process_tree(path, jobs=None, **kwargs):
+    """
+    Upgrades every checkpoint (m5.cpt) below the directory ``path`` using a
+    pool of ``jobs`` processes. Checkpoints which are already current are
+    skipped without being parsed or backed up.
+
+    :returns: The paths of the checkpoints which could not be upgraded.
+    """
+    stale = []
+    for root, dirs, files in os.walk(path):
+        if "m5.cpt" not in files:
+            continue
+        cpt_path = osp.join(root, "m5.cpt")
+        if is_current(cpt_path):
+            verboseprint(f"Skipping current checkpoint {cpt_path}")
+        else:
+            stale.append(cpt_path)
+
+    failed = []
+    if not stale:
+        return failed
+    with multiprocessing.Pool(
+        jobs, initializer=_init_worker, initargs=(verbose_print,)
+    ) as pool:
+        args = [(p, kwargs.get("backup", True)) for p in stale]
+        for cpt_path, ok in pool.starmap(_process_batch_file, args):
+            if not ok:
+                failed.append(cpt_path)
+    return failed
+
+
 def process_file(path, **kwargs):
     if not osp.isfile(path):
         import errno
@@ -241,32 +389,17 @@ def process_file(path, **kwargs):
         exit(1)
 
     verboseprint("has tags", " ".join(tags))
-    # If the current checkpoint has a tag we don't know about, we have
-    # a divergence that (in general) must be addressed by (e.g.) merging
-    # simulator support for its changes.
-    unknown_tags = tags - (Upgrader.tag_set | Upgrader.untag_set)
-    if unknown_tags:
-        print(
-            "warning: upgrade script does not recognize the following "
-            "tags in this checkpoint:",
-            " ".join(unknown_tags),
-        )
+    warn_unknown_tags(tags)
 
-    # Apply migrations for tags not in checkpoint and tags present for which
-    # downgraders are present, respecting dependences
-    to_apply = (Upgrader.tag_set - tags) | (Upgrader.untag_set & tags)
-    while to_apply:
-        ready = {t for t in to_apply if Upgrader.get(t).ready(tags)}
-        if not ready:
-            print("could not apply these upgrades:", " ".join(to_apply))
-            print("update dependences impossible to resolve; aborting")
-            exit(1)
-
-        for tag in ready:
-            Upgrader.get(tag).update(cpt, tags)
-            change = True
+    plan, unresolved = Upgrader.plan(tags)
+    if unresolved:
+        print("could not apply these upgrades:", " ".join(unresolved))
+        print("update dependences impossible to resolve; aborting")
+        exit(1)
 
-        to_apply -= ready
+    for tag in plan:
+        Upgrader.get(tag).update(cpt, tags)
+        change = True
 
     if not change:
         verboseprint("...nothing to do")
@@ -307,6 +440,14 @@ if __name__ == "__main__":
         action="store_true",
         help="Print out debugging information as",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of processes upgrading checkpoints when recursing "
+        "(default: the number of CPUs)",
+    )
     parser.add_argument(
         "--get-cc-file",
         action="store_true",
@@ -351,13 +492,10 @@ if __name__ == "__main__":
     elif osp.isdir(path):
         cpt_file = osp.join(path, "m5.cpt")
         if args.recurse:
-            # Visit very file and see if it matches
-            for root, dirs, files in os.walk(path):
-                for name in files:
-                    if name == "m5.cpt":
-                        process_file(osp.join(root, name), **vars(args))
-                for dir in dirs:
-                    pass
+            failed = process_tree(path, args.jobs, backup=args.backup)
+            if failed:
+                print("Error: could not upgrade:", " ".join(failed))
+                sys.exit(1)
         # Maybe someone passed a cpt.XXXXXXX directory and not m5.cpt
         elif osp.isfile(cpt_file):
             process_file(cpt_file, **vars(args))
@@ -122,7 +122,7 @@ def main():
         exit(-1)
 
     # Open the file on read mode
-    proto_in = protolib.openFileRd(sys.argv[1])
+    proto_in = protolib.TraceReader(sys.argv[1])
 
     try:
         ascii_out = open(sys.argv[2], "w")
@@ -158,10 +158,9 @@ def main():
     num_packets = 0
     num_regdeps = 0
     num_robdeps = 0
-    packet = inst_dep_record_pb2.InstDepRecord()
 
     # Decode the packet messages until we hit the end of the file
-    while protolib.decodeMessage(proto_in, packet):
+    for packet in proto_in.messages(inst_dep_record_pb2.InstDepRecord):
         num_packets += 1
 
         # Write to file the seq num
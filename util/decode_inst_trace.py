@@ -82,7 +82,7 @@ def main():
         exit(-1)
 
     # Open the file in read mode
-    proto_in = protolib.openFileRd(sys.argv[1])
+    proto_in = protolib.TraceReader(sys.argv[1])
 
     try:
         ascii_out = open(sys.argv[2], "w")
@@ -114,7 +114,6 @@ def main():
     print("Parsing instructions")
 
     num_insts = 0
-    inst = inst_pb2.Inst()
 
     # Decode the inst messages until we hit the end of the file
     optional_fields = (
@@ -125,7 +124,7 @@ def main():
         "size",
         "mem_flags",
     )
-    while protolib.decodeMessage(proto_in, inst):
+    for inst in proto_in.messages(inst_pb2.Inst):
         # If we have a tick use it, otherwise count instructions
         if inst.HasField("tick"):
             tick = inst.tick
@@ -36,11 +36,18 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 # This script is used to dump protobuf packet traces to ASCII
-# format.
+# format. If the output file name ends in .npy, the packets are instead
+# saved as a NumPy structured array with the fields cmd, addr, size, tick
+# and pc (0 if not recorded), which requires NumPy.
+#
+# If the trace has a block index (see index_trace.py), only the blocks
+# overlapping the requested tick range are decoded, and the blocks are
+# spread over a pool of processes.
 
+import argparse
+import functools
 import os
 import subprocess
-import sys
 
 import protolib
 
@@ -50,25 +57,102 @@ subprocess.check_call(["make", "--quiet", "-C", util_dir, "packet_pb2.py"])
 import packet_pb2
 
 
+def _in_range(packet, start_tick, end_tick):
+    return (start_tick is None or packet.tick >= start_tick) and (
+        end_tick is None or packet.tick <= end_tick
+    )
+
+
+def _format_packets(start_tick, end_tick, packets):
+    """
+    Format packets as ASCII. Return the text and the number of packets.
+    """
+    lines = []
+    for packet in packets:
+        if not _in_range(packet, start_tick, end_tick):
+            continue
+        # ReadReq is 1 and WriteReq is 4 in src/mem/packet.hh Command enum
+        cmd = "r" if packet.cmd == 1 else ("w" if packet.cmd == 4 else "u")
+        line = f"{packet.pkt_id}," if packet.HasField("pkt_id") else ""
+        if packet.HasField("flags"):
+            line += f"{cmd},{packet.addr},{packet.size},{packet.flags},{packet.tick}"
+        else:
+            line += f"{cmd},{packet.addr},{packet.size},{packet.tick}"
+        if packet.HasField("pc"):
+            line += f",{packet.pc}"
+        lines.append(line + "\n")
+    return "".join(lines), len(lines)
+
+
+def _format_block(start_tick, end_tick, reader):
+    return _format_packets(
+        start_tick, end_tick, reader.messages(packet_pb2.Packet)
+    )
+
+
+def _concatenate_packets(arrays):
+    """
+    Concatenate structured arrays of packets, which may be an empty list.
+    """
+    import numpy
+
+    if arrays:
+        return numpy.concatenate(arrays)
+    return numpy.empty(0, [(f, numpy.uint64) for f in protolib.PACKET_FIELDS])
+
+
+def _packet_array(start_tick, end_tick, reader):
+    """
+    Return the packets read by ``reader`` as a NumPy structured array.
+    """
+    packets = _concatenate_packets(
+        list(reader.arrays(packet_pb2.Packet, protolib.PACKET_FIELDS))
+    )
+    if start_tick is not None:
+        packets = packets[packets["tick"] >= start_tick]
+    if end_tick is not None:
+        packets = packets[packets["tick"] <= end_tick]
+    return packets
+
+
 def main():
-    if len(sys.argv) != 3:
-        print("Usage: ", sys.argv[0], " <protobuf input> <ASCII output>")
-        exit(-1)
+    parser = argparse.ArgumentParser(
+        description="Dump a protobuf packet trace to ASCII."
+    )
+    parser.add_argument("input", help="protobuf input")
+    parser.add_argument("output", help="ASCII output (or .npy array)")
+    parser.add_argument(
+        "--start-tick", type=int, help="skip packets before this tick"
+    )
+    parser.add_argument(
+        "--end-tick", type=int, help="skip packets after this tick"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of processes decoding an indexed trace "
+        "(default: one per CPU)",
+    )
+    args = parser.parse_args()
 
     # Open the file in read mode
-    proto_in = protolib.openFileRd(sys.argv[1])
+    proto_in = protolib.TraceReader(args.input)
 
-    try:
-        ascii_out = open(sys.argv[2], "w")
-    except OSError:
-        print("Failed to open ", sys.argv[2], " for writing")
-        exit(-1)
+    to_numpy = args.output.endswith(".npy")
+    if not to_numpy:
+        try:
+            ascii_out = open(args.output, "w")
+        except OSError:
+            print("Failed to open ", args.output, " for writing")
+            exit(-1)
 
     # Read the magic number in 4-byte Little Endian
     magic_number = proto_in.read(4).decode()
 
     if magic_number != "gem5":
-        print("Unrecognized file", sys.argv[1])
+        print("Unrecognized file", args.input)
         exit(-1)
 
     print("Parsing packet header")
@@ -85,26 +169,40 @@ def main():
 
     print("Parsing packets")
 
-    num_packets = 0
-    packet = packet_pb2.Packet()
+    ticks = (args.start_tick, args.end_tick)
+    index = protolib.TraceIndex.load(args.input)
+    if index is not None:
+        decode = functools.partial(
+            _packet_array if to_numpy else _format_block, *ticks
+        )
+        blocks = index.select(*ticks)
+        print(f"Decoding {len(blocks)} of {len(index.blocks)} blocks")
+        results = protolib.map_blocks(
+            args.input, index, decode, blocks, args.jobs
+        )
+    elif to_numpy:
+        results = [_packet_array(*ticks, proto_in)]
+    else:
+        # Decode the packet messages until we hit the end of the file
+        results = (
+            _format_packets(*ticks, batch)
+            for batch in proto_in.batches(packet_pb2.Packet)
+        )
+
+    if to_numpy:
+        import numpy
+
+        # No blocks are selected if no packet is in the tick range.
+        packets = _concatenate_packets(list(results))
+        numpy.save(args.output, packets)
+        print("Parsed packets:", len(packets))
+        proto_in.close()
+        return
 
-    # Decode the packet messages until we hit the end of the file
-    while protolib.decodeMessage(proto_in, packet):
-        num_packets += 1
-        # ReadReq is 1 and WriteReq is 4 in src/mem/packet.hh Command enum
-        cmd = "r" if packet.cmd == 1 else ("w" if packet.cmd == 4 else "u")
-        if packet.HasField("pkt_id"):
-            ascii_out.write(f"{packet.pkt_id},")
-        if packet.HasField("flags"):
-            ascii_out.write(
-                f"{cmd},{packet.addr},{packet.size},{packet.flags},{packet.tick}"
-            )
-        else:
-            ascii_out.write(f"{cmd},{packet.addr},{packet.size},{packet.tick}")
-        if packet.HasField("pc"):
-            ascii_out.write(f",{packet.pc}\n")
-        else:
-            ascii_out.write("\n")
+    num_packets = 0
+    for text, count in results:
+        ascii_out.write(text)
+        num_packets += count
 
     print("Parsed packets:", num_packets)
 
@@ -50,6 +50,10 @@
 #
 # This script can of course also be used as a template to convert
 # other trace formats into the gem5 protobuf format
+#
+# The trace is gzipped if the output file name ends in .gz. A block index
+# is written next to the trace (<protobuf output>.idx) so that decoders
+# can seek to a tick range and decode blocks in parallel.
 
 import sys
 
@@ -98,22 +102,21 @@ def main():
         print("Failed to open ", sys.argv[1], " for reading")
         exit(-1)
 
-    try:
-        proto_out = open(sys.argv[2], "wb")
-    except OSError:
-        print("Failed to open ", sys.argv[2], " for writing")
-        exit(-1)
-
-    # Write the magic number in 4-byte Little Endian, similar to what
-    # is done in src/proto/protoio.cc
-    proto_out.write("gem5")
-
     # Add the packet header
     header = packet_pb2.PacketHeader()
     header.obj_id = "Converted ASCII trace " + sys.argv[1]
     # Assume the default tick rate
     header.tick_freq = 1000000000000
-    protolib.encodeMessage(proto_out, header)
+
+    # The writer starts with the magic number in 4-byte Little Endian,
+    # similar to what is done in src/proto/protoio.cc
+    try:
+        proto_out = protolib.TraceWriter(
+            sys.argv[2], header, packet_pb2.Packet
+        )
+    except OSError:
+        print("Failed to open ", sys.argv[2], " for writing")
+        exit(-1)
 
     # For each line in the ASCII trace, create a packet message and
     # write it to the encoded output
@@ -125,7 +128,7 @@ def main():
         packet.cmd = 1 if cmd == "r" else 4
         packet.addr = int(addr)
         packet.size = int(size)
-        protolib.encodeMessage(proto_out, packet)
+        proto_out.write(packet)
 
     # We're done
     ascii_in.close()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2024 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# This script indexes an existing protobuf trace so that the decoders can
+# seek to a tick range and decode blocks of the trace in parallel. The
+# records are split into blocks of a fixed number of records; a gzipped
+# trace is recompressed with one gzip member per block, so every block
+# starts at a sync point of the compressed stream. The result is still an
+# ordinary (gzipped) trace. The index is written to <trace>.idx.
+#
+# Traces written by encode_packet_trace.py are indexed already.
+
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+
+import protolib
+
+# The protobuf module and message of the records of each trace type
+_TRACE_TYPES = {
+    "packet": ("packet_pb2", "Packet"),
+    "inst": ("inst_pb2", "Inst"),
+    "inst_dep": ("inst_dep_record_pb2", "InstDepRecord"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Create a block index for a protobuf trace."
+    )
+    parser.add_argument("trace", help="protobuf trace to index")
+    parser.add_argument(
+        "--type",
+        choices=sorted(_TRACE_TYPES),
+        default="packet",
+        help="the type of the trace records (default: packet)",
+    )
+    parser.add_argument(
+        "--block-records",
+        type=int,
+        default=65536,
+        help="the number of records in each block (default: 65536)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="write the indexed trace here rather than rewriting the "
+        "trace in place",
+    )
+    args = parser.parse_args()
+
+    util_dir = os.path.dirname(os.path.realpath(__file__))
+    proto_module, message_name = _TRACE_TYPES[args.type]
+    if args.type == "packet":
+        # Make sure the proto definitions are up to date.
+        subprocess.check_call(
+            ["make", "--quiet", "-C", util_dir, "packet_pb2.py"]
+        )
+    try:
+        message_class = getattr(
+            importlib.import_module(proto_module), message_name
+        )
+    except ImportError:
+        print(
+            f"Failed to import {proto_module}, generate it with protoc "
+            "and make sure the Python protobuf module is installed"
+        )
+        sys.exit(1)
+
+    index = protolib.index_trace(
+        args.trace, message_class, args.output, args.block_records
+    )
+    print(
+        f"Indexed {index.records} records in {len(index.blocks)} blocks: "
+        f"{protolib.TraceIndex.path(args.output or args.trace)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
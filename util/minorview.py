@@ -55,6 +55,7 @@ from minorview.view import (
     BlobView,
     BlobWindow,
 )
+from minorview.windowed import WindowedBlobModel
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Minor visualiser")
@@ -87,6 +88,15 @@ if __name__ == "__main__":
         default=None,
         help="time of last event to load from file",
     )
+    parser.add_argument(
+        "--window-size",
+        metavar="times",
+        type=int,
+        default=None,
+        help="index the event file and only decode the events in windows "
+        + "of this many event times around the viewed time, for event "
+        + "files too large to load completely",
+    )
     parser.add_argument(
         "--mini-views",
         action="store_true",
@@ -97,7 +107,12 @@ if __name__ == "__main__":
 
     args = parser.parse_args(sys.argv[1:])
 
-    model = BlobModel(unitNamePrefix=args.prefix)
+    if args.window_size is not None:
+        model = WindowedBlobModel(
+            unitNamePrefix=args.prefix, windowSize=args.window_size
+        )
+    else:
+        model = BlobModel(unitNamePrefix=args.prefix)
 
     if args.picture and os.access(args.picture, os.O_RDONLY):
         model.load_picture(args.picture)
@@ -33,6 +33,8 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import bisect
+import itertools
 import os
 import re
 from time import time as wall_time
@@ -47,6 +49,9 @@ from .point import Point
 
 id_parts = "TSPLFE"
 
+# A line of an event file: time, unit, (optional) Minor line type and data
+event_line_re = re.compile(r"^\s*(\d+):\s*([\w\.]+):\s*(Minor\w+:)?\s*(.*)$")
+
 all_ids = set(id_parts)
 no_ids = set()
 
@@ -717,7 +722,7 @@ class BlobModel:
     ):
         """Find an event by binary search on time indices"""
         while lower_index <= upper_index:
-            pivot = (upper_index + lower_index) / 2
+            pivot = (upper_index + lower_index) // 2
             pivotEvent = events[pivot]
             event_equal = pivotEvent.time == time or (
                 pivotEvent.time < time
@@ -755,11 +760,7 @@ class BlobModel:
     def find_time_index(self, time):
         """Find a time index close to the given time (where
         times[return] <= time and times[return+1] > time"""
-        ret = 0
-        lastIndex = len(self.times) - 1
-        while ret < lastIndex and self.times[ret + 1] <= time:
-            ret += 1
-        return ret
+        return max(bisect.bisect_right(self.times, time) - 1, 0)
 
     def add_minor_inst(self, rest):
         """Parse and add a MinorInst line to the model"""
@@ -812,6 +813,57 @@ class BlobModel:
 
     def load_events(self, file, startTime=0, endTime=None):
         """Load an event file and add everything to this model"""
+        self.clear_events()
+
+        if not os.access(file, os.R_OK):
+            print("Can't open file", file)
+            exit(1)
+        else:
+            print("Opening file", file)
+
+        f = open(file)
+
+        start_wall_time = wall_time()
+
+        # Skip leading events
+        still_skipping = True
+        l = f.readline()
+        while l and still_skipping:
+            match = re.match(r"^\s*(\d+):", l)
+            if match is not None:
+                event_time = match.groups()
+                if int(event_time[0]) >= startTime:
+                    still_skipping = False
+                else:
+                    l = f.readline()
+            else:
+                l = f.readline()
+
+        if l:
+            minor_trace_line_count = self.parse_event_lines(
+                itertools.chain([l], f), endTime
+            )
+        else:
+            minor_trace_line_count = 0
+        self.extract_times()
+        f.close()
+
+        end_wall_time = wall_time()
+
+        print(
+            "Total events:",
+            minor_trace_line_count,
+            "unique events:",
+            self.numEvents,
+        )
+        print("Time to parse:", end_wall_time - start_wall_time)
+
+    def parse_event_lines(self, lines, endTime=None, lastTimeLines=None):
+        """Parse lines of an event file, adding the events, instructions
+        and lines in them to this model.  lastTimeLines is the most recent
+        MinorTrace line data for each unit (which is updated), and is used
+        to skip lines which do not change a unit's state.  Returns the
+        number of MinorTrace lines seen"""
 
         def update_comments(comments, time):
             # Add a list of comments to an existing event, if there is one at
@@ -833,58 +885,26 @@ class BlobModel:
                     self.add_unit_event(event)
                 event.comments.append(commentRest)
 
-        self.clear_events()
-
         # A negative time will *always* be different from an event time
         time = -1
-        time_events = {}
-        last_time_lines = {}
+        if lastTimeLines is None:
+            lastTimeLines = {}
         minor_trace_line_count = 0
         comments = []
 
-        default_colour = [[colours.unknownColour]]
         next_progress_print_event_count = 1000
 
-        if not os.access(file, os.R_OK):
-            print("Can't open file", file)
-            exit(1)
-        else:
-            print("Opening file", file)
-
-        f = open(file)
-
-        start_wall_time = wall_time()
-
-        # Skip leading events
-        still_skipping = True
-        l = f.readline()
-        while l and still_skipping:
-            match = re.match(r"^\s*(\d+):", l)
-            if match is not None:
-                event_time = match.groups()
-                if int(event_time[0]) >= startTime:
-                    still_skipping = False
-                else:
-                    l = f.readline()
-            else:
-                l = f.readline()
-
-        match_line_re = re.compile(
-            r"^\s*(\d+):\s*([\w\.]+):\s*(Minor\w+:)?\s*(.*)$"
-        )
+        unit_name_re = re.compile("^" + self.unitNamePrefix + r"\.?(.*)$")
 
         # Parse each line of the events file, accumulating comments to be
         #   attached to MinorTrace events when the time changes
-        reached_end_time = False
-        while not reached_end_time and l:
-            match = match_line_re.match(l)
+        for l in lines:
+            match = event_line_re.match(l)
             if match is not None:
                 event_time, unit, line_type, rest = match.groups()
                 event_time = int(event_time)
 
-                unit = re.sub(
-                    "^" + self.unitNamePrefix + r"\.?(.*)$", "\\1", unit
-                )
+                unit = unit_name_re.sub("\\1", unit)
 
                 # When the time changes, resolve comments
                 if event_time != time:
@@ -903,44 +923,33 @@ class BlobModel:
 
                     # Only insert this event if it's not the same as
                     #   the last event we saw for this unit
-                    if last_time_lines.get(unit, None) != rest:
-                        event = BlobEvent(unit, event_time, {})
-                        pairs = parse.parse_pairs(rest)
-                        event.pairs = pairs
-
-                        # Try to decode the colour data for this event
-                        blobs = self.unitNameToBlobs.get(unit, [])
-                        for blob in blobs:
-                            if blob.visualDecoder is not None:
-                                event.visuals[
-                                    blob.picChar
-                                ] = blob.visualDecoder(pairs)
-
-                        self.add_unit_event(event)
-                        last_time_lines[unit] = rest
+                    if lastTimeLines.get(unit, None) != rest:
+                        self.add_unit_event(
+                            self.decode_minor_trace(unit, event_time, rest)
+                        )
+                        lastTimeLines[unit] = rest
                 elif line_type == "MinorInst:":
                     self.add_minor_inst(rest)
                 elif line_type == "MinorLine:":
                     self.add_minor_line(rest)
 
             if endTime is not None and time > endTime:
-                reached_end_time = True
-
-            l = f.readline()
+                break
 
         update_comments(comments, time)
-        self.extract_times()
-        f.close()
+        return minor_trace_line_count
 
-        end_wall_time = wall_time()
-
-        print(
-            "Total events:",
-            minor_trace_line_count,
-            "unique events:",
-            self.numEvents,
-        )
-        print("Time to parse:", end_wall_time - start_wall_time)
+    def decode_minor_trace(self, unit, time, rest):
+        """Make an event from the data of a MinorTrace line"""
+        pairs = parse.parse_pairs(rest)
+        event = BlobEvent(unit, time, pairs)
+
+        # Try to decode the colour data for this event
+        blobs = self.unitNameToBlobs.get(unit, [])
+        for blob in blobs:
+            if blob.visualDecoder is not None:
+                event.visuals[blob.picChar] = blob.visualDecoder(pairs)
+        return event
 
     def add_blob_picture(self, offset, pic, nameDict):
         """Add a parsed ASCII-art pipeline markup to the model"""
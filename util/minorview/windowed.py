@@ -0,0 +1,327 @@
+# Copyright (c) 2024 The Regents of the University of California
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import bisect
+import collections
+import io
+import os
+import re
+import threading
+from array import array
+from time import time as wall_time
+
+from .model import (
+    BlobEvent,
+    BlobModel,
+    event_line_re,
+)
+
+# Matches the time at the start of any event file line
+time_line_re = re.compile(rb"^\s*(\d+):")
+event_line_bytes_re = re.compile(event_line_re.pattern.encode())
+
+
+class WindowedBlobModel(BlobModel):
+    """A BlobModel which does not keep the whole event file in memory.
+
+    Loading the events only builds an index of the file: the list of event
+    times, the file offset at which each window of windowSize times starts
+    and, for each window, where the state of each unit at the start of the
+    window can be found.  Windows are decoded when they are first looked at
+    and only cachedWindows of them are kept.  The windows either side of
+    the one being viewed are decoded in the background so that stepping
+    through time does not wait for decoding.
+
+    Instructions and lines are found in the cached windows and the window
+    before each of them.  Comments attached to a unit's state from before
+    the start of a window are not shown in that window"""
+
+    def __init__(self, unitNamePrefix="", windowSize=10000, cachedWindows=5):
+        self.windowSize = windowSize
+        self.cachedWindows = cachedWindows
+        self.fileName = None
+        self.lock = threading.Condition()
+        # Incremented when the events are reloaded so that windows decoded
+        #   in the background for an old file are dropped
+        self.generation = 0
+        BlobModel.__init__(self, unitNamePrefix)
+
+    def clear_events(self):
+        """Drop all events, times and windows"""
+        BlobModel.clear_events(self)
+        with self.lock:
+            self.generation += 1
+            self.times = array("q")
+            # For each window: (start time, start offset, unit states)
+            self.windowStarts = []
+            self.windowOffsets = []
+            self.windowUnitStates = []
+            self.endOffset = 0
+            # Decoded windows, least recently used first
+            self.windows = collections.OrderedDict()
+            self.decoding = set()
+
+    def load_events(self, file, startTime=0, endTime=None):
+        """Index an event file"""
+        self.clear_events()
+
+        if not os.access(file, os.R_OK):
+            print("Can't open file", file)
+            exit(1)
+        else:
+            print("Opening file", file)
+
+        start_wall_time = wall_time()
+        self.fileName = file
+
+        units = set(self.unitEvents.keys())
+        unit_name_re = re.compile(
+            ("^" + self.unitNamePrefix + r"\.?(.*)$").encode()
+        )
+
+        # The last unique MinorTrace line of each unit
+        last_time_lines = {}
+        # For each unit, the offset of the line holding its current state
+        #   (None for no state) and the time of its last event
+        unit_states = {}
+        # The unit states and offset at the start of the current time
+        time_unit_states = None
+        time_offset = 0
+
+        time = -1
+        time_has_event = False
+        minor_trace_line_count = 0
+        still_skipping = True
+        offset = 0
+
+        def end_time():
+            # Record the current time if it has any events, and start a new
+            #   window every windowSize times
+            if not time_has_event:
+                return
+            if len(self.times) % self.windowSize == 0:
+                self.windowStarts.append(time)
+                self.windowOffsets.append(time_offset)
+                self.windowUnitStates.append(time_unit_states)
+            self.times.append(time)
+
+        with open(file, "rb") as f:
+            for l in f:
+                line_offset = offset
+                offset += len(l)
+
+                # Skip leading events
+                if still_skipping:
+                    match = time_line_re.match(l)
+                    if match is None or int(match.group(1)) < startTime:
+                        continue
+                    still_skipping = False
+
+                match = event_line_bytes_re.match(l)
+                if match is not None:
+                    event_time, unit, line_type, rest = match.groups()
+                    event_time = int(event_time)
+                    unit = unit_name_re.sub(rb"\1", unit).decode()
+
+                    if event_time != time:
+                        end_time()
+                        time = event_time
+                        time_has_event = False
+                        time_offset = line_offset
+                        # Only keep the unit states if this time may start a
+                        #   new window
+                        if len(self.times) % self.windowSize == 0:
+                            time_unit_states = dict(unit_states)
+
+                    if line_type is None:
+                        # A comment makes an event for its unit at this time
+                        if unit in units:
+                            state = unit_states.get(unit, (None, time))
+                            unit_states[unit] = (state[0], time)
+                            time_has_event = True
+                    elif line_type == b"MinorTrace:":
+                        minor_trace_line_count += 1
+                        if last_time_lines.get(unit, None) != rest:
+                            last_time_lines[unit] = rest
+                            if unit in units:
+                                unit_states[unit] = (line_offset, time)
+                                time_has_event = True
+                                self.numEvents += 1
+
+                if endTime is not None and time > endTime:
+                    break
+            end_time()
+            self.endOffset = offset
+
+        if len(self.times) != 0:
+            self.lastTime = self.times[-1]
+
+        end_wall_time = wall_time()
+
+        print(
+            "Total events:",
+            minor_trace_line_count,
+            "unique events:",
+            self.numEvents,
+            "windows:",
+            len(self.windowStarts),
+        )
+        print("Time to index:", end_wall_time - start_wall_time)
+
+    def decode_window(self, index):
+        """Decode the events of a window into a new BlobModel"""
+        window = BlobModel(self.unitNamePrefix)
+        window.unitNameToBlobs = self.unitNameToBlobs
+        window.unitEvents = dict((unit, []) for unit in self.unitEvents)
+
+        start = self.windowOffsets[index]
+        if index + 1 < len(self.windowOffsets):
+            end = self.windowOffsets[index + 1]
+        else:
+            end = self.endOffset
+
+        last_time_lines = {}
+        with open(self.fileName, "rb") as f:
+            # Recreate the state of each unit at the start of the window
+            for unit, (offset, time) in sorted(
+                self.windowUnitStates[index].items()
+            ):
+                if offset is None:
+                    event = BlobEvent(unit, time, {})
+                else:
+                    f.seek(offset)
+                    match = event_line_re.match(f.readline().decode())
+                    rest = match.group(4)
+                    event = window.decode_minor_trace(unit, time, rest)
+                    last_time_lines[unit] = rest
+                window.add_unit_event(event)
+
+            # Instructions and lines are usually defined shortly before
+            #   they appear in an event, so pick them up from the previous
+            #   window too
+            if index > 0:
+                lookback = self.windowOffsets[index - 1]
+                f.seek(lookback)
+                text = f.read(start - lookback).decode()
+                for l in io.StringIO(text, newline=None):
+                    match = event_line_re.match(l)
+                    if match is None:
+                        continue
+                    line_type, rest = match.group(3, 4)
+                    if line_type == "MinorInst:":
+                        window.add_minor_inst(rest)
+                    elif line_type == "MinorLine:":
+                        window.add_minor_line(rest)
+
+            f.seek(start)
+            lines = io.StringIO(f.read(end - start).decode(), newline=None)
+
+        window.parse_event_lines(lines, lastTimeLines=last_time_lines)
+        return window
+
+    def store_window(self, index, window, generation):
+        """Cache a decoded window, dropping the least recently used window
+        if there are too many.  Call with the lock held"""
+        self.decoding.discard(index)
+        if window is not None and generation == self.generation:
+            self.windows[index] = window
+            while len(self.windows) > self.cachedWindows:
+                self.windows.popitem(last=False)
+        self.lock.notify_all()
+
+    def decode_in_background(self, index, generation):
+        window = None
+        try:
+            window = self.decode_window(index)
+        finally:
+            with self.lock:
+                self.store_window(index, window, generation)
+
+    def prefetch(self, index):
+        """Start decoding the windows either side of the given one.  Call
+        with the lock held"""
+        for neighbour in (index + 1, index - 1):
+            if (
+                0 <= neighbour < len(self.windowOffsets)
+                and neighbour not in self.windows
+                and neighbour not in self.decoding
+            ):
+                self.decoding.add(neighbour)
+                threading.Thread(
+                    target=self.decode_in_background,
+                    args=(neighbour, self.generation),
+                    daemon=True,
+                ).start()
+
+    def get_window(self, index):
+        """Return a decoded window, decoding it if necessary"""
+        with self.lock:
+            while index in self.decoding:
+                self.lock.wait()
+            window = self.windows.get(index, None)
+            if window is not None:
+                self.windows.move_to_end(index)
+                self.prefetch(index)
+                return window
+            self.decoding.add(index)
+            generation = self.generation
+
+        window = None
+        try:
+            window = self.decode_window(index)
+        finally:
+            with self.lock:
+                self.store_window(index, window, generation)
+                self.prefetch(index)
+        return window
+
+    def find_unit_event_by_time(self, unit, time):
+        """Find the last event for the given unit at time <= time"""
+        if len(self.windowStarts) == 0:
+            return None
+        index = max(bisect.bisect_right(self.windowStarts, time) - 1, 0)
+        return self.get_window(index).find_unit_event_by_time(unit, time)
+
+    def cached_windows(self):
+        """The decoded windows, most recently used first"""
+        with self.lock:
+            return list(reversed(self.windows.values()))
+
+    def find_inst(self, id):
+        """Find an instruction in the decoded windows"""
+        for window in self.cached_windows():
+            inst = window.find_inst(id)
+            if inst is not None:
+                return inst
+        return None
+
+    def find_line(self, id):
+        """Find a line in the decoded windows"""
+        for window in self.cached_windows():
+            line = window.find_line(id)
+            if line is not None:
+                return line
+        return None
@@ -38,32 +38,183 @@
 # Pipeline activity viewer for the O3 CPU model.
 
 import argparse
-import copy
+import bisect
+import heapq
+import io
+import json
 import os
 import sys
 
-# Temporary storage for instructions. The queue is filled in out-of-order
-# until it reaches 'max_threshold' number of instructions. It is then
-# sorted out and instructions are printed out until their number drops to
-# 'min_threshold'.
+# Instructions are put into a reorder buffer (a heap ordered by sequence
+# number) as they are read from the trace. When the buffer holds more than
+# _MAX_THRESHOLD instructions, the oldest are printed until _MIN_THRESHOLD
+# remain.
 # It is assumed that the instructions are not out of order for more then
-# 'min_threshold' places - otherwise they will appear out of order.
-insts = {
-    "queue": [],  # Instructions to print.
-    "max_threshold": 2000,  # Instructions are sorted out and printed when
-    # their number reaches this threshold.
-    "min_threshold": 1000,  # Printing stops when this number is reached.
-    "sn_start": 0,  # The first instruction seq. number to be printed.
-    "sn_stop": 0,  # The last instruction seq. number to be printed.
-    "tick_start": 0,  # The first tick to be printed
-    "tick_stop": 0,  # The last tick to be printed
-    "tick_drift": 2000,  # Used to calculate the start and the end of main
-    # loop. We assume here that the instructions are not
-    # out of order for more then 2000 CPU ticks,
-    # otherwise the print may not start/stop
-    # at the time specified by tick_start/stop.
-    "only_committed": 0,  # Set if only committed instructions are printed.
-}
+# _MIN_THRESHOLD places - otherwise they will appear out of order.
+_MAX_THRESHOLD = 2000
+_MIN_THRESHOLD = 1000
+
+# Used to calculate the start and the end of main loop. We assume here that
+# the instructions are not out of order for more then 2000 CPU cycles,
+# otherwise the print may not start/stop at the time specified by
+# tick_start/stop.
+_TICK_DRIFT = 2000
+
+# The number of fetched instructions between the entries of the offset
+# index.
+_INDEX_INTERVAL = 4096
+
+# The pipeline stages, in the order they are printed
+_STAGES = (
+    "fetch",
+    "decode",
+    "rename",
+    "dispatch",
+    "issue",
+    "complete",
+    "retire",
+)
+
+
+class InstRecord:
+    """
+    The pipeline activity of a single instruction. A stage tick of 0 means
+    the instruction did not reach that stage.
+    """
+
+    __slots__ = ("sn", "pc", "upc", "disasm", "store") + _STAGES
+
+    def __init__(self, fetch, pc, upc, sn, disasm):
+        self.fetch = fetch
+        self.pc = pc
+        self.upc = upc
+        self.sn = sn
+        self.disasm = disasm
+        self.decode = self.rename = self.dispatch = self.issue = 0
+        self.complete = self.retire = self.store = 0
+
+
+def index_path(tracefile):
+    return f"{tracefile}.idx"
+
+
+def build_index(tracefile):
+    """
+    Create the offset index of a trace. Every _INDEX_INTERVAL fetched
+    instructions the index records the byte offset of the fetch line,
+    together with the largest tick and the largest sequence number seen
+    before that line. As these maxima never decrease, the position to
+    start reading a tick or sequence number window from can be bisected.
+    """
+    offsets, max_ticks, max_sns = [], [], []
+    max_tick = max_sn = 0
+    fetches = 0
+    offset = 0
+    with open(tracefile, "rb") as trace:
+        for line in trace:
+            if line.startswith(b"O3PipeView:"):
+                fields = line.split(b":")
+                if fields[1] == b"fetch":
+                    if fetches % _INDEX_INTERVAL == 0:
+                        offsets.append(offset)
+                        max_ticks.append(max_tick)
+                        max_sns.append(max_sn)
+                    fetches += 1
+                    max_sn = max(max_sn, int(fields[5]))
+                max_tick = max(max_tick, int(fields[2]))
+            offset += len(line)
+
+    index = {
+        "size": offset,
+        "offsets": offsets,
+        "max_ticks": max_ticks,
+        "max_sns": max_sns,
+    }
+    with open(index_path(tracefile), "w") as f:
+        json.dump(index, f)
+    return index
+
+
+def load_index(tracefile):
+    """
+    Load the offset index of a trace, building it if it does not exist or
+    is out of date.
+    """
+    try:
+        with open(index_path(tracefile)) as f:
+            index = json.load(f)
+        if index["size"] == os.path.getsize(tracefile):
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    return build_index(tracefile)
+
+
+def seek_offset(index, start_tick, start_sn):
+    """
+    Return the offset of the last indexed fetch line before which no line
+    can start the region of interest, i.e., the offset a linear scan for
+    start_tick (or start_sn) can begin at without changing its result.
+    """
+    if start_tick != 0:
+        entry = bisect.bisect_left(index["max_ticks"], start_tick) - 1
+    elif start_sn != 0:
+        entry = bisect.bisect_left(index["max_sns"], start_sn) - 1
+    else:
+        return 0
+    return index["offsets"][entry] if entry >= 0 else 0
+
+
+class ReorderBuffer:
+    """
+    Puts instructions back into sequence number order before they are
+    printed, and drops those outside of the region of interest.
+    """
+
+    def __init__(
+        self, printer, start_tick, stop_tick, start_sn, stop_sn, committed_only
+    ):
+        self._printer = printer
+        self._start_tick = start_tick
+        self._stop_tick = stop_tick
+        self._start_sn = start_sn
+        self._stop_sn = stop_sn
+        self._committed_only = committed_only
+        self._heap = []
+        # Keeps instructions with the same sequence number in the order
+        # they were read in
+        self._count = 0
+
+    def push(self, inst):
+        heapq.heappush(self._heap, (inst.sn, self._count, inst))
+        self._count += 1
+        if len(self._heap) > _MAX_THRESHOLD:
+            self._drain(_MIN_THRESHOLD)
+
+    def flush(self):
+        self._drain(0)
+
+    def _drain(self, lower_threshold):
+        heap = self._heap
+        while len(heap) > lower_threshold:
+            inst = heapq.heappop(heap)[2]
+            # As the instructions are processed out of order the main loop
+            # starts earlier then specified by start_sn/tick and finishes
+            # later then what is defined in stop_sn/tick.
+            # Therefore, here we have to filter out instructions that reside
+            # out of the specified boundaries.
+            if self._start_sn > 0 and inst.sn < self._start_sn:
+                continue
+            if self._stop_sn > 0 and inst.sn > self._stop_sn:
+                continue
+            if self._start_tick > 0 and inst.fetch < self._start_tick:
+                continue
+            if self._stop_tick > 0 and inst.fetch > self._stop_tick:
+                continue
+            # retire is set to zero if it hasn't been completed
+            if self._committed_only and inst.retire == 0:
+                continue
+            self._printer.print_inst(inst)
 
 
 def process_trace(
@@ -80,355 +231,229 @@ def process_trace(
     start_sn,
     stop_sn,
 ):
-    global insts
-
-    insts["sn_start"] = start_sn
-    insts["sn_stop"] = stop_sn
-    insts["tick_start"] = start_tick
-    insts["tick_stop"] = stop_tick
-    insts["tick_drift"] = insts["tick_drift"] * cycle_time
-    insts["only_committed"] = committed_only
-    line = None
+    tick_drift = _TICK_DRIFT * cycle_time
+    printer = InstPrinter(
+        outfile, cycle_time, width, color, timestamps, store_completions
+    )
+    rob = ReorderBuffer(
+        printer, start_tick, stop_tick, start_sn, stop_sn, committed_only
+    )
+    lines = iter(trace)
     fields = None
 
     # Skip lines up to the starting tick
-    if start_tick != 0:
-        while True:
-            line = trace.readline()
-            if not line:
-                return
-            fields = line.split(":")
-            if fields[0] != "O3PipeView":
-                continue
+    for line in lines:
+        fields = line.split(":")
+        if fields[0] != "O3PipeView":
+            continue
+        if start_tick != 0:
             if int(fields[2]) >= start_tick:
                 break
-    elif start_sn != 0:
-        while True:
-            line = trace.readline()
-            if not line:
-                return
-            fields = line.split(":")
-            if fields[0] != "O3PipeView":
-                continue
+        elif start_sn != 0:
             if fields[1] == "fetch" and int(fields[5]) >= start_sn:
                 break
+        else:
+            break
     else:
-        line = trace.readline()
-        if not line:
-            return
-        fields = line.split(":")
+        return
 
     # Skip lines up to next instruction fetch
     while fields[0] != "O3PipeView" or fields[1] != "fetch":
-        line = trace.readline()
-        if not line:
+        line = next(lines, None)
+        if line is None:
             return
         fields = line.split(":")
 
-    # Print header
-    outfile.write(
-        "// f = fetch, d = decode, n = rename, p = dispatch, "
-        "i = issue, c = complete, r = retire"
-    )
-
-    if store_completions:
-        outfile.write(", s = store-complete")
-    outfile.write("\n\n")
-
-    outfile.write(
-        " "
-        + "timeline".center(width)
-        + "   "
-        + "tick".center(15)
-        + "  "
-        + "pc.upc".center(12)
-        + "  "
-        + "disasm".ljust(25)
-        + "  "
-        + "seq_num".center(10)
-    )
-    if timestamps:
-        outfile.write("timestamps".center(25))
-    outfile.write("\n")
+    printer.print_header()
 
     # Region of interest
-    curr_inst = {}
+    curr_inst = None
     while True:
         if fields[0] == "O3PipeView":
-            curr_inst[fields[1]] = int(fields[2])
-            if fields[1] == "fetch":
-                if (
-                    stop_tick > 0
-                    and int(fields[2]) > stop_tick + insts["tick_drift"]
-                ) or (
-                    stop_sn > 0
-                    and int(fields[5]) > (stop_sn + insts["max_threshold"])
+            stage = fields[1]
+            if stage == "fetch":
+                tick = int(fields[2])
+                sn = int(fields[5])
+                if (stop_tick > 0 and tick > stop_tick + tick_drift) or (
+                    stop_sn > 0 and sn > stop_sn + _MAX_THRESHOLD
                 ):
-                    print_insts(
-                        outfile,
-                        cycle_time,
-                        width,
-                        color,
-                        timestamps,
-                        store_completions,
-                        0,
-                    )
-                    return
-                (curr_inst["pc"], curr_inst["upc"]) = fields[3:5]
-                curr_inst["sn"] = int(fields[5])
-                curr_inst["disasm"] = " ".join(fields[6][:-1].split())
-            elif fields[1] == "retire":
-                if curr_inst["retire"] == 0:
-                    curr_inst["disasm"] = "-----" + curr_inst["disasm"]
-                if store_completions:
-                    curr_inst[fields[3]] = int(fields[4])
-                queue_inst(
-                    outfile,
-                    curr_inst,
-                    cycle_time,
-                    width,
-                    color,
-                    timestamps,
-                    store_completions,
+                    break
+                curr_inst = InstRecord(
+                    tick,
+                    fields[3],
+                    fields[4],
+                    sn,
+                    " ".join(fields[6][:-1].split()),
                 )
-
-        line = trace.readline()
-        if not line:
-            print_insts(
-                outfile,
-                cycle_time,
-                width,
-                color,
-                timestamps,
-                store_completions,
-                0,
-            )
-            return
+            elif stage == "retire":
+                curr_inst.retire = int(fields[2])
+                if curr_inst.retire == 0:
+                    curr_inst.disasm = "-----" + curr_inst.disasm
+                if store_completions:
+                    curr_inst.store = int(fields[4])
+                rob.push(curr_inst)
+            elif stage in _STAGES:
+                setattr(curr_inst, stage, int(fields[2]))
+
+        line = next(lines, None)
+        if line is None:
+            break
         fields = line.split(":")
 
+    rob.flush()
 
-# Puts new instruction into the print queue.
-# Sorts out and prints instructions when their number reaches threshold value
-def queue_inst(
-    outfile, inst, cycle_time, width, color, timestamps, store_completions
-):
-    global insts
-    l_copy = copy.deepcopy(inst)
-    insts["queue"].append(l_copy)
-    if len(insts["queue"]) > insts["max_threshold"]:
-        print_insts(
-            outfile,
-            cycle_time,
-            width,
-            color,
-            timestamps,
-            store_completions,
-            insts["min_threshold"],
-        )
 
+class InstPrinter:
+    """
+    Prints the pipeline timeline of instructions.
+    """
 
-# Sorts out and prints instructions in print queue
-def print_insts(
-    outfile,
-    cycle_time,
-    width,
-    color,
-    timestamps,
-    store_completions,
-    lower_threshold,
-):
-    global insts
-    # sort the list of insts by sequence numbers
-    insts["queue"].sort(key=lambda inst: inst["sn"])
-    while len(insts["queue"]) > lower_threshold:
-        print_item = insts["queue"].pop(0)
-        # As the instructions are processed out of order the main loop starts
-        # earlier then specified by start_sn/tick and finishes later then what
-        # is defined in stop_sn/tick.
-        # Therefore, here we have to filter out instructions that reside out of
-        # the specified boundaries.
-        if insts["sn_start"] > 0 and print_item["sn"] < insts["sn_start"]:
-            continue
-            # earlier then the starting sequence number
-        if insts["sn_stop"] > 0 and print_item["sn"] > insts["sn_stop"]:
-            continue
-            # later then the ending sequence number
-        if (
-            insts["tick_start"] > 0
-            and print_item["fetch"] < insts["tick_start"]
-        ):
-            continue
-            # earlier then the starting tick number
-        if insts["tick_stop"] > 0 and print_item["fetch"] > insts["tick_stop"]:
-            continue
-            # later then the ending tick number
+    def __init__(
+        self, outfile, cycle_time, width, color, timestamps, store_completions
+    ):
+        if color:
+            from m5.util.terminal import termcap
+        else:
+            from m5.util.terminal import no_termcap as termcap
+
+        self.outfile = outfile
+        self.cycle_time = cycle_time
+        self.width = width
+        self.timestamps = timestamps
+        self.store_completions = store_completions
+        self.termcap = termcap
+
+        # Pipeline stages as (name, color, shorthand)
+        self.stages = [
+            ("fetch", termcap.Blue + termcap.Reverse, "f"),
+            ("decode", termcap.Yellow + termcap.Reverse, "d"),
+            ("rename", termcap.Magenta + termcap.Reverse, "n"),
+            ("dispatch", termcap.Green + termcap.Reverse, "p"),
+            ("issue", termcap.Red + termcap.Reverse, "i"),
+            ("complete", termcap.Cyan + termcap.Reverse, "c"),
+            ("retire", termcap.Blue + termcap.Reverse, "r"),
+        ]
+        if store_completions:
+            self.stages.append(
+                ("store", termcap.Yellow + termcap.Reverse, "s")
+            )
 
-        if insts["only_committed"] != 0 and print_item["retire"] == 0:
-            continue
-            # retire is set to zero if it hasn't been completed
-        print_inst(
-            outfile,
-            print_item,
-            cycle_time,
-            width,
-            color,
-            timestamps,
-            store_completions,
+    def print_header(self):
+        outfile = self.outfile
+        outfile.write(
+            "// f = fetch, d = decode, n = rename, p = dispatch, "
+            "i = issue, c = complete, r = retire"
         )
 
+        if self.store_completions:
+            outfile.write(", s = store-complete")
+        outfile.write("\n\n")
 
-# Prints a single instruction
-def print_inst(
-    outfile, inst, cycle_time, width, color, timestamps, store_completions
-):
-    if color:
-        from m5.util.terminal import termcap
-    else:
-        from m5.util.terminal import no_termcap as termcap
-    # Pipeline stages
-    stages = [
-        {
-            "name": "fetch",
-            "color": termcap.Blue + termcap.Reverse,
-            "shorthand": "f",
-        },
-        {
-            "name": "decode",
-            "color": termcap.Yellow + termcap.Reverse,
-            "shorthand": "d",
-        },
-        {
-            "name": "rename",
-            "color": termcap.Magenta + termcap.Reverse,
-            "shorthand": "n",
-        },
-        {
-            "name": "dispatch",
-            "color": termcap.Green + termcap.Reverse,
-            "shorthand": "p",
-        },
-        {
-            "name": "issue",
-            "color": termcap.Red + termcap.Reverse,
-            "shorthand": "i",
-        },
-        {
-            "name": "complete",
-            "color": termcap.Cyan + termcap.Reverse,
-            "shorthand": "c",
-        },
-        {
-            "name": "retire",
-            "color": termcap.Blue + termcap.Reverse,
-            "shorthand": "r",
-        },
-    ]
-    if store_completions:
-        stages.append(
-            {
-                "name": "store",
-                "color": termcap.Yellow + termcap.Reverse,
-                "shorthand": "s",
-            }
+        outfile.write(
+            " "
+            + "timeline".center(self.width)
+            + "   "
+            + "tick".center(15)
+            + "  "
+            + "pc.upc".center(12)
+            + "  "
+            + "disasm".ljust(25)
+            + "  "
+            + "seq_num".center(10)
         )
+        if self.timestamps:
+            outfile.write("timestamps".center(25))
+        outfile.write("\n")
+
+    # Prints a single instruction
+    def print_inst(self, inst):
+        outfile = self.outfile
+        termcap = self.termcap
+        stages = self.stages
+        cycle_time = self.cycle_time
+        width = self.width
+
+        time_width = width * cycle_time
+        base_tick = (inst.fetch // time_width) * time_width
+        ticks = [getattr(inst, stage[0]) for stage in stages]
+
+        # Find out the time of the last event - it may not
+        # be 'retire' if the instruction is not comlpeted.
+        last_event_time = max(ticks)
+
+        # Timeline shorter then time_width is printed in compact form where
+        # the print continues at the start of the same line.
+        if (last_event_time - inst.fetch) < time_width:
+            num_lines = 1  # compact form
+        else:
+            num_lines = ((last_event_time - base_tick) // time_width) + 1
 
-    # Print
-
-    time_width = width * cycle_time
-    base_tick = (inst["fetch"] // time_width) * time_width
-
-    # Find out the time of the last event - it may not
-    # be 'retire' if the instruction is not comlpeted.
-    last_event_time = max(
-        inst["fetch"],
-        inst["decode"],
-        inst["rename"],
-        inst["dispatch"],
-        inst["issue"],
-        inst["complete"],
-        inst["retire"],
-    )
-    if store_completions:
-        last_event_time = max(last_event_time, inst["store"])
-
-    # Timeline shorter then time_width is printed in compact form where
-    # the print continues at the start of the same line.
-    if (last_event_time - inst["fetch"]) < time_width:
-        num_lines = 1  # compact form
-    else:
-        num_lines = ((last_event_time - base_tick) // time_width) + 1
-
-    curr_color = termcap.Normal
+        curr_color = termcap.Normal
 
-    # This will visually distinguish completed and abandoned intructions.
-    if inst["retire"] == 0:
-        dot = "="  # abandoned instruction
-    else:
-        dot = "."  # completed instruction
-
-    for i in range(num_lines):
-        start_tick = base_tick + i * time_width
-        end_tick = start_tick + time_width
-        if num_lines == 1:  # compact form
-            end_tick += inst["fetch"] - base_tick
-        events = []
-        for stage_idx in range(len(stages)):
-            tick = inst[stages[stage_idx]["name"]]
-            if tick != 0:
-                if tick >= start_tick and tick < end_tick:
+        # This will visually distinguish completed and abandoned intructions.
+        if inst.retire == 0:
+            dot = "="  # abandoned instruction
+        else:
+            dot = "."  # completed instruction
+
+        for i in range(num_lines):
+            start_tick = base_tick + i * time_width
+            end_tick = start_tick + time_width
+            if num_lines == 1:  # compact form
+                end_tick += inst.fetch - base_tick
+            events = []
+            for stage_idx, tick in enumerate(ticks):
+                if tick != 0 and tick >= start_tick and tick < end_tick:
                     events.append(
                         (
                             tick % time_width,
-                            stages[stage_idx]["name"],
+                            stages[stage_idx][0],
                             stage_idx,
                             tick,
                         )
                     )
-        events.sort()
-        outfile.write("[")
-        pos = 0
-        if num_lines == 1 and events[0][2] != 0:  # event is not fetch
-            curr_color = stages[events[0][2] - 1]["color"]
-        for event in events:
-            if (
-                stages[event[2]]["name"] == "dispatch"
-                and inst["dispatch"] == inst["issue"]
-            ):
-                continue
-            outfile.write(curr_color + dot * ((event[0] // cycle_time) - pos))
-            outfile.write(
-                stages[event[2]]["color"] + stages[event[2]]["shorthand"]
-            )
+            events.sort()
+            outfile.write("[")
+            pos = 0
+            if num_lines == 1 and events[0][2] != 0:  # event is not fetch
+                curr_color = stages[events[0][2] - 1][1]
+            for event in events:
+                if event[1] == "dispatch" and inst.dispatch == inst.issue:
+                    continue
+                outfile.write(
+                    curr_color + dot * ((event[0] // cycle_time) - pos)
+                )
+                outfile.write(stages[event[2]][1] + stages[event[2]][2])
 
-            if event[3] != last_event_time:  # event is not the last one
-                curr_color = stages[event[2]]["color"]
-            else:
-                curr_color = termcap.Normal
+                if event[3] != last_event_time:  # event is not the last one
+                    curr_color = stages[event[2]][1]
+                else:
+                    curr_color = termcap.Normal
 
-            pos = (event[0] // cycle_time) + 1
-        outfile.write(
-            curr_color
-            + dot * (width - pos)
-            + termcap.Normal
-            + "]-("
-            + str(base_tick + i * time_width).rjust(15)
-            + ") "
-        )
-        if i == 0:
+                pos = (event[0] // cycle_time) + 1
             outfile.write(
-                "%s.%s %s [%s]"
-                % (
-                    inst["pc"].rjust(10),
-                    inst["upc"],
-                    inst["disasm"].ljust(25),
-                    str(inst["sn"]).rjust(10),
-                )
+                curr_color
+                + dot * (width - pos)
+                + termcap.Normal
+                + "]-("
+                + str(base_tick + i * time_width).rjust(15)
+                + ") "
             )
-            if timestamps:
-                outfile.write(f"  f={inst['fetch']}, r={inst['retire']}")
-            outfile.write("\n")
-        else:
-            outfile.write("...".center(12) + "\n")
+            if i == 0:
+                outfile.write(
+                    "%s.%s %s [%s]"
+                    % (
+                        inst.pc.rjust(10),
+                        inst.upc,
+                        inst.disasm.ljust(25),
+                        str(inst.sn).rjust(10),
+                    )
+                )
+                if self.timestamps:
+                    outfile.write(f"  f={inst.fetch}, r={inst.retire}")
+                outfile.write("\n")
+            else:
+                outfile.write("...".center(12) + "\n")
 
 
 def validate_range(my_range):
@@ -498,6 +523,14 @@ def main():
         default=False,
         help="additionally display store completion ticks",
     )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        default=False,
+        help="seek to the start of the tick or instruction range using an "
+        "offset index stored next to the trace (TRACE_FILE.idx), which is "
+        "created if it does not exist",
+    )
     parser.add_argument("tracefile")
 
     args = parser.parse_args()
@@ -511,7 +544,11 @@ def main():
         sys.exit(1)
     # Process trace
     print("Processing trace... ", end=" ")
-    with open(args.tracefile) as trace:
+    with open(args.tracefile, "rb") as raw_trace:
+        if args.index:
+            index = load_index(args.tracefile)
+            raw_trace.seek(seek_offset(index, tick_range[0], inst_range[0]))
+        trace = io.TextIOWrapper(raw_trace)
         with open(args.outfile, "w") as out:
             process_trace(
                 trace,
@@ -69,6 +69,10 @@
 # types of proto objects can use the same function to decode a single message
 
 import gzip
+import io
+import json
+import multiprocessing
+import os
 import struct
 
 
@@ -113,7 +117,7 @@ def _DecodeVarint32(in_file):
         c = in_file.read(1)
         if len(c) == 0:
             return (0, 0)
-        b = struct.unpack("<B", c)[0]
+        b = c[0]
         result |= (b & 0x7F) << shift
         pos += 1
         if not (b & 0x80):
@@ -133,6 +137,8 @@ def decodeMessage(in_file, message):
     Attempt to read a message from the file and decode it. Return
     False if no message could be read.
     """
+    if isinstance(in_file, TraceReader):
+        return in_file.decode(message)
     try:
         size, pos = _DecodeVarint32(in_file)
         if size == 0:
@@ -144,6 +150,174 @@ def decodeMessage(in_file, message):
         return False
 
 
+# The size of the blocks read from the (possibly gzipped) trace by
+# TraceReader. Larger blocks amortise the cost of the decompressor calls.
+_BLOCK_SIZE = 1024 * 1024
+
+# The fields of a packet trace record exported by TraceReader.arrays().
+PACKET_FIELDS = ("cmd", "addr", "size", "tick", "pc")
+
+
+class TraceReader:
+    """
+    A buffered reader for length-delimited protobuf messages. Rather than
+    reading one byte at a time, the trace is read in large blocks and the
+    varint length prefixes are decoded in place, which makes iterating
+    over multi-GB (gzipped) traces considerably faster than
+    decodeMessage().
+
+    The reader takes either a path, which is opened using openFileRd(), or
+    a file object opened in binary mode.
+    """
+
+    def __init__(self, in_file, block_size=_BLOCK_SIZE):
+        if isinstance(in_file, (str, bytes, os.PathLike)):
+            in_file = openFileRd(in_file)
+        self._file = in_file
+        self._block_size = block_size
+        self._buf = b""
+        self._pos = 0
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _fill(self, needed):
+        """
+        Make sure that at least ``needed`` unread bytes are buffered.
+        Return False if the end of the file is reached first.
+        """
+        chunks = [self._buf[self._pos :]]
+        available = len(chunks[0])
+        while available < needed:
+            block = self._file.read(max(self._block_size, needed - available))
+            if not block:
+                break
+            chunks.append(block)
+            available += len(block)
+        self._buf = b"".join(chunks)
+        self._pos = 0
+        return available >= needed
+
+    def read(self, size):
+        """
+        Read ``size`` raw bytes, e.g., the magic number at the start of a
+        trace. Fewer bytes are returned at the end of the file.
+        """
+        self._fill(size)
+        data = self._buf[self._pos : self._pos + size]
+        self._pos += len(data)
+        return data
+
+    def raw_messages(self):
+        """
+        Yield the serialized messages in the trace as memoryviews. The
+        views remain valid after the iteration moves on, so they can be
+        collected into batches.
+        """
+        buf = self._buf
+        view = memoryview(buf)
+        pos = self._pos
+        end = len(buf)
+        while True:
+            # Decode the varint length prefix. A prefix is at most 5 bytes
+            # long, so make sure that many are available unless the file
+            # ends first.
+            if end - pos < 5:
+                self._pos = pos
+                self._fill(5)
+                buf = self._buf
+                view = memoryview(buf)
+                pos = 0
+                end = len(buf)
+                if end == 0:
+                    return
+            b = buf[pos]
+            pos += 1
+            size = b & 0x7F
+            shift = 7
+            while b & 0x80:
+                if pos == end:
+                    raise OSError("Truncated varint at the end of the trace.")
+                if shift >= 64:
+                    raise OSError("Too many bytes when decoding varint.")
+                b = buf[pos]
+                pos += 1
+                size |= (b & 0x7F) << shift
+                shift += 7
+            size &= 0xFFFFFFFF
+
+            if end - pos < size:
+                self._pos = pos
+                if not self._fill(size):
+                    raise OSError("Truncated message at the end of the trace.")
+                buf = self._buf
+                view = memoryview(buf)
+                pos = 0
+                end = len(buf)
+
+            message = view[pos : pos + size]
+            pos += size
+            self._pos = pos
+            yield message
+
+    def decode(self, message):
+        """
+        Decode the next message into ``message``. Return False if there are
+        no messages left. This is a drop-in replacement for
+        decodeMessage(), and is typically used to read the trace header.
+        """
+        for raw in self.raw_messages():
+            message.ParseFromString(raw)
+            return True
+        return False
+
+    def batches(self, message_class, batch_size=4096):
+        """
+        Yield lists of up to ``batch_size`` decoded ``message_class``
+        messages until the end of the trace.
+        """
+        batch = []
+        for raw in self.raw_messages():
+            message = message_class()
+            message.ParseFromString(raw)
+            batch.append(message)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def messages(self, message_class, batch_size=4096):
+        """
+        Yield every remaining message in the trace decoded as a
+        ``message_class``.
+        """
+        for batch in self.batches(message_class, batch_size):
+            yield from batch
+
+    def arrays(self, message_class, fields=PACKET_FIELDS, batch_size=65536):
+        """
+        Yield the remaining messages as NumPy structured arrays of up to
+        ``batch_size`` records, with one unsigned 64-bit column per field
+        in ``fields``. Unset optional fields read as 0. The default fields
+        are those of a packet trace record. NumPy must be installed.
+        """
+        import numpy
+
+        dtype = numpy.dtype([(field, numpy.uint64) for field in fields])
+        for batch in self.batches(message_class, batch_size):
+            array = numpy.empty(len(batch), dtype=dtype)
+            for field in fields:
+                array[field] = [getattr(message, field) for message in batch]
+            yield array
+
+
 def _EncodeVarint32(out_file, value):
     """
     The encoding of the Varint32 is copied from
@@ -166,3 +340,273 @@ def encodeMessage(out_file, message):
     out = message.SerializeToString()
     _EncodeVarint32(out_file, len(out))
     out_file.write(out)
+
+
+# The default number of records in each independently decodable block of a
+# trace written by TraceWriter.
+_BLOCK_RECORDS = 65536
+
+
+def _first_tick(message_class, raw):
+    """
+    Return the tick of a serialized ``message_class`` message, or None if
+    the message has no tick.
+    """
+    message = message_class()
+    message.ParseFromString(raw)
+    try:
+        return message.tick if message.HasField("tick") else None
+    except ValueError:
+        # The message type does not have a tick field at all
+        return None
+
+
+class TraceIndex:
+    """
+    The block index of a trace, stored next to the trace as <trace>.idx.
+    The records of an indexed trace are split into blocks which can be
+    decoded independently of each other: for a gzipped trace each block
+    is a separate gzip member, so every block starts at a sync point of
+    the compressed stream. For each block the index records its offset in
+    the trace file, the number of its first record and the tick of that
+    record (None if the records do not have a tick).
+    """
+
+    version = 1
+
+    def __init__(self, compressed, size, records, blocks):
+        self.compressed = compressed
+        self.size = size
+        self.records = records
+        # A list of (offset, first record, first tick) tuples
+        self.blocks = blocks
+
+    @staticmethod
+    def path(trace_path):
+        return f"{trace_path}.idx"
+
+    @classmethod
+    def load(cls, trace_path):
+        """
+        Load the index of a trace. Return None if the trace is not indexed
+        or if the index is out of date.
+        """
+        try:
+            with open(cls.path(trace_path)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != cls.version:
+            return None
+        if data["size"] != os.path.getsize(trace_path):
+            return None
+        return cls(
+            data["compressed"],
+            data["size"],
+            data["records"],
+            [tuple(block) for block in data["blocks"]],
+        )
+
+    def save(self, trace_path):
+        with open(self.path(trace_path), "w") as f:
+            json.dump(
+                {
+                    "version": self.version,
+                    "compressed": self.compressed,
+                    "size": self.size,
+                    "records": self.records,
+                    "blocks": self.blocks,
+                },
+                f,
+            )
+
+    def select(self, start_tick=None, end_tick=None):
+        """
+        Return the numbers of the blocks which may contain records with a
+        tick in [start_tick, end_tick]. This assumes that the records are
+        ordered by tick, as they are in packet traces. If any block lacks a
+        tick, all blocks are returned.
+        """
+        blocks = list(range(len(self.blocks)))
+        ticks = [tick for _, _, tick in self.blocks]
+        if None in ticks:
+            return blocks
+        if end_tick is not None:
+            blocks = [b for b in blocks if ticks[b] <= end_tick]
+        if start_tick is not None:
+            # A block ends where the next one starts
+            blocks = [
+                b
+                for b in blocks
+                if b + 1 == len(ticks) or ticks[b + 1] >= start_tick
+            ]
+        return blocks
+
+    def open_block(self, trace_path, block):
+        """
+        Return a TraceReader for the records of a single block.
+        """
+        offset = self.blocks[block][0]
+        if block + 1 < len(self.blocks):
+            end = self.blocks[block + 1][0]
+        else:
+            end = self.size
+        with open(trace_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(end - offset)
+        if self.compressed:
+            data = gzip.decompress(data)
+        return TraceReader(io.BytesIO(data))
+
+
+class TraceWriter:
+    """
+    Writes a trace of length-delimited messages together with its block
+    index. A trace whose path ends in .gz is gzipped, with a new gzip
+    member started every ``block_records`` records. The result is still
+    an ordinary gzip file for any reader which is unaware of the index.
+
+    If ``message_class`` is given, the tick of the first record of each
+    block is stored in the index so readers can seek to a tick range.
+    """
+
+    def __init__(
+        self,
+        path,
+        header,
+        message_class=None,
+        magic=b"gem5",
+        block_records=_BLOCK_RECORDS,
+    ):
+        self._path = os.fspath(path)
+        self._compressed = self._path.endswith(".gz")
+        self._message_class = message_class
+        self._block_records = block_records
+        self._file = open(self._path, "wb")
+        self._block = io.BytesIO()
+        self._block_count = 0
+        self._records = 0
+        self._blocks = []
+
+        if not isinstance(header, (bytes, bytearray, memoryview)):
+            header = header.SerializeToString()
+        self._block.write(magic)
+        self._write_raw(header)
+        # The header goes in a block of its own, which is not indexed
+        self._flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _write_raw(self, data):
+        _EncodeVarint32(self._block, len(data))
+        self._block.write(data)
+
+    def _flush(self):
+        data = self._block.getvalue()
+        if self._compressed:
+            data = gzip.compress(data)
+        self._file.write(data)
+        self._block = io.BytesIO()
+        self._block_count = 0
+
+    def write_raw(self, data):
+        """
+        Write a serialized message to the trace.
+        """
+        if self._block_count == self._block_records:
+            self._flush()
+        if self._block_count == 0:
+            tick = None
+            if self._message_class is not None:
+                tick = _first_tick(self._message_class, data)
+            self._blocks.append((self._file.tell(), self._records, tick))
+        self._write_raw(data)
+        self._block_count += 1
+        self._records += 1
+
+    def write(self, message):
+        """
+        Write a message to the trace.
+        """
+        self.write_raw(message.SerializeToString())
+
+    def close(self):
+        """
+        Write the last block and the index of the trace.
+        """
+        if self._block_count:
+            self._flush()
+        self._file.close()
+        TraceIndex(
+            self._compressed,
+            os.path.getsize(self._path),
+            self._records,
+            self._blocks,
+        ).save(self._path)
+
+
+def index_trace(
+    in_file, message_class, out_file=None, block_records=_BLOCK_RECORDS
+):
+    """
+    Index an existing trace in a single pass. The records are split into
+    blocks as if written by TraceWriter, which for a gzipped trace means
+    that it is recompressed. The trace is rewritten in place unless
+    ``out_file`` is given. Return the index.
+    """
+    out_path = out_file if out_file is not None else f"{in_file}.part"
+    with TraceReader(in_file) as reader:
+        magic = reader.read(4)
+        header = next(reader.raw_messages(), None)
+        if header is None:
+            raise OSError(f"{in_file} does not contain a trace header")
+        writer = TraceWriter(
+            out_path, header, message_class, magic, block_records
+        )
+        try:
+            for raw in reader.raw_messages():
+                writer.write_raw(raw)
+        finally:
+            writer.close()
+    if out_file is None:
+        os.replace(out_path, in_file)
+        os.replace(TraceIndex.path(out_path), TraceIndex.path(in_file))
+        out_file = in_file
+    return TraceIndex.load(out_file)
+
+
+class _BlockTask:
+    """
+    Applies a function to the reader of a block. This is a class rather
+    than a closure so it can be passed to a process pool.
+    """
+
+    def __init__(self, trace_path, index, func):
+        self.trace_path = trace_path
+        self.index = index
+        self.func = func
+
+    def __call__(self, block):
+        with self.index.open_block(self.trace_path, block) as reader:
+            return self.func(reader)
+
+
+def map_blocks(trace_path, index, func, blocks=None, processes=None):
+    """
+    Call ``func`` with a TraceReader for each of ``blocks`` (all blocks by
+    default) of an indexed trace, spreading the blocks over a pool of
+    ``processes`` processes. ``func`` must be picklable, e.g., a module
+    level function. The results are yielded in block order.
+    """
+    if blocks is None:
+        blocks = range(len(index.blocks))
+    task = _BlockTask(trace_path, index, func)
+    if processes == 1:
+        yield from map(task, blocks)
+        return
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap(task, blocks)
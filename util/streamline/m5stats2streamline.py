@@ -51,7 +51,7 @@
 #                    NOTE: this is NOT the gem5 config.ini file.
 #
 # <gem5 run folder>: Path to gem5 run folder (must contain config.ini,
-#                    stats.txt[.gz], and system.tasks.txt.)
+#                    stats.txt[.gz] or stats.json, and system.tasks.txt.)
 #
 # <dest .apc folder>: Destination .apc folder path
 #
@@ -60,10 +60,12 @@
 
 import argparse
 import gzip
+import json
 import os
 import re
 import shutil
 import sys
+import tempfile
 import xml.dom.minidom as minidom
 import xml.etree.ElementTree as ET
 import zlib
@@ -121,12 +123,29 @@ parser.add_argument(
                     older than 5.14",
 )
 
+parser.add_argument(
+    "--stats-file",
+    action="store",
+    default=None,
+    help="gem5 stats file to convert. Either a stats.txt[.gz] file, or a \
+                    .json[.gz] file written by the JSON stats output or the \
+                    incremental JSON stats output. Default: stats.txt.gz, \
+                    stats.txt or stats.json in the gem5 run folder",
+)
+
 parser.add_argument(
     "--verbose", action="store_true", help="Enable verbose output"
 )
 
 args = parser.parse_args()
 
+# Find the gem5 Python modules (used to read the incremental JSON stats)
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "../../src/python"
+    )
+)
+
 if not re.match(r"(.*)\.apc", args.output_path):
     print("ERROR: <dest .apc folder> should end with '.apc'!")
     sys.exit(1)
@@ -830,11 +849,6 @@ class StatsEntry:
         self.short_name = re.sub(r"system\.", "", name)
         self.short_name = re.sub(":", "_", name)
 
-        # Regex for this stat (string version used to construct union regex)
-        self.regex_string = "^" + name + r"\s+([\d\.]+)"
-        self.regex = re.compile(
-            "^" + name + r"\s+([\d\.e\-]+)\s+# (.*)$", re.M
-        )
         self.description = ""
 
         # Whether this stat is use per CPU or not
@@ -843,11 +857,9 @@ class StatsEntry:
         # Key used in .apc protocol (as described in captured.xml)
         self.key = key
 
-        # List of values of stat per timestamp
-        self.values = []
-
-        # Whether this stat has been found for the current timestamp
-        self.found = False
+        # Values of the stat in the current window (one per CPU for per-CPU
+        # stats), None if not found yet
+        self.values = [None]
 
         # Whether this stat has been found at least once
         # (to suppress too many warnings)
@@ -856,12 +868,10 @@ class StatsEntry:
         # Field used to hold ElementTree subelement for this stat
         self.ET_element = None
 
-        # Create per-CPU stat name and regex, etc.
+        # Create per-CPU stat names
         if self.per_cpu:
-            self.per_cpu_regex_string = []
-            self.per_cpu_regex = []
             self.per_cpu_name = []
-            self.per_cpu_found = []
+            self.values = []
             for i in range(num_cpus):
                 if num_cpus > 1:
                     per_cpu_name = re.sub("#", str(i), self.name)
@@ -870,23 +880,7 @@ class StatsEntry:
 
                 self.per_cpu_name.append(per_cpu_name)
                 print("\t", per_cpu_name)
-
-                self.per_cpu_regex_string.append(
-                    "^" + per_cpu_name + r"\s+[\d\.]+"
-                )
-                self.per_cpu_regex.append(
-                    re.compile(
-                        "^" + per_cpu_name + r"\s+([\d\.e\-]+)\s+# (.*)$", re.M
-                    )
-                )
-                self.values.append([])
-                self.per_cpu_found.append(False)
-
-    def append_value(self, val, per_cpu_index=None):
-        if self.per_cpu:
-            self.values[per_cpu_index].append(str(val))
-        else:
-            self.values.append(str(val))
+                self.values.append(None)
 
 
 # Global stats object that contains the list of stats entries
@@ -894,8 +888,13 @@ class StatsEntry:
 class Stats:
     def __init__(self):
         self.stats_list = []
-        self.tick_list = []
         self.next_key = 1
+        # Stat name (with the CPU number filled in) to (stat, CPU index)
+        self.lookup = {}
+        # Counter frames of every window, copied into the .apc blob once the
+        # other frames have been written
+        self.counter_frames = tempfile.TemporaryFile()
+        self.num_windows = 0
 
     def register(self, name, group, group_index, per_cpu):
         print("registering stat:", name, "group:", group, group_index)
@@ -904,18 +903,68 @@ class Stats:
         )
         self.next_key += 1
 
-    # Union of all stats to accelerate parsing speed
-    def createStatsRegex(self):
-        regex_strings = []
+    # Map every stat name to its entry so that each line of the stats file
+    # only needs a single dict lookup
+    def createStatsLookup(self):
         print("\nnum entries in stats_list", len(self.stats_list))
         for entry in self.stats_list:
             if entry.per_cpu:
                 for i in range(num_cpus):
-                    regex_strings.append(entry.per_cpu_regex_string[i])
+                    self.lookup.setdefault(entry.per_cpu_name[i], (entry, i))
             else:
-                regex_strings.append(entry.regex_string)
-
-        self.regex = re.compile("|".join(regex_strings))
+                self.lookup.setdefault(entry.name, (entry, 0))
+
+    # Record the value of a stat in the current window. Returns False if the
+    # stat was not registered or already found in this window.
+    def setValue(self, name, value, description=""):
+        found = self.lookup.get(name)
+        if found is None:
+            return False
+        stat, index = found
+        if stat.values[index] is not None:
+            return False
+        try:
+            if stat.name == "ipc":
+                value = int(float(value) * 1000)
+            else:
+                value = int(float(value))
+        except (ValueError, OverflowError):
+            # nan or inf
+            return False
+        if args.verbose:
+            print(name, value)
+        stat.values[index] = value
+        if stat.description == "":
+            stat.description = description
+        return True
+
+    # Write the counter frames of a window, using 0 for any stat which was
+    # not found, and start a new window
+    def endWindow(self, tick):
+        if args.verbose:
+            print("new window")
+        timestamp = ticksToNs(tick)
+        for stat in self.stats_list:
+            for i, value in enumerate(stat.values):
+                if value is None:
+                    if not stat.not_found_at_least_once:
+                        print(
+                            "WARNING: stat not found in window #",
+                            self.num_windows,
+                            ":",
+                            stat.per_cpu_name[i]
+                            if stat.per_cpu
+                            else stat.name,
+                        )
+                        print("suppressing further warnings for this stat")
+                        stat.not_found_at_least_once = True
+                    value = 0
+                writeBinary(
+                    self.counter_frames,
+                    counterFrame(timestamp, i, stat.key, value),
+                )
+                stat.values[i] = None
+        self.num_windows += 1
 
 
 def registerStats(config_file):
@@ -965,12 +1014,19 @@ def registerStats(config_file):
                 stats.register(item, group, i, False)
                 i += 1
 
-    stats.createStatsRegex()
+    stats.createStatsLookup()
 
     return stats
 
 
-# Parse and read in gem5 stats file
+# Set the number of gem5 ticks in 1ns from the simulation frequency
+def setSimFreq(sim_freq):
+    global ticks_in_ns
+    ticks_in_ns = int(sim_freq / 1e9)
+    print(f"Simulation frequency found! 1 tick == {1.0 / sim_freq:e} sec\n")
+
+
+# Parse and read in gem5 stats file (stats.txt)
 # Streamline counters are organized per CPU
 def readGem5Stats(stats, gem5_stats_file):
     print("\n===============================")
@@ -979,30 +1035,18 @@ def readGem5Stats(stats, gem5_stats_file):
     print("===============================\n")
     ext = os.path.splitext(gem5_stats_file)[1]
 
-    window_start_regex = re.compile(
-        "^---------- Begin Simulation Statistics ----------"
-    )
-    window_end_regex = re.compile(
-        "^---------- End Simulation Statistics   ----------"
-    )
-    final_tick_regex = re.compile(r"^final_tick\s+(\d+)")
-
-    global ticks_in_ns
-    sim_freq_regex = re.compile(r"^sim_freq\s+(\d+)")
-    sim_freq = -1
+    window_end = "---------- End Simulation Statistics   ----------"
 
     try:
         if ext == ".gz":
-            f = gzip.open(gem5_stats_file, "r")
+            f = gzip.open(gem5_stats_file, "rt")
         else:
             f = open(gem5_stats_file)
     except:
         print("ERROR opening stats file", gem5_stats_file, "!")
         sys.exit(1)
 
-    stats_not_found_list = stats.stats_list[:]
-    window_num = 0
-
+    tick = None
     while True:
         error = False
         try:
@@ -1012,102 +1056,113 @@ def readGem5Stats(stats, gem5_stats_file):
             print("WARNING: IO error in stats file")
             print("(gzip stream not closed properly?)...continuing for now")
             error = True
-        if not line:
+            line = ""
+        if not line and not error:
             break
 
-        # Find out how many gem5 ticks in 1ns
-        if sim_freq < 0:
-            m = sim_freq_regex.match(line)
-            if m:
-                sim_freq = int(m.group(1))  # ticks in 1 sec
-                ticks_in_ns = int(sim_freq / 1e9)
-                print(
-                    f"Simulation frequency found! 1 tick == {1.0 / sim_freq:e} sec\n"
+        # Split the line into the stat name, its value and the description
+        fields = line.split(None, 2)
+        if len(fields) >= 2:
+            name = fields[0]
+
+            # Find out how many gem5 ticks in 1ns
+            if ticks_in_ns < 0 and name in ("sim_freq", "simFreq"):
+                setSimFreq(int(fields[1]))
+
+            # Final tick in gem5 stats: current absolute timestamp
+            if name in ("final_tick", "finalTick"):
+                tick = int(fields[1])
+                if tick > end_tick:
+                    break
+            elif name in stats.lookup:
+                description = ""
+                if len(fields) == 3 and fields[2].startswith("# "):
+                    description = fields[2][2:].rstrip("\n")
+                stats.setValue(name, fields[1], description)
+
+        if (line.startswith(window_end) or error) and tick is not None:
+            stats.endWindow(tick)
+            tick = None
+        if error:
+            break
+    f.close()
+
+
+# Flatten the stats of a stats.json file written by the JSON stats output
+# into a dict of stat names, as used in stats.txt, to (value, description)
+def flattenJsonStats(obj, prefix, values):
+    if not isinstance(obj, dict):
+        return
+    value = obj.get("value")
+    if isinstance(value, (int, float)):
+        values[prefix] = (value, obj.get("description") or "")
+    elif obj.get("type") == "Vector" and isinstance(value, dict):
+        for subname, scalar in value.items():
+            flattenJsonStats(scalar, f"{prefix}::{subname}", values)
+    elif obj.get("type") == "SimObjectVector" and isinstance(value, list):
+        # The SimObjects of a vector are named, e.g., cpu0, cpu1, ...
+        parent = prefix.rpartition(".")[0]
+        for i, child in enumerate(value):
+            name = child.get("name", i) if isinstance(child, dict) else i
+            flattenJsonStats(
+                child, f"{parent}.{name}" if parent else str(name), values
+            )
+    else:
+        for key, child in obj.items():
+            if isinstance(child, dict) and key != "time_conversion":
+                flattenJsonStats(
+                    child, f"{prefix}.{key}" if prefix else key, values
                 )
 
-        # Final tick in gem5 stats: current absolute timestamp
-        m = final_tick_regex.match(line)
-        if m:
-            tick = int(m.group(1))
-            if tick > end_tick:
-                break
-            stats.tick_list.append(tick)
 
-        if window_end_regex.match(line) or error:
-            if args.verbose:
-                print("new window")
-            for stat in stats.stats_list:
-                if stat.per_cpu:
-                    for i in range(num_cpus):
-                        if not stat.per_cpu_found[i]:
-                            if not stat.not_found_at_least_once:
-                                print(
-                                    "WARNING: stat not found in window #",
-                                    window_num,
-                                    ":",
-                                    stat.per_cpu_name[i],
-                                )
-                                print(
-                                    "suppressing further warnings for "
-                                    + "this stat"
-                                )
-                                stat.not_found_at_least_once = True
-                            stat.values[i].append(str(0))
-                        stat.per_cpu_found[i] = False
-                else:
-                    if not stat.found:
-                        if not stat.not_found_at_least_once:
-                            print(
-                                "WARNING: stat not found in window #",
-                                window_num,
-                                ":",
-                                stat.name,
-                            )
-                            print("suppressing further warnings for this stat")
-                            stat.not_found_at_least_once = True
-                        stat.values.append(str(0))
-                    stat.found = False
-            stats_not_found_list = stats.stats_list[:]
-            window_num += 1
-            if error:
-                break
+# Parse and read in a gem5 stats.json file. This is either the output of
+# the JSON stats output (a single dump), or of the incremental JSON stats
+# output (one line per dump).
+def readGem5JsonStats(stats, gem5_stats_file):
+    print("\n===============================")
+    print("Parsing gem5 JSON stats file...")
+    print(gem5_stats_file)
+    print("===============================\n")
 
-        # Do a single regex of the union of all stats first for speed
-        if stats.regex.match(line):
-            # Then loop through only the stats we haven't seen in this window
-            for stat in stats_not_found_list[:]:
-                if stat.per_cpu:
-                    for i in range(num_cpus):
-                        m = stat.per_cpu_regex[i].match(line)
-                        if m:
-                            if stat.name == "ipc":
-                                value = str(int(float(m.group(1)) * 1000))
-                            else:
-                                value = str(int(float(m.group(1))))
-                            if args.verbose:
-                                print(stat.per_cpu_name[i], value)
-                            stat.values[i].append(value)
-                            stat.per_cpu_found[i] = True
-                            all_found = True
-                            for j in range(num_cpus):
-                                if not stat.per_cpu_found[j]:
-                                    all_found = False
-                            if all_found:
-                                stats_not_found_list.remove(stat)
-                            if stat.description == "":
-                                stat.description = m.group(2)
-                else:
-                    m = stat.regex.match(line)
-                    if m:
-                        value = str(int(float(m.group(1))))
-                        if args.verbose:
-                            print(stat.name, value)
-                        stat.values.append(value)
-                        stat.found = True
-                        stats_not_found_list.remove(stat)
-                        if stat.description == "":
-                            stat.description = m.group(2)
-    f.close()
+    opener = gzip.open if gem5_stats_file.endswith(".gz") else open
+    with opener(gem5_stats_file, "rt") as f:
+        first_line = f.readline()
+        f.seek(0)
+        try:
+            record = json.loads(first_line)
+        except ValueError:
+            record = None
+
+        if isinstance(record, dict) and "tick" in record:
+            from m5.ext.pystats.deltas import iter_dumps
+
+            dumps = (
+                (tick, {name: (value, "") for name, value in values.items()})
+                for tick, values in iter_dumps(f)
+            )
+        else:
+            simstat = json.load(f)
+            values = {}
+            flattenJsonStats(simstat, "", values)
+            scale_factor = simstat.get("time_conversion", {}).get(
+                "scale_factor"
+            )
+            if scale_factor:
+                values.setdefault("simFreq", (1.0 / scale_factor, ""))
+            dumps = [(int(simstat.get("simulated_end_time", 0)), values)]
+
+        for tick, values in dumps:
+            if tick > end_tick:
+                break
+            if ticks_in_ns < 0:
+                for name in ("simFreq", "sim_freq"):
+                    if name in values:
+                        setSimFreq(int(values[name][0]))
+                        break
+            for name, (value, description) in values.items():
+                if name in stats.lookup:
+                    stats.setValue(name, value, description)
+            stats.endWindow(tick)
 
 
 # Create session.xml file in .apc folder
@@ -1229,41 +1284,9 @@ def writeSchedEvents(blob):
 
 # Writes selected gem5 statistics as Streamline counters
 def writeCounters(blob, stats):
-    timestamp_list = []
-    for tick in stats.tick_list:
-        if tick > end_tick:
-            break
-        timestamp_list.append(ticksToNs(tick))
-
-    for stat in stats.stats_list:
-        if stat.per_cpu:
-            stat_length = len(stat.values[0])
-        else:
-            stat_length = len(stat.values)
-
-    for n in range(len(timestamp_list)):
-        for stat in stats.stats_list:
-            if stat.per_cpu:
-                for i in range(num_cpus):
-                    writeBinary(
-                        blob,
-                        counterFrame(
-                            timestamp_list[n],
-                            i,
-                            stat.key,
-                            int(float(stat.values[i][n])),
-                        ),
-                    )
-            else:
-                writeBinary(
-                    blob,
-                    counterFrame(
-                        timestamp_list[n],
-                        0,
-                        stat.key,
-                        int(float(stat.values[n])),
-                    ),
-                )
+    stats.counter_frames.seek(0)
+    shutil.copyfileobj(stats.counter_frames, blob)
+    stats.counter_frames.close()
 
 
 # Streamline can display LCD frame buffer dumps (gzipped bmp)
@@ -1385,23 +1408,33 @@ stats = registerStats(stat_config_file)
 ####
 # Parse gem5 stats
 ####
-# Check if both stats.txt and stats.txt.gz exist and warn if both exist
-if os.path.exists(input_path + "/stats.txt") and os.path.exists(
-    input_path + "/stats.txt.gz"
-):
-    print(
-        "WARNING: Both stats.txt.gz and stats.txt exist. \
-            Using stats.txt.gz by default."
-    )
+if args.stats_file:
+    gem5_stats_file = args.stats_file
+else:
+    # Check if both stats.txt and stats.txt.gz exist and warn if both exist
+    if os.path.exists(input_path + "/stats.txt") and os.path.exists(
+        input_path + "/stats.txt.gz"
+    ):
+        print(
+            "WARNING: Both stats.txt.gz and stats.txt exist. \
+                Using stats.txt.gz by default."
+        )
 
-gem5_stats_file = input_path + "/stats.txt.gz"
-if not os.path.exists(gem5_stats_file):
-    gem5_stats_file = input_path + "/stats.txt"
-if not os.path.exists(gem5_stats_file):
-    print(f"ERROR: stats.txt[.gz] file does not exist in {input_path}!")
-    sys.exit(1)
+    for name in ("stats.txt.gz", "stats.txt", "stats.json"):
+        gem5_stats_file = os.path.join(input_path, name)
+        if os.path.exists(gem5_stats_file):
+            break
+    else:
+        print(
+            "ERROR: stats.txt[.gz] or stats.json file does not exist in "
+            f"{input_path}!"
+        )
+        sys.exit(1)
 
-readGem5Stats(stats, gem5_stats_file)
+if re.search(r"\.json(\.gz)?$", gem5_stats_file):
+    readGem5JsonStats(stats, gem5_stats_file)
+else:
+    readGem5Stats(stats, gem5_stats_file)
 
 ####
 # Create Streamline .apc project folder